@@ -8,7 +8,7 @@ from sqlalchemy import engine_from_config, pool
 from alembic import context
 from config import settings
 from database import Base
-from models.market import Market, MarketSnapshot, Signal
+from models.market import Market, MarketSnapshot, MarketVolumeStats, CalibrationForecast, CalibrationBin, Signal, CollectorState, CollectorRun
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -0,0 +1,66 @@
+"""add hourly and daily OHLC rollups of market_snapshots
+
+Revision ID: 1bb68ef7bcb8
+Revises: 2960b2bace1b
+Create Date: 2026-10-18 11:04:27.519360
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1bb68ef7bcb8'
+down_revision: Union[str, Sequence[str], None] = '2960b2bace1b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# view name -> (bucket width, refresh start_offset, refresh end_offset, schedule)
+ROLLUPS = {
+    "market_snapshots_1h": ("1 hour", "3 days", "1 hour", "30 minutes"),
+    "market_snapshots_1d": ("1 day", "7 days", "1 day", "1 hour"),
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # continuous aggregates can't be created inside a transaction
+    with op.get_context().autocommit_block():
+        for view, (bucket, start_offset, end_offset, schedule) in ROLLUPS.items():
+            op.execute(f"""
+                CREATE MATERIALIZED VIEW IF NOT EXISTS {view}
+                WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+                SELECT
+                    time_bucket(INTERVAL '{bucket}', ts) AS bucket,
+                    market_id,
+                    first(price, ts) AS open,
+                    max(price) AS high,
+                    min(price) AS low,
+                    last(price, ts) AS close,
+                    last(volume, ts) AS volume,
+                    last(volume, ts) - first(volume, ts) AS volume_change,
+                    last(liquidity, ts) AS liquidity,
+                    count(*) AS samples
+                FROM market_snapshots
+                GROUP BY bucket, market_id
+                WITH NO DATA
+            """)
+            op.execute(f"CREATE INDEX IF NOT EXISTS ix_{view}_market_bucket ON {view} (market_id, bucket DESC)")
+            op.execute(f"""
+                SELECT add_continuous_aggregate_policy('{view}',
+                    start_offset => INTERVAL '{start_offset}',
+                    end_offset => INTERVAL '{end_offset}',
+                    schedule_interval => INTERVAL '{schedule}',
+                    if_not_exists => true)
+            """)
+            op.execute(f"CALL refresh_continuous_aggregate('{view}', NULL, NULL)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for view in reversed(list(ROLLUPS)):
+            op.execute(f"SELECT remove_continuous_aggregate_policy('{view}', if_exists => true)")
+            op.execute(f"DROP MATERIALIZED VIEW IF EXISTS {view}")
@@ -0,0 +1,72 @@
+"""convert market_snapshots to a compressed hypertable
+
+Revision ID: 2960b2bace1b
+Revises: fd8bcffb750b
+Create Date: 2026-10-18 10:12:41.083215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2960b2bace1b'
+down_revision: Union[str, Sequence[str], None] = 'fd8bcffb750b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# One 5-minute cycle writes a few thousand rows, so a day per chunk keeps
+# chunks small enough to compress and drop cheaply.
+CHUNK_INTERVAL = "1 day"
+COMPRESS_AFTER = "2 days"
+# Resolved markets keep feeding calibration from their last snapshots, so
+# retention has to stay well past the 5-day detector window.
+RETAIN_FOR = "90 days"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS timescaledb")
+    op.execute(f"""
+        SELECT create_hypertable(
+            'market_snapshots', 'ts',
+            chunk_time_interval => INTERVAL '{CHUNK_INTERVAL}',
+            migrate_data => true,
+            if_not_exists => true
+        )
+    """)
+    op.execute("""
+        ALTER TABLE market_snapshots SET (
+            timescaledb.compress,
+            timescaledb.compress_segmentby = 'market_id',
+            timescaledb.compress_orderby = 'ts DESC'
+        )
+    """)
+    op.execute(f"SELECT add_compression_policy('market_snapshots', INTERVAL '{COMPRESS_AFTER}', if_not_exists => true)")
+    op.execute(f"SELECT add_retention_policy('market_snapshots', INTERVAL '{RETAIN_FOR}', if_not_exists => true)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("SELECT remove_retention_policy('market_snapshots', if_exists => true)")
+    op.execute("SELECT remove_compression_policy('market_snapshots', if_exists => true)")
+    op.execute("SELECT decompress_chunk(c, true) FROM show_chunks('market_snapshots') c")
+    op.execute("ALTER TABLE market_snapshots SET (timescaledb.compress = false)")
+
+    # A hypertable can't be turned back into a plain table in place, so copy it out.
+    op.create_table('market_snapshots_plain',
+    sa.Column('ts', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('market_id', sa.String(), nullable=False),
+    sa.Column('price', sa.Numeric(precision=10, scale=4), nullable=True),
+    sa.Column('volume', sa.Numeric(precision=18, scale=2), nullable=True),
+    sa.Column('liquidity', sa.Numeric(precision=18, scale=2), nullable=True),
+    sa.Column('bid_ask_spread', sa.Numeric(precision=10, scale=4), nullable=True),
+    sa.ForeignKeyConstraint(['market_id'], ['markets.id'], ),
+    sa.PrimaryKeyConstraint('ts', 'market_id', name='market_snapshots_plain_pkey')
+    )
+    op.execute("INSERT INTO market_snapshots_plain SELECT ts, market_id, price, volume, liquidity, bid_ask_spread FROM market_snapshots")
+    op.drop_table('market_snapshots')
+    op.rename_table('market_snapshots_plain', 'market_snapshots')
+    op.execute("ALTER TABLE market_snapshots RENAME CONSTRAINT market_snapshots_plain_pkey TO market_snapshots_pkey")
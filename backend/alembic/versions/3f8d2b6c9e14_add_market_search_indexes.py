@@ -0,0 +1,37 @@
+"""add trigram title index and keyset index on markets
+
+Revision ID: 3f8d2b6c9e14
+Revises: 9a4c1e7b3d52
+Create Date: 2026-10-18 17:48:12.604921
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f8d2b6c9e14'
+down_revision: Union[str, Sequence[str], None] = '9a4c1e7b3d52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # keyset pagination compares (updated_at, id); a NULL would drop the row from every page
+    op.execute("UPDATE markets SET updated_at = coalesce(created_at, now()) WHERE updated_at IS NULL")
+    op.create_index('ix_markets_title_trgm', 'markets', ['title'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'})
+    op.create_index('ix_markets_tracked_updated', 'markets', [sa.text('updated_at DESC'), sa.text('id DESC')], unique=False,
+                    postgresql_where=sa.text("status = 'open' AND volume >= 10000"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_markets_tracked_updated', table_name='markets',
+                  postgresql_where=sa.text("status = 'open' AND volume >= 10000"))
+    op.drop_index('ix_markets_title_trgm', table_name='markets', postgresql_using='gin',
+                  postgresql_ops={'title': 'gin_trgm_ops'})
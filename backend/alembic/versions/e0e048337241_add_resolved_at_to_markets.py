@@ -0,0 +1,37 @@
+"""add resolved_at to markets
+
+Revision ID: e0e048337241
+Revises: 5cf1c61caf41
+Create Date: 2026-10-18 16:11:38.402517
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e0e048337241'
+down_revision: Union[str, Sequence[str], None] = '5cf1c61caf41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('markets', sa.Column('resolved_at', sa.DateTime(timezone=True), nullable=True))
+    # best guess for markets resolved before the column existed: their last snapshot
+    op.execute("""
+        UPDATE markets m
+        SET resolved_at = COALESCE(
+            (SELECT max(s.ts) FROM market_snapshots s WHERE s.market_id = m.id),
+            m.updated_at
+        )
+        WHERE m.resolution_result IS NOT NULL
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('markets', 'resolved_at')
@@ -0,0 +1,28 @@
+"""add (market_id, ts DESC) index on market_snapshots
+
+Revision ID: e0e7cbaf6e6d
+Revises: ffdc6ded90ae
+Create Date: 2026-10-18 14:20:05.771942
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e0e7cbaf6e6d'
+down_revision: Union[str, Sequence[str], None] = 'ffdc6ded90ae'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_market_snapshots_market_ts', 'market_snapshots', ['market_id', sa.text('ts DESC')], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_market_snapshots_market_ts', table_name='market_snapshots')
@@ -0,0 +1,44 @@
+"""add partial unique index on active signals
+
+Revision ID: ffdc6ded90ae
+Revises: 174f7585eeae
+Create Date: 2026-10-18 13:47:52.218734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ffdc6ded90ae'
+down_revision: Union[str, Sequence[str], None] = '174f7585eeae'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # keep the most recently seen active row per (market_id, signal_type)
+    op.execute("""
+        UPDATE signals SET status = 'resolved'
+        WHERE id IN (
+            SELECT id FROM (
+                SELECT id, row_number() OVER (
+                    PARTITION BY market_id, signal_type
+                    ORDER BY last_seen DESC NULLS LAST, detected_at DESC NULLS LAST
+                ) AS rn
+                FROM signals
+                WHERE status = 'active'
+            ) ranked
+            WHERE rn > 1
+        )
+    """)
+    op.create_index('uq_signals_active_market_type', 'signals', ['market_id', 'signal_type'], unique=True,
+                    postgresql_where=sa.text("status = 'active'"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_signals_active_market_type', table_name='signals', postgresql_where=sa.text("status = 'active'"))
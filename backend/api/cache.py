@@ -0,0 +1,140 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import Response
+
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    media_type: str | None
+    etag: str
+    version: int
+    expires_at: float
+
+
+class ResponseCache:
+    """Thread-safe LRU of rendered responses with a TTL.
+
+    Entries remember the data version they were rendered under and are
+    treated as misses once the collector has moved the version on.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 300):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, CachedResponse] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, version: int) -> CachedResponse | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.version != version or entry.expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, body: bytes, media_type: str | None, version: int) -> CachedResponse:
+        entry = CachedResponse(
+            body=body,
+            media_type=media_type,
+            etag=make_etag(body),
+            version=version,
+            expires_at=time.monotonic() + self.ttl_seconds,
+        )
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class VersionPoller:
+    """Reads the data version at most once per ``interval`` seconds."""
+
+    def __init__(self, read_version, interval: float = 5):
+        self.read_version = read_version
+        self.interval = interval
+        self._version = None
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def current(self) -> int | None:
+        with self._lock:
+            if time.monotonic() - self._checked_at < self.interval:
+                return self._version
+        version = self.read_version()
+        with self._lock:
+            self._version = version
+            self._checked_at = time.monotonic()
+        return version
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+def cache_key(request) -> str:
+    query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+    return f"{request.url.path}?{query}"
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+class ResponseCacheMiddleware(BaseHTTPMiddleware):
+    """Serve GETs on ``paths`` from a ResponseCache, with ETag revalidation.
+
+    A stored response is reused until it expires or the data version moves,
+    and a client sending a matching If-None-Match gets a bodyless 304. If
+    the version can't be read, requests go straight through uncached.
+    """
+
+    def __init__(self, app, paths, read_version, cache: ResponseCache | None = None, version_poll_seconds: float = 5):
+        super().__init__(app)
+        self.paths = set(paths)
+        self.cache = cache or ResponseCache()
+        self.versions = VersionPoller(read_version, interval=version_poll_seconds)
+
+    async def dispatch(self, request, call_next):
+        if request.method != "GET" or request.url.path not in self.paths:
+            return await call_next(request)
+
+        version = await run_in_threadpool(self.versions.current)
+        if version is None:
+            return await call_next(request)
+
+        key = cache_key(request)
+        entry = self.cache.get(key, version)
+        if entry is None:
+            response = await call_next(request)
+            if response.status_code != 200:
+                return response
+            body = b"".join([chunk async for chunk in response.body_iterator])
+            entry = self.cache.set(key, body, response.media_type or response.headers.get("content-type"), version)
+            cache_status = "MISS"
+        else:
+            cache_status = "HIT"
+
+        headers = {"ETag": entry.etag, "Cache-Control": "no-cache", "X-Cache": cache_status}
+        if etag_matches(request.headers.get("if-none-match"), entry.etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry.body, media_type=entry.media_type, headers=headers)
@@ -0,0 +1,188 @@
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from sqlalchemy import event
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.routing import Match
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    """Cumulative-bucket histogram, one series per label tuple."""
+
+    def __init__(self, name: str, help_text: str, label_names: tuple[str, ...], buckets: tuple[float, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # per-bucket counts (last one is +Inf), then sum
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {labels: (list(counts), total) for labels, (counts, total) in self._series.items()}
+        for labels, (counts, total) in sorted(series.items()):
+            base = _format_labels(self.label_names, labels)
+            running = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                running += count
+                le = bound if bound == "+Inf" else repr(float(bound))
+                lines.append(f'{self.name}_bucket{{{base}{"," if base else ""}le="{le}"}} {running}')
+            lines.append(f"{self.name}_sum{_braced(base)} {total}")
+            lines.append(f"{self.name}_count{_braced(base)} {running}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, label_names: tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = dict(self._values)
+        for labels, value in sorted(values.items()):
+            lines.append(f"{self.name}{_braced(_format_labels(self.label_names, labels))} {value}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(line for metric in self.metrics for line in metric.render()) + "\n"
+
+
+def _format_labels(names, values) -> str:
+    return ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+
+def _braced(labels: str) -> str:
+    return f"{{{labels}}}" if labels else ""
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REGISTRY = Registry()
+REQUEST_LATENCY = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "Request latency by route.",
+    ("method", "route", "status"), LATENCY_BUCKETS))
+REQUEST_DB_TIME = REGISTRY.register(Histogram(
+    "http_request_db_seconds", "Time spent executing SQL per request.",
+    ("method", "route"), LATENCY_BUCKETS))
+REQUEST_STATEMENTS = REGISTRY.register(Histogram(
+    "http_request_db_statements", "SQL statements executed per request.",
+    ("method", "route"), STATEMENT_BUCKETS))
+SLOW_QUERIES = REGISTRY.register(Counter(
+    "db_slow_queries_total", "Statements slower than the slow-query threshold."))
+
+
+@dataclass
+class QueryStats:
+    statements: int = 0
+    db_seconds: float = 0.0
+
+
+# Set per request by the middleware; the engine hooks add to whatever is current.
+# The stats object is mutated in place so threadpool and greenlet copies of the
+# context still report into the request that started them.
+_current_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def instrument_engine(engine, slow_query_ms: float = 0):
+    """Time every statement on ``engine``; log those over ``slow_query_ms`` (0 disables)."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.statements += 1
+            stats.db_seconds += elapsed
+        if slow_query_ms and elapsed * 1000 >= slow_query_ms:
+            SLOW_QUERIES.inc()
+            print(f"Slow query ({elapsed * 1000:.1f} ms): {' '.join(statement.split())[:500]}")
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        starts = context.connection.info.get("query_start") if context.connection is not None else None
+        if starts:
+            starts.pop()
+
+
+def route_label(request) -> str:
+    route = request.scope.get("route")
+    if route is None:
+        # answered before routing (e.g. a response cache hit), so match it here
+        for candidate in request.app.router.routes:
+            if candidate.matches(request.scope)[0] == Match.FULL:
+                route = candidate
+                break
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware(BaseHTTPMiddleware):
+    """Records latency, SQL statement count and DB time for every request.
+
+    Routes are labelled by their path template, so /api/markets/{market_id}
+    stays one series; requests that match no route share "unmatched".
+    """
+
+    def __init__(self, app, exclude_paths=("/metrics",)):
+        super().__init__(app)
+        self.exclude_paths = set(exclude_paths)
+
+    async def dispatch(self, request, call_next):
+        if request.url.path in self.exclude_paths:
+            return await call_next(request)
+
+        stats = QueryStats()
+        token = _current_stats.set(stats)
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+        finally:
+            elapsed = time.perf_counter() - start
+            _current_stats.reset(token)
+            label = route_label(request)
+            REQUEST_LATENCY.observe(elapsed, request.method, label, str(status))
+            REQUEST_DB_TIME.observe(stats.db_seconds, request.method, label)
+            REQUEST_STATEMENTS.observe(stats.statements, request.method, label)
+
+        response.headers["Server-Timing"] = f"db;dur={stats.db_seconds * 1000:.1f}, app;dur={elapsed * 1000:.1f}"
+        response.headers["X-DB-Statements"] = str(stats.statements)
+        return response
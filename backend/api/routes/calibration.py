@@ -1,14 +1,26 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import Optional
 from database import get_db
-from services.calibration import compute_calibration
+from services.calibration import parse_horizon, read_calibration
 
 router = APIRouter()
 
 @router.get("/calibration")
-def get_calibration(
+async def get_calibration(
     category: Optional[str] = Query(None),
+    bins: int = Query(10, ge=2, le=50),
+    bootstrap: int = Query(0, ge=0, le=2000),
+    per_category: bool = Query(False),
+    horizons: Optional[str] = Query(None, description="Comma-separated horizons before resolution, e.g. 1h,24h,7d"),
     db: Session = Depends(get_db),
 ):
-    return compute_calibration(db, category=category)
\ No newline at end of file
+    horizon_list = [h for h in horizons.split(",") if h.strip()] if horizons else None
+    try:
+        for horizon in horizon_list or []:
+            parse_horizon(horizon)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return await run_in_threadpool(read_calibration, db, category=category, n_bins=bins, bootstrap=bootstrap,
+                                   per_category=per_category, horizons=horizon_list)
@@ -0,0 +1,19 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Literal, Optional
+from database import get_async_db
+from services.collector_runs import get_recent_runs
+from services.data_version import get_schedule
+
+router = APIRouter()
+
+@router.get("/collector/runs")
+async def get_collector_runs(limit: int = Query(20, ge=1, le=200),
+                             status: Optional[Literal["ok", "error"]] = Query(None),
+                             db: AsyncSession = Depends(get_async_db)):
+    return await get_recent_runs(db, limit=limit, status=status)
+
+@router.get("/collector/schedule")
+async def get_collector_schedule(db: AsyncSession = Depends(get_async_db)):
+    """Next run, last duration and status of every collector stage, as last published by the collector."""
+    return await get_schedule(db)
@@ -1,26 +1,20 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from database import get_db
-from models.market import Market
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Literal
+from database import get_async_db
+from services.market_query import list_markets
 
 
 router = APIRouter()
 
 @router.get("/markets")
-def get_markets(limit: int = 20, offset: int = 0, search: str | None = None, db: Session = Depends(get_db)):
-    base_query = db.query(Market).filter(Market.status == "open", Market.volume >= 10000)
-    if search:
-        base_query = base_query.filter(Market.title.ilike(f"%{search}%"))
-        
-    total = base_query.count()
-    events = base_query.order_by(Market.updated_at.desc()).offset(offset).limit(limit).all()
-    markets = []
-    for market in events:
-        markets.append({
-            "id": market.id,
-            "question": market.title,
-            "category": market.category,
-            "volume": str(market.volume) if market.volume else "0",
-            "outcomePrices": market.outcome_prices,
-        })
-    return {"markets": markets, "total": total}
\ No newline at end of file
+async def get_markets(limit: int = Query(20, ge=1, le=100),
+                      offset: int = Query(0, ge=0),
+                      cursor: str | None = Query(None, description="next_cursor from the previous page; takes precedence over offset"),
+                      search: str | None = None,
+                      count: Literal["exact", "estimated", "none"] = Query("exact"),
+                      db: AsyncSession = Depends(get_async_db)):
+    try:
+        return await list_markets(db, limit=limit, offset=offset, cursor=cursor, search=search, count=count)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
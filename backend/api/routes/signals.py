@@ -1,46 +1,44 @@
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
-from database import get_db
+from api.signal_stream import signal_events, signal_hub
+from database import get_async_db
 from models.market import Signal, Market
+from services.signal_events import serialize_signal
 
 router = APIRouter()
 
 @router.get("/signals/active")
-def get_active_signals(limit: int = Query(20, le=100),
-                       signal_type: Optional[str] = Query(None),
-                       db: Session = Depends(get_db)):
-    query = (db.query(Signal, Market.title).join(Market, Signal.market_id == Market.id)
+async def get_active_signals(limit: int = Query(20, le=100),
+                             signal_type: Optional[str] = Query(None),
+                             db: AsyncSession = Depends(get_async_db)):
+    query = (select(Signal, Market.title).join(Market, Signal.market_id == Market.id)
              .order_by(Signal.detected_at.desc()))
 
     if signal_type:
-        query = query.filter(Signal.signal_type == signal_type)
+        query = query.where(Signal.signal_type == signal_type)
 
-    signals = query.limit(limit).all()
-    result = []
-    for s, title in signals:
-        result.append({
-            "id": str(s.id),
-            "market_id": s.market_id,
-            "title": title,
-            "signal_type": s.signal_type,
-            "confidence": float(s.confidence) if s.confidence else None,
-            "detected_at": s.detected_at.isoformat() if s.detected_at else None,
-            "metadata": s.signal_metadata,
-        })
-    return result
+    signals = (await db.execute(query.limit(limit))).all()
+    return [serialize_signal(s, title) for s, title in signals]
+
+@router.get("/signals/stream")
+async def stream_signals(signal_type: Optional[str] = Query(None)):
+    """New signals as Server-Sent Events, pushed when the collector commits them."""
+    return StreamingResponse(signal_events(signal_hub, signal_type), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 @router.get("/signals/history/{market_id}")
-def get_signal_history(market_id: str,
-                       limit: int = Query(50, le=200),
-                       db: Session = Depends(get_db)):
+async def get_signal_history(market_id: str,
+                             limit: int = Query(50, le=200),
+                             db: AsyncSession = Depends(get_async_db)):
 
-    signals = (
-        db.query(Signal).filter(Signal.market_id == market_id)
+    signals = (await db.scalars(
+        select(Signal).where(Signal.market_id == market_id)
         .order_by(Signal.detected_at.desc())
         .limit(limit)
-        .all()
-    )
+    )).all()
 
     result = []
     for s in signals:
@@ -51,4 +49,4 @@ def get_signal_history(market_id: str,
             "detected_at": s.detected_at.isoformat() if s.detected_at else None,
             "metadata": s.signal_metadata,
         })
-    return result
\ No newline at end of file
+    return result
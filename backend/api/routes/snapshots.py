@@ -1,21 +1,37 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from database import get_db
-from models.market import MarketSnapshot
-from datetime import datetime, timedelta, timezone
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Literal, Optional
+from database import AsyncSessionLocal, get_async_db
+from services.snapshot_export import EXPORT_FORMATS, stream_snapshots
+from services.snapshot_history import RESOLUTIONS, get_snapshot_history
 router = APIRouter()
 
+MAX_EXPORT_MARKETS = 1000
+
 @router.get("/markets/{market_id}/snapshots")
-def snapshot_history(market_id: str, db: Session= Depends(get_db)):
-    five_days_ago = datetime.now(timezone.utc) - timedelta(days=5)
-    query = db.query(MarketSnapshot).filter(MarketSnapshot.market_id == market_id, MarketSnapshot.ts >= five_days_ago).order_by(MarketSnapshot.ts.desc()).all()
-    
-    snapshots = []
-    for snapshot in query:
-        snapshots.append({
-            "timestamp": snapshot.ts,
-            "price": snapshot.price,
-            "volume": snapshot.volume,
-            "liquidity": snapshot.liquidity,
-        })
-    return snapshots
\ No newline at end of file
+async def snapshot_history(market_id: str,
+                           days: int = Query(5, ge=1, le=90),
+                           resolution: str = Query("auto", pattern=f"^({'|'.join(RESOLUTIONS)})$"),
+                           db: AsyncSession = Depends(get_async_db)):
+    return await get_snapshot_history(db, market_id, days=days, resolution=resolution)
+
+@router.get("/snapshots/export")
+async def export_snapshots(market_ids: str = Query(..., description="Comma-separated market ids"),
+                           start: Optional[datetime] = Query(None),
+                           end: Optional[datetime] = Query(None),
+                           format: Literal["ndjson", "csv"] = Query("ndjson")):
+    ids = list(dict.fromkeys(m.strip() for m in market_ids.split(",") if m.strip()))
+    if not ids:
+        raise HTTPException(status_code=422, detail="market_ids is empty")
+    if len(ids) > MAX_EXPORT_MARKETS:
+        raise HTTPException(status_code=422, detail=f"At most {MAX_EXPORT_MARKETS} markets per export")
+    if start and end and start >= end:
+        raise HTTPException(status_code=422, detail="start must be before end")
+
+    return StreamingResponse(
+        stream_snapshots(AsyncSessionLocal, ids, start=start, end=end, fmt=format),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="snapshots.{format}"'},
+    )
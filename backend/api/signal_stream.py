@@ -0,0 +1,155 @@
+import asyncio
+import json
+
+from config import settings
+from database import AsyncSessionLocal, async_engine
+from services.signal_events import SIGNALS_CHANNEL, load_signal_events, parse_notification
+
+
+async def listen_connection():
+    """A pooled asyncpg connection taken out of the async engine for LISTEN.
+
+    Going through the engine reuses its URL and SSL handling; the
+    connection goes back to the pool once the listener lets go of it.
+    """
+    conn = await async_engine.connect()
+    raw = await conn.get_raw_connection()
+    return conn, raw.driver_connection
+
+
+async def load_events(signal_ids) -> list[dict]:
+    async with AsyncSessionLocal() as db:
+        return await load_signal_events(db, signal_ids)
+
+
+class SignalHub:
+    """Fans new-signal notifications out to every open stream.
+
+    One LISTEN connection serves all subscribers, and each notification
+    costs a single query however many dashboards are connected. The
+    listener starts with the first subscriber and reconnects on its own
+    if the database goes away.
+    """
+
+    def __init__(self, connect=listen_connection, load=load_events, queue_size: int = 100,
+                 keepalive_seconds: float = 30, reconnect_seconds: float = 5):
+        self.connect = connect
+        self.load = load
+        self.queue_size = queue_size
+        self.keepalive_seconds = keepalive_seconds
+        self.reconnect_seconds = reconnect_seconds
+        self.subscribers: set[asyncio.Queue] = set()
+        self._notifications: asyncio.Queue | None = None
+        self._tasks: list[asyncio.Task] = []
+        self.listening = asyncio.Event()
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self.subscribers.add(queue)
+        if all(task.done() for task in self._tasks):
+            self._notifications = asyncio.Queue()
+            self._tasks = [asyncio.create_task(self._listen()), asyncio.create_task(self._dispatch())]
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self.subscribers.discard(queue)
+
+    def publish(self, event: dict):
+        for queue in list(self.subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # a client that can't keep up is cut off; EventSource reconnects
+                # and the dashboard refetches the active list
+                self.unsubscribe(queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        for queue in list(self.subscribers):
+            self.unsubscribe(queue)
+            if not queue.full():
+                queue.put_nowait(None)
+
+    def _on_notify(self, connection, pid, channel, payload):
+        self._notifications.put_nowait(payload)
+
+    async def _listen(self):
+        while True:
+            conn = None
+            try:
+                conn, driver = await self.connect()
+                await driver.add_listener(SIGNALS_CHANNEL, self._on_notify)
+                self.listening.set()
+                try:
+                    while True:
+                        await asyncio.sleep(self.keepalive_seconds)
+                        # an idle LISTEN socket won't notice a dead server on its own
+                        await driver.execute("SELECT 1")
+                finally:
+                    self.listening.clear()
+                    await driver.remove_listener(SIGNALS_CHANNEL, self._on_notify)
+                    await conn.close()
+            except asyncio.CancelledError:
+                if conn is not None:
+                    await _discard(conn)
+                raise
+            except Exception as e:
+                print(f"Signal listener error: {e}")
+                if conn is not None:
+                    await _discard(conn)
+            await asyncio.sleep(self.reconnect_seconds)
+
+    async def _dispatch(self):
+        while True:
+            signal_ids = parse_notification(await self._notifications.get())
+            if not signal_ids or not self.subscribers:
+                continue
+            try:
+                events = await self.load(signal_ids)
+            except Exception as e:
+                print(f"Error loading notified signals: {e}")
+                continue
+            for event in events:
+                self.publish(event)
+
+
+async def _discard(conn):
+    # the socket may be dead or still LISTENing; either way it must not go back to the pool
+    try:
+        await conn.invalidate()
+    except Exception:
+        pass
+
+
+def format_event(event: dict) -> str:
+    return f"id: {event['id']}\nevent: signal\ndata: {json.dumps(event)}\n\n"
+
+
+async def signal_events(hub: SignalHub, signal_type: str | None = None, heartbeat_seconds: float | None = None):
+    """SSE frames for one client: new signals as they land, comments as keep-alives."""
+    heartbeat_seconds = heartbeat_seconds or settings.SIGNAL_STREAM_HEARTBEAT_SECONDS
+    queue = hub.subscribe()
+    try:
+        yield "retry: 5000\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=heartbeat_seconds)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if event is None:
+                return
+            if signal_type and event["signal_type"] != signal_type:
+                continue
+            yield format_event(event)
+    finally:
+        hub.unsubscribe(queue)
+
+
+signal_hub = SignalHub(queue_size=settings.SIGNAL_STREAM_QUEUE_SIZE)
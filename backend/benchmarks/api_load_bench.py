@@ -0,0 +1,123 @@
+# Load-tests the read API on the async stack (async routes on asyncpg; calibration's
+# NumPy work in the threadpool) against the previous sync stack (psycopg2, def
+# routes) over the same database.
+# Both apps serve the bare routers, without the response cache, so every request
+# reaches Postgres. Needs a migrated, populated database in DATABASE_URL.
+#
+#   python -m benchmarks.api_load_bench --concurrency 64 --seconds 15
+
+import argparse
+import asyncio
+import statistics
+import threading
+import time
+
+import httpx
+import uvicorn
+from fastapi import APIRouter, Depends, FastAPI, Query
+from sqlalchemy.orm import Session
+
+from api.routes.calibration import router as calibration_router
+from api.routes.markets import router as market_router
+from api.routes.signals import router as signal_router
+from api.routes.snapshots import router as snapshot_router
+from database import get_db
+from models.market import Market, Signal
+from services.calibration import read_calibration
+from services.market_query import count_statement, market_page, market_statements
+from services.snapshot_history import history_rows, history_statement
+
+def sync_router() -> APIRouter:
+    """The routes as they were before the async move: def handlers on a psycopg2 session."""
+    router = APIRouter()
+
+    @router.get("/markets")
+    def get_markets(limit: int = 20, offset: int = 0, search: str | None = None, db: Session = Depends(get_db)):
+        page, matching = market_statements(limit, offset, search=search)
+        return market_page(db.execute(page).all(), limit, ranked=bool(search),
+                           total=db.execute(count_statement(matching)).scalar_one())
+
+    @router.get("/signals/active")
+    def get_active_signals(limit: int = Query(20, le=100), db: Session = Depends(get_db)):
+        rows = (db.query(Signal, Market.title).join(Market, Signal.market_id == Market.id)
+                .order_by(Signal.detected_at.desc()).limit(limit).all())
+        return [{"id": str(s.id), "market_id": s.market_id, "title": title} for s, title in rows]
+
+    @router.get("/calibration")
+    def get_calibration(db: Session = Depends(get_db)):
+        return read_calibration(db)
+
+    @router.get("/markets/{market_id}/snapshots")
+    def snapshot_history(market_id: str, days: int = 5, db: Session = Depends(get_db)):
+        stmt, resolution = history_statement(market_id, days)
+        return history_rows(db.execute(stmt).all(), resolution)
+
+    return router
+
+def build_app(stack: str) -> FastAPI:
+    app = FastAPI()
+    if stack == "sync":
+        app.include_router(sync_router(), prefix="/api")
+    else:
+        for router in (market_router, signal_router, calibration_router, snapshot_router):
+            app.include_router(router, prefix="/api")
+    return app
+
+def serve(app: FastAPI, port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+async def drive(base_url: str, paths: list[str], concurrency: int, seconds: float) -> tuple[list[float], int]:
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + seconds
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        async def worker(offset: int):
+            nonlocal errors
+            i = offset
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(paths[i % len(paths)])
+                    response.raise_for_status()
+                    latencies.append(time.perf_counter() - start)
+                except httpx.HTTPError:
+                    errors += 1
+                i += 1
+
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return latencies, errors
+
+def report(stack: str, latencies: list[float], errors: int, seconds: float):
+    if not latencies:
+        print(f"{stack:<6} no successful requests ({errors} errors)")
+        return
+    cuts = statistics.quantiles(latencies, n=100)
+    print(f"{stack:<6} {len(latencies) / seconds:>9,.0f} req/s  p50 {cuts[49] * 1000:7.1f} ms  "
+          f"p99 {cuts[98] * 1000:7.1f} ms  errors {errors}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--seconds", type=float, default=15)
+    parser.add_argument("--market-id", help="market to request snapshot history for")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    paths = ["/api/markets?limit=20", "/api/markets?limit=20&search=will", "/api/signals/active", "/api/calibration"]
+    if args.market_id:
+        paths.append(f"/api/markets/{args.market_id}/snapshots?days=5")
+
+    for offset, stack in enumerate(("sync", "async")):
+        port = args.port + offset
+        server = serve(build_app(stack), port)
+        try:
+            asyncio.run(drive(f"http://127.0.0.1:{port}", paths, args.concurrency, 2))  # warm the pools
+            latencies, errors = asyncio.run(drive(f"http://127.0.0.1:{port}", paths, args.concurrency, args.seconds))
+            report(stack, latencies, errors, args.seconds)
+        finally:
+            server.should_exit = True
@@ -0,0 +1,60 @@
+# Compares snapshot write throughput of the ORM path against COPY and execute_values.
+# Needs a migrated database in DATABASE_URL. Every run is rolled back, nothing is kept.
+#
+#   python -m benchmarks.snapshot_writer_bench --rows 5000 --repeat 3
+
+import argparse
+import time
+from datetime import datetime, timezone, timedelta
+
+from database import SessionLocal
+from models.market import Market, MarketSnapshot
+from services.snapshot_writer import write_snapshots
+
+def make_rows(market_ids: list[str], ts: datetime) -> list[dict]:
+    return [{
+        "ts": ts,
+        "market_id": market_id,
+        "price": 0.4321,
+        "volume": 123456.78,
+        "liquidity": 9876.54,
+    } for market_id in market_ids]
+
+def seed_markets(db, count: int) -> list[str]:
+    ids = [f"bench-{i}" for i in range(count)]
+    db.bulk_save_objects([Market(id=market_id, title="bench", status="open") for market_id in ids])
+    db.flush()
+    return ids
+
+def orm_write(db, rows: list[dict]) -> int:
+    for row in rows:
+        db.add(MarketSnapshot(**row))
+    db.flush()
+    return len(rows)
+
+def run(label: str, writer, rows_count: int, repeat: int):
+    timings = []
+    for i in range(repeat):
+        db = SessionLocal()
+        try:
+            market_ids = seed_markets(db, rows_count)
+            rows = make_rows(market_ids, datetime.now(timezone.utc) - timedelta(minutes=i))
+            start = time.perf_counter()
+            writer(db, rows)
+            timings.append(time.perf_counter() - start)
+        finally:
+            db.rollback()
+            db.close()
+
+    best = min(timings)
+    print(f"{label:<8} {rows_count:>8} rows  best {best * 1000:8.1f} ms  {rows_count / best:>12,.0f} rows/sec")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    run("orm", orm_write, args.rows, args.repeat)
+    run("values", lambda db, rows: write_snapshots(db, rows, method="values"), args.rows, args.repeat)
+    run("copy", lambda db, rows: write_snapshots(db, rows, method="copy"), args.rows, args.repeat)
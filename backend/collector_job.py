@@ -1,12 +1,7 @@
 # Used for GCP Cloud Run Job, full logic in snapshots.py
 
-from services.snapshots import collect_snapshots
-from services.market_sync import sync_markets
-from services.cleanup import cleanup_old_snapshots
-from services.calibration import sync_resolved_market
+from services.snapshots import run_cycle
 
-cleanup_old_snapshots(days=5)
-sync_markets()
-sync_resolved_market()
-collect_snapshots()
-print("Collection Complete")
\ No newline at end of file
+if not run_cycle(full_sync=True):
+    raise SystemExit("Collection failed: could not fetch events")
+print("Collection Complete")
@@ -2,8 +2,43 @@ from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     DATABASE_URL: str
+    # sync (psycopg2) pool: the collector and scripts, plus the API's calibration reads
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    # async (asyncpg) pool: every other API route; only the API process ever connects with it
+    DB_ASYNC_POOL_SIZE: int = 10
+    DB_ASYNC_MAX_OVERFLOW: int = 20
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    SLOW_QUERY_MS: float = 0  # log statements slower than this; 0 disables
     POLYMARKET_GAMMA_API_URL: str = "https://gamma-api.polymarket.com"
     POLYMARKET_CLOB_API_URL:  str = "https://clob.polymarket.com"
+    GAMMA_PAGE_SIZE: int = 100
+    GAMMA_MAX_CONCURRENCY: int = 8
+    CLOB_BOOKS_ENABLED: bool = True
+    CLOB_BOOKS_BATCH_SIZE: int = 100
+    CLOB_MAX_CONCURRENCY: int = 8
+    CLOB_DEADLINE_SECONDS: float = 90
+    BOOK_DEPTH_CENTS: float = 2  # depth counts resting size within this many cents of the mid
+    CLOB_WS_URL: str = "wss://ws-subscriptions-clob.polymarket.com/ws/market"
+    STREAM_FLUSH_SECONDS: float = 60
+    STREAM_UNIVERSE_REFRESH_SECONDS: float = 300
+    STREAM_MAX_BACKOFF_SECONDS: float = 60
+    SNAPSHOT_RETENTION_DAYS: int = 90
+    VOLUME_BASELINE_DAYS: int = 5
+    DETECTOR_BACKEND: str = "local"  # "local" (rolling state + NumPy) or "sql" (window functions in Postgres)
+    DETECTOR_WORKERS: int = 4
+    SCHEDULE_SNAPSHOTS_SECONDS: float = 300
+    SCHEDULE_DETECTION_SECONDS: float = 300
+    SCHEDULE_MARKET_SYNC_SECONDS: float = 12 * 60 * 60
+    SCHEDULE_RESOLUTION_SYNC_SECONDS: float = 12 * 60 * 60
+    SCHEDULE_CLEANUP_SECONDS: float = 24 * 60 * 60
+    SCHEDULE_JITTER_SECONDS: float = 5
+    RESPONSE_CACHE_TTL_SECONDS: int = 300
+    RESPONSE_CACHE_MAX_ENTRIES: int = 512
+    RESPONSE_CACHE_VERSION_POLL_SECONDS: float = 5
+    SIGNAL_STREAM_HEARTBEAT_SECONDS: float = 15
+    SIGNAL_STREAM_QUEUE_SIZE: int = 100  # events buffered per client before a slow one is dropped
     CORS_ORIGINS: str = "http://localhost:5173"
     DEBUG: bool = True
 
@@ -1,10 +1,33 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from config import settings
 
-engine = create_engine(settings.DATABASE_URL, echo=settings.DEBUG)
+POOL_OPTIONS = {
+    "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+}
+
+def async_database_url(url: str):
+    """Same database through asyncpg; psycopg2's sslmode becomes asyncpg's ssl."""
+    url = make_url(url)
+    query = dict(url.query)
+    if "sslmode" in query:
+        query["ssl"] = query.pop("sslmode")
+    return url.set(drivername="postgresql+asyncpg", query=query)
+
+# sync engine for the collector, scripts and the API's NumPy-heavy calibration
+# (run in the threadpool, off the event loop); async engine for every other route.
+# Each has its own pool size, so an API process can keep the sync one small.
+engine = create_engine(settings.DATABASE_URL, echo=settings.DEBUG, pool_size=settings.DB_POOL_SIZE,
+                       max_overflow=settings.DB_MAX_OVERFLOW, **POOL_OPTIONS)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+async_engine = create_async_engine(async_database_url(settings.DATABASE_URL), echo=settings.DEBUG,
+                                   pool_size=settings.DB_ASYNC_POOL_SIZE,
+                                   max_overflow=settings.DB_ASYNC_MAX_OVERFLOW, **POOL_OPTIONS)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
 Base = declarative_base()
 
 def get_db():
@@ -12,4 +35,8 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,31 +1,61 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from api.routes.markets import router as market_router
 from api.routes.signals import router as signal_router
 from api.routes.calibration import router as calibration_router
 from api.routes.snapshots import router as snapshot_router
+from api.routes.collector import router as collector_router
+from api.cache import ResponseCache, ResponseCacheMiddleware
+from api.metrics import REGISTRY, MetricsMiddleware, instrument_engine
+from api.signal_stream import signal_hub
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 from config import settings
-from database import get_db
+from database import async_engine, engine, get_db
+from services.data_version import read_data_version
 
-app = FastAPI(title="Polywatch API, A Polymarket Signal Detector")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await signal_hub.stop()
+    await async_engine.dispose()
+    engine.dispose()
 
+app = FastAPI(title="Polywatch API, A Polymarket Signal Detector", lifespan=lifespan)
+
+instrument_engine(engine, slow_query_ms=settings.SLOW_QUERY_MS)
+instrument_engine(async_engine.sync_engine, slow_query_ms=settings.SLOW_QUERY_MS)
+
+# innermost first: cache, then metrics (so cache hits are timed too), then CORS
+# outermost so it also wraps cached and 304 responses
+app.add_middleware(ResponseCacheMiddleware,
+                   paths=["/api/markets", "/api/signals/active", "/api/calibration"],
+                   read_version=read_data_version,
+                   cache=ResponseCache(max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+                                       ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS),
+                   version_poll_seconds=settings.RESPONSE_CACHE_VERSION_POLL_SECONDS,
+                   )
+app.add_middleware(MetricsMiddleware)
 app.add_middleware(CORSMiddleware,
                    allow_origins=settings.CORS_ORIGINS.split(","),
                    allow_credentials=True,
                    allow_methods=["*"],
-                   allow_headers=["*"]
+                   allow_headers=["*"],
+                   expose_headers=["ETag", "Server-Timing"],
                    )
 app.include_router(market_router, prefix="/api")
 app.include_router(signal_router, prefix="/api")
 app.include_router(calibration_router, prefix="/api")
 app.include_router(snapshot_router, prefix="/api")
+app.include_router(collector_router, prefix="/api")
 
 
 @app.get("/")
 def get_root():
     return {"status": "API is running..."}
 
-
-
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
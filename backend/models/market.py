@@ -1,12 +1,17 @@
 import uuid
 from database import Base
-from sqlalchemy import Column, String, Text, Numeric, Integer, ForeignKey, DateTime
+from sqlalchemy import Column, String, Text, Numeric, Integer, BigInteger, Boolean, Float, ForeignKey, DateTime, Index, text
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.sql import func
 
 
 class Market(Base):
     __tablename__ = "markets"
+    __table_args__ = (
+        Index("ix_markets_title_trgm", "title", postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"}),
+        Index("ix_markets_tracked_updated", text("updated_at DESC"), text("id DESC"),
+              postgresql_where=text("status = 'open' AND volume >= 10000")),
+    )
 
     id = Column(String, primary_key=True)
     title = Column(Text, nullable=False)
@@ -16,11 +21,15 @@ class Market(Base):
     outcome_prices = Column(JSONB)
     outcomes = Column(JSONB)
     resolution_result = Column(String, nullable=True)
+    resolved_at = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
 class MarketSnapshot(Base):
     __tablename__ = "market_snapshots"
+    __table_args__ = (
+        Index("ix_market_snapshots_market_ts", "market_id", text("ts DESC")),
+    )
 
     ts = Column(DateTime(timezone=True), primary_key=True, server_default=func.now())
     market_id = Column(String, ForeignKey("markets.id"), primary_key=True)
@@ -28,9 +37,51 @@ class MarketSnapshot(Base):
     volume = Column(Numeric(18, 2))
     liquidity = Column(Numeric(18, 2))
     bid_ask_spread = Column(Numeric(10, 4))
+    best_bid_size = Column(Numeric(18, 2))
+    best_ask_size = Column(Numeric(18, 2))
+    bid_depth = Column(Numeric(18, 2))
+    ask_depth = Column(Numeric(18, 2))
+
+class MarketVolumeStats(Base):
+    __tablename__ = "market_volume_stats"
+
+    market_id = Column(String, ForeignKey("markets.id"), primary_key=True)
+    first_ts = Column(DateTime(timezone=True))
+    last_ts = Column(DateTime(timezone=True))
+    last_volume = Column(Numeric(18, 2))
+    last_delta = Column(Float)
+    snapshot_count = Column(Integer, nullable=False, default=0)
+    delta_count = Column(Integer, nullable=False, default=0)
+    delta_mean = Column(Float, nullable=False, default=0.0)
+    delta_m2 = Column(Float, nullable=False, default=0.0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class CalibrationForecast(Base):
+    __tablename__ = "calibration_forecasts"
+
+    market_id = Column(String, ForeignKey("markets.id"), primary_key=True)
+    category = Column(String, index=True)
+    predicted = Column(Float, nullable=False)
+    actual = Column(Float, nullable=False)
+    recorded_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class CalibrationBin(Base):
+    __tablename__ = "calibration_bins"
+
+    n_bins = Column(Integer, primary_key=True)
+    scope = Column(String, primary_key=True)
+    bin_index = Column(Integer, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    sum_predicted = Column(Float, nullable=False, default=0.0)
+    sum_actual = Column(Float, nullable=False, default=0.0)
+    brier_sum = Column(Float, nullable=False, default=0.0)
 
 class Signal(Base):
     __tablename__ = "signals"
+    __table_args__ = (
+        Index("uq_signals_active_market_type", "market_id", "signal_type",
+              unique=True, postgresql_where=text("status = 'active'")),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     market_id = Column(String, ForeignKey("markets.id"), nullable=False)
@@ -41,5 +92,25 @@ class Signal(Base):
     confidence = Column(Numeric(4, 2))
     signal_metadata = Column(JSONB)
 
+class CollectorState(Base):
+    __tablename__ = "collector_state"
+
+    id = Column(Integer, primary_key=True)
+    data_version = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    schedule = Column(JSONB)  # per-stage scheduler state, written by the running collector
+
+class CollectorRun(Base):
+    __tablename__ = "collector_runs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    started_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    finished_at = Column(DateTime(timezone=True))
+    duration_ms = Column(Float)
+    full_sync = Column(Boolean, nullable=False, default=False)
+    status = Column(String, nullable=False)
+    error = Column(Text)
+    stages = Column(JSONB)
+
 # class TraderPerformance(Base):
 #   __tablename__ = "trader_performance"
\ No newline at end of file
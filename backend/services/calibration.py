@@ -1,53 +1,81 @@
 import json
+import re
+import warnings
+from datetime import datetime, timezone
+import numpy as np
 from database import SessionLocal
-from models.market import Market, MarketSnapshot
+from models.market import Market, MarketSnapshot, CalibrationForecast, CalibrationBin
+from services.collector_runs import record_error, span
+from services.ingestion import EventBatch, fetch_event_batch
 from services.polymarket_service import PolyMarketClient
+from sqlalchemy import exists, select, text, true
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
-def sync_resolved_market():
-    client = PolyMarketClient()
+def sync_resolved_market(batch: EventBatch | None = None):
+    client = PolyMarketClient() if batch is None else None
     db = SessionLocal()
     try:
-        events = client.get_events(limit=100, closed=True)
-        updated = 0
+        if batch is None:
+            batch = fetch_event_batch(client, include_open=False)
+        with span("sync_resolved.write") as s:
+            now = datetime.now(timezone.utc)
+            updated = 0
         
-        for event in events:
-            for market_data in event.get("markets", []):
-                market_id = market_data.get("id")
-                if not market_data.get("closed"):
+            for market_data in batch.closed_markets:
+                market_id = market_data["id"]
+                if not market_data["closed"]:
                     continue
-                
+            
                 existing = db.query(Market).filter(Market.id == market_id).first()
                 if not existing:
                     continue
                 if existing.resolution_result:
                     continue
-                
-                resolution = _derive_resolution(market_data)
+            
+                resolution = _derive_resolution(market_data["data"])
                 if resolution is not None:
                     existing.resolution_result = resolution
+                    existing.resolved_at = _parse_closed_time(market_data["data"].get("closedTime")) or now
                     existing.status = "closed"
-                    existing.outcome_prices = market_data.get("outcomePrices")
+                    existing.outcome_prices = market_data["outcome_prices"]
                     updated += 1
                     
-        unresolved = db.query(Market).filter(
-            Market.status == "closed", Market.resolution_result.is_(None), Market.outcome_prices.isnot(None), Market.outcomes.isnot(None)
-            ).all()
+            unresolved = db.query(Market).filter(
+                Market.status == "closed", Market.resolution_result.is_(None), Market.outcome_prices.isnot(None), Market.outcomes.isnot(None)
+                ).all()
         
-        for market in unresolved:
-            resolution = _derive_resolution({"outcomePrices": market.outcome_prices, "outcomes": market.outcomes,})
-            if resolution is not None:
-                market.resolution_result = resolution
-                updated += 1
-        db.commit()
+            for market in unresolved:
+                resolution = _derive_resolution({"outcomePrices": market.outcome_prices, "outcomes": market.outcomes,})
+                if resolution is not None:
+                    market.resolution_result = resolution
+                    market.resolved_at = now
+                    updated += 1
+            if updated:
+                db.flush()
+                recorded = refresh_calibration(db)
+                print(f"Recorded {recorded} new calibration forecasts")
+            db.commit()
+            s.rows = updated
         print(f"Updated {updated} resolved markets")
     except Exception as e:
         db.rollback()
         print(f"Error syncing resolved markets: {e}")
+        record_error(f"Error syncing resolved markets: {e}")
     finally:
-        client.close()
+        if client:
+            client.close()
         db.close()
         
+def _parse_closed_time(raw: str | None) -> datetime | None:
+    if not raw:
+        return None
+    try:
+        closed_time = datetime.fromisoformat(raw)
+    except (TypeError, ValueError):
+        return None
+    return closed_time if closed_time.tzinfo else closed_time.replace(tzinfo=timezone.utc)
+
 def _derive_resolution(market_data: dict) -> str | None:
     raw_prices = market_data.get("outcomePrices")
     raw_outcomes = market_data.get("outcomes")
@@ -80,115 +108,450 @@ def _derive_resolution(market_data: dict) -> str | None:
     winner_index = float_prices.index(max_price)
     return outcomes[winner_index]
 
-def compute_calibration(db: Session, category: str | None = None) -> dict:
-    query = db.query(Market).filter(Market.resolution_result.isnot(None))
+def compute_calibration(db: Session, category: str | None = None, n_bins: int = 10,
+                        bootstrap: int = 0, per_category: bool = False, horizons: list[str] | None = None) -> dict:
+    forecasts = load_forecasts(db, category=category)
+    result = _calibration_from_forecasts(forecasts, n_bins=n_bins, bootstrap=bootstrap, per_category=per_category)
+    if horizons:
+        result["horizons"] = compute_horizon_calibration(db, horizons, category=category)
+    return result
+
+def _calibration_from_forecasts(forecasts: list[dict], n_bins: int = 10, bootstrap: int = 0,
+                                per_category: bool = False) -> dict:
+    if not forecasts:
+        return _empty_calibration()
+
+    predicted, actual, categories = _forecast_arrays(forecasts)
+    brier_score = float(((predicted - actual) ** 2).sum()) / len(predicted)
+
+    result = {
+        "brier_score": round(brier_score, 4),
+        "market_count": len(forecasts),
+        "calibration_curve": _compute_calibration_bins(forecasts, n_bins),
+        "category_breakdown": _compute_category_breakdown(forecasts),
+    }
+    if per_category:
+        result["category_curves"] = {
+            str(name): _compute_calibration_bins([f for f, c in zip(forecasts, categories) if c == name], n_bins)
+            for name in np.unique(categories)
+        }
+    if bootstrap:
+        _attach_bootstrap(result, predicted, actual, n_bins, bootstrap)
+    return result
+
+def _empty_calibration() -> dict:
+    return {
+        "brier_score": None,
+        "market_count": 0,
+        "calibration_curve": [],
+        "category_breakdown": [],
+    }
+
+def load_forecasts(db: Session, category: str | None = None, pending_only: bool = False) -> list[dict]:
+    """Last tradable price of every resolved market, fetched in one LATERAL query."""
+    last_snapshot = (
+        select(MarketSnapshot.price)
+        .where(
+            MarketSnapshot.market_id == Market.id,
+            MarketSnapshot.price > 0.01,
+            MarketSnapshot.price < 0.99,
+        )
+        .order_by(MarketSnapshot.ts.desc())
+        .limit(1)
+        .correlate(Market)
+        .lateral("last_snapshot")
+    )
+    query = db.query(Market.id, Market.category, Market.outcomes, Market.resolution_result, last_snapshot.c.price).join(
+        last_snapshot, true()).filter(Market.resolution_result.isnot(None))
     if category:
         query = query.filter(Market.category == category)
-    
-    resolved_markets = query.all()
-    
-    if not resolved_markets:
-        return {
-            "brier_score": None,
-            "market_count": 0,
-            "calibration_curve": [],
-            "category_breakdown": [],
-        }
-        
+    if pending_only:
+        query = query.filter(~exists().where(CalibrationForecast.market_id == Market.id))
+
     forecasts = []
-    
-    for market in resolved_markets:
-        outcomes = market.outcomes
+    for row in query.all():
+        outcomes = row.outcomes
         if isinstance(outcomes, str):
             outcomes = json.loads(outcomes)
-            
-        if not outcomes or len(outcomes) != 2:
-            continue
-        
-        last_snapshots = (db.query(MarketSnapshot).filter(
-            MarketSnapshot.market_id == market.id,
-            MarketSnapshot.price > 0.01,
-            MarketSnapshot.price < 0.99
-            ).order_by(MarketSnapshot.ts.desc()).first())
-        
-        if not last_snapshots or last_snapshots.price is None:
+
+        if not outcomes or len(outcomes) != 2 or row.price is None:
             continue
-        
-        predicted = float(last_snapshots.price)
-        actual = 1.0 if market.resolution_result == outcomes[0] else 0.0
-        
+
         forecasts.append({
-            "predicted": predicted,
-            "actual": actual,
-            "category": market.category,
+            "market_id": row.id,
+            "predicted": float(row.price),
+            "actual": 1.0 if row.resolution_result == outcomes[0] else 0.0,
+            "category": row.category,
         })
-        
-    if not forecasts:
-        return {
-            "brier_score": None,
-            "market_count": 0,
-            "calibration_curve": [],
-            "category_breakdown": [],
-        }
-    
-    brier_sum = sum((f["predicted"] - f["actual"]) ** 2 for f in forecasts)
-    brier_score = brier_sum / len(forecasts)
-    
-    calibration_curve = _compute_calibration_bins(forecasts)
-    category_breakdown = _compute_category_breakdown(forecasts)
-    
-    return {
-        "brier_score": round(brier_score, 4),
-        "market_count": len(forecasts),
-        "calibration_curve": calibration_curve,
-        "category_breakdown": category_breakdown,
-    }
+    return forecasts
+
+HORIZON_UNITS = {"m": 1 / 60, "h": 1, "d": 24, "w": 24 * 7}
+
+# Every resolved market crossed with every horizon, each pair resolved to the
+# last snapshot at or before resolved_at - horizon by one (market_id, ts DESC)
+# index probe.
+HORIZON_SQL = text("""
+    SELECT h.label, m.id, m.outcomes, m.resolution_result, asof.price
+    FROM markets m
+    CROSS JOIN unnest(CAST(:labels AS text[]), CAST(:hours AS float8[])) AS h(label, hours)
+    JOIN LATERAL (
+        SELECT s.price
+        FROM market_snapshots s
+        WHERE s.market_id = m.id
+          AND s.ts <= m.resolved_at - make_interval(secs => h.hours * 3600)
+          AND s.price IS NOT NULL
+        ORDER BY s.ts DESC
+        LIMIT 1
+    ) asof ON true
+    WHERE m.resolution_result IS NOT NULL
+      AND m.resolved_at IS NOT NULL
+      AND (CAST(:category AS text) IS NULL OR m.category = :category)
+""")
+
+def parse_horizon(value: str) -> float:
+    """'90m', '1h', '24h', '7d', '2w' -> hours."""
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)([mhdw])", value.strip().lower())
+    if not match:
+        raise ValueError(f"Invalid horizon: {value!r}")
+    return float(match.group(1)) * HORIZON_UNITS[match.group(2)]
+
+def compute_horizon_calibration(db: Session, horizons: list[str], category: str | None = None) -> list[dict]:
+    """Brier score of the as-of price at each horizon before resolution, in one query."""
+    # "24h" and " 24H" are one horizon; keep the first spelling's position
+    labels = list(dict.fromkeys(h.strip().lower() for h in horizons))
+    hours = [parse_horizon(label) for label in labels]
+    rows = db.execute(HORIZON_SQL, {"labels": labels, "hours": hours, "category": category}).all()
+
+    by_horizon: dict[str, list[dict]] = {label: [] for label in labels}
+    for row in rows:
+        outcomes = row.outcomes
+        if isinstance(outcomes, str):
+            outcomes = json.loads(outcomes)
+        if not outcomes or len(outcomes) != 2:
+            continue
+        by_horizon[row.label].append({
+            "predicted": float(row.price),
+            "actual": 1.0 if row.resolution_result == outcomes[0] else 0.0,
+        })
+
+    results = []
+    for label, horizon_hours in zip(labels, hours):
+        forecasts = by_horizon[label]
+        brier_score = None
+        if forecasts:
+            predicted = np.array([f["predicted"] for f in forecasts])
+            actual = np.array([f["actual"] for f in forecasts])
+            brier_score = round(float(((predicted - actual) ** 2).mean()), 4)
+        results.append({
+            "horizon": label,
+            "hours": horizon_hours,
+            "brier_score": brier_score,
+            "market_count": len(forecasts),
+        })
+    return results
 
 def _compute_calibration_bins(forecasts: list[dict], n_bins: int = 10) -> list[dict]:
+    predicted, actual, _ = _forecast_arrays(forecasts)
+    counts, sum_predicted, sum_actual = _bin_sums(predicted, actual, n_bins)
+    return _curve_from_sums(counts, sum_predicted, sum_actual, n_bins)
+
+def _compute_category_breakdown(forecasts: list[dict]) -> list[dict]:
+    if not forecasts:
+        return []
+
+    predicted, actual, categories = _forecast_arrays(forecasts)
+    names, inverse = np.unique(categories, return_inverse=True)
+    counts = np.bincount(inverse, minlength=len(names))
+    briers = np.bincount(inverse, weights=(predicted - actual) ** 2, minlength=len(names)) / counts
+
+    breakdown = []
+    for name, brier, count in zip(names, briers, counts):
+        breakdown.append({
+            "category": str(name),
+            "brier_score": round(float(brier), 4),
+            "count": int(count),
+        })
+        
+    return sorted(breakdown, key=lambda x: x["brier_score"])
+
+def _forecast_arrays(forecasts: list[dict]):
+    predicted = np.array([f["predicted"] for f in forecasts], dtype=float)
+    actual = np.array([f["actual"] for f in forecasts], dtype=float)
+    categories = np.array([f["category"] or UNCATEGORIZED for f in forecasts], dtype=str)
+    return predicted, actual, categories
+
+def _bin_indices(predicted: np.ndarray, n_bins: int) -> np.ndarray:
+    """Bin of every forecast in one pass: i * width <= p < (i + 1) * width, 1.0 in the last bin, -1 outside."""
+    bin_width = 1.0 / n_bins
+    edges = np.arange(n_bins + 1) * bin_width
+    indices = np.searchsorted(edges, predicted, side="right") - 1
+    indices[predicted == 1.0] = n_bins - 1
+    indices[(indices < 0) | (indices >= n_bins)] = -1
+    return indices
+
+def _bin_sums(predicted: np.ndarray, actual: np.ndarray, n_bins: int):
+    indices = _bin_indices(predicted, n_bins)
+    valid = indices >= 0
+    counts = np.bincount(indices[valid], minlength=n_bins)
+    sum_predicted = np.bincount(indices[valid], weights=predicted[valid], minlength=n_bins)
+    sum_actual = np.bincount(indices[valid], weights=actual[valid], minlength=n_bins)
+    return counts, sum_predicted, sum_actual
+
+def _curve_from_sums(counts, sum_predicted, sum_actual, n_bins: int) -> list[dict]:
     bins = []
     bin_width = 1.0 / n_bins
-    
+
     for i in range(n_bins):
         bin_start = i * bin_width
         bin_end = (i + 1) * bin_width
-        
-        in_bin = [
-            f for f in forecasts
-            if bin_start <= f["predicted"] < bin_end
-            or (i == n_bins - 1 and f["predicted"] == 1.0)
-        ]
-        
-        if in_bin:
-            avg_predicted = sum(f["predicted"] for f in in_bin) / len(in_bin)
-            actual_frequency = sum(f["actual"] for f in in_bin) / len(in_bin)
+        count = int(counts[i])
+
+        if count:
+            avg_predicted = float(sum_predicted[i]) / count
+            actual_frequency = float(sum_actual[i]) / count
         else:
             avg_predicted = (bin_start + bin_end) / 2
             actual_frequency = None
-        
+
         bins.append({
             "bin_start": round(bin_start, 2),
             "bin_end": round(bin_end, 2),
             "avg_predicted": round(avg_predicted, 4),
             "actual_frequency": round(actual_frequency, 4) if actual_frequency is not None else None,
-            "count": len(in_bin),
+            "count": count,
         })
     return bins
 
-def _compute_category_breakdown(forecasts: list[dict]) -> list[dict]:
-    categories: dict[str, list] = {}
-    for f in forecasts:
-        cat = f["category"] or "Uncategorized"
-        if cat not in categories:
-            categories[cat] = []
-        categories[cat].append(f)
-        
+BOOTSTRAP_CHUNK = 200
+# resampled forecasts per chunk; each chunk holds a few arrays this size (~16 MB as float64)
+BOOTSTRAP_CHUNK_ELEMENTS = 2_000_000
+
+def _bootstrap_chunk(n: int) -> int:
+    """Resamples per chunk: up to BOOTSTRAP_CHUNK, fewer when n forecasts would blow the budget."""
+    return max(1, min(BOOTSTRAP_CHUNK, BOOTSTRAP_CHUNK_ELEMENTS // max(n, 1)))
+
+def _attach_bootstrap(result: dict, predicted: np.ndarray, actual: np.ndarray, n_bins: int,
+                      resamples: int, seed: int = 0):
+    intervals = _bootstrap_intervals(predicted, actual, n_bins, resamples, seed)
+    result["brier_ci"] = intervals["brier"]
+    for calibration_bin, interval in zip(result["calibration_curve"], intervals["bins"]):
+        calibration_bin["frequency_ci"] = interval
+
+def _bootstrap_intervals(predicted: np.ndarray, actual: np.ndarray, n_bins: int,
+                         resamples: int, seed: int = 0, level: float = 0.95) -> dict:
+    """Percentile bootstrap intervals for the Brier score and every bin's actual frequency.
+
+    Resamples are drawn as int32 index matrices and reduced with row-offset
+    bincounts, a chunk of resamples at a time sized to bound memory.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(predicted)
+    squared_error = (predicted - actual) ** 2
+    indices = _bin_indices(predicted, n_bins).astype(np.int32)
+    chunk = _bootstrap_chunk(n)
+
+    briers = []
+    frequencies = []
+    for start in range(0, resamples, chunk):
+        size = min(chunk, resamples - start)
+        sample = rng.integers(0, n, size=(size, n), dtype=np.int32)
+        briers.append(squared_error[sample].mean(axis=1))
+
+        sample_bins = indices[sample]
+        valid = sample_bins >= 0
+        keys = (sample_bins + n_bins * np.arange(size)[:, None])[valid]
+        counts = np.bincount(keys, minlength=size * n_bins).reshape(size, n_bins)
+        hits = np.bincount(keys, weights=actual[sample][valid], minlength=size * n_bins).reshape(size, n_bins)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            frequencies.append(hits / counts)
+
+    tail = (1 - level) / 2 * 100
+    brier_low, brier_high = np.percentile(np.concatenate(briers), [tail, 100 - tail])
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        bin_low, bin_high = np.nanpercentile(np.vstack(frequencies), [tail, 100 - tail], axis=0)
+
+    return {
+        "brier": [round(float(brier_low), 4), round(float(brier_high), 4)],
+        "bins": [
+            None if np.isnan(low) else [round(float(low), 4), round(float(high), 4)]
+            for low, high in zip(bin_low, bin_high)
+        ],
+    }
+
+OVERALL_SCOPE = ""
+UNCATEGORIZED = "Uncategorized"
+
+def read_calibration(db: Session, category: str | None = None, n_bins: int = 10,
+                     bootstrap: int = 0, per_category: bool = False, horizons: list[str] | None = None) -> dict:
+    """Calibration read from the materialized calibration_bins store.
+
+    A bin count that hasn't been asked for before is built once from the
+    recorded forecasts; after that it is kept current by refresh_calibration.
+    Bootstrap intervals need the individual forecasts, so they cost one
+    read of calibration_forecasts.
+    """
+    rows = db.query(CalibrationBin).filter(CalibrationBin.n_bins == n_bins).all()
+    if not rows:
+        _build_bins(db, n_bins)
+        rows = db.query(CalibrationBin).filter(CalibrationBin.n_bins == n_bins).all()
+
+    result = _calibration_from_bins(rows, n_bins, category, per_category=per_category)
+    if bootstrap and result["market_count"]:
+        query = db.query(CalibrationForecast.predicted, CalibrationForecast.actual)
+        if category == UNCATEGORIZED:
+            # the bins file uncategorized markets under this name; the forecasts keep NULL
+            query = query.filter(CalibrationForecast.category.is_(None))
+        elif category:
+            query = query.filter(CalibrationForecast.category == category)
+        stored = query.all()
+        if stored:
+            predicted = np.array([f.predicted for f in stored], dtype=float)
+            actual = np.array([f.actual for f in stored], dtype=float)
+            _attach_bootstrap(result, predicted, actual, n_bins, bootstrap)
+    if horizons:
+        result["horizons"] = compute_horizon_calibration(db, horizons, category=category)
+    return result
+
+# Held until commit by every writer of the calibration store, so a refresh and
+# a first build (or two of either) can't both fold in the same forecasts.
+CALIBRATION_LOCK_SQL = text("SELECT pg_advisory_xact_lock(:key)")
+CALIBRATION_LOCK_KEY = 0x63616C62
+
+def _lock_calibration(db: Session):
+    db.execute(CALIBRATION_LOCK_SQL, {"key": CALIBRATION_LOCK_KEY})
+
+def _build_bins(db: Session, n_bins: int):
+    """Materialize a bin count for the first time from every recorded forecast, and commit."""
+    try:
+        refresh_calibration(db)  # takes the lock
+        # another request may have built it while we waited on the lock
+        if db.query(CalibrationBin.n_bins).filter(CalibrationBin.n_bins == n_bins).first() is None:
+            _accumulate_bins(db, n_bins, [
+                {"predicted": f.predicted, "actual": f.actual, "category": f.category}
+                for f in db.query(CalibrationForecast).all()
+            ], include_empty=True, additive=False)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+def refresh_calibration(db: Session) -> int:
+    """Fold newly resolved markets into the calibration store. The caller commits."""
+    _lock_calibration(db)
+    pending = load_forecasts(db, pending_only=True)
+    if not pending:
+        return 0
+
+    result = db.execute(insert(CalibrationForecast).values([{
+        "market_id": f["market_id"],
+        "category": f["category"],
+        "predicted": f["predicted"],
+        "actual": f["actual"],
+    } for f in pending]).on_conflict_do_nothing(
+        index_elements=[CalibrationForecast.market_id],
+    ).returning(CalibrationForecast.market_id))
+    # only rows this call actually recorded go into the bins
+    inserted = {row.market_id for row in result}
+    recorded = [f for f in pending if f["market_id"] in inserted]
+    if not recorded:
+        return 0
+
+    materialized = [n for (n,) in db.query(CalibrationBin.n_bins).distinct().all()]
+    for n_bins in materialized:
+        _accumulate_bins(db, n_bins, recorded)
+    return len(recorded)
+
+def _accumulate_bins(db: Session, n_bins: int, forecasts: list[dict], include_empty: bool = False,
+                     additive: bool = True):
+    totals = _bin_totals(forecasts, n_bins)
+    if include_empty:
+        for i in range(n_bins):
+            totals.setdefault((OVERALL_SCOPE, i), [0, 0.0, 0.0, 0.0])
+    if not totals:
+        return
+
+    stmt = insert(CalibrationBin).values([{
+        "n_bins": n_bins,
+        "scope": scope,
+        "bin_index": bin_index,
+        "count": count,
+        "sum_predicted": sum_predicted,
+        "sum_actual": sum_actual,
+        "brier_sum": brier_sum,
+    } for (scope, bin_index), (count, sum_predicted, sum_actual, brier_sum) in totals.items()])
+    if not additive:
+        db.execute(stmt.on_conflict_do_nothing(
+            index_elements=[CalibrationBin.n_bins, CalibrationBin.scope, CalibrationBin.bin_index]))
+        return
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[CalibrationBin.n_bins, CalibrationBin.scope, CalibrationBin.bin_index],
+        set_={
+            "count": CalibrationBin.count + stmt.excluded.count,
+            "sum_predicted": CalibrationBin.sum_predicted + stmt.excluded.sum_predicted,
+            "sum_actual": CalibrationBin.sum_actual + stmt.excluded.sum_actual,
+            "brier_sum": CalibrationBin.brier_sum + stmt.excluded.brier_sum,
+        },
+    ))
+
+def _bin_totals(forecasts: list[dict], n_bins: int) -> dict:
+    # (scope, bin_index) -> [count, sum_predicted, sum_actual, brier_sum], overall and per category
+    totals: dict[tuple, list] = {}
+    if not forecasts:
+        return totals
+
+    predicted, actual, categories = _forecast_arrays(forecasts)
+    indices = _bin_indices(predicted, n_bins)
+    squared_error = (predicted - actual) ** 2
+
+    scopes = [(OVERALL_SCOPE, indices >= 0)]
+    scopes += [(str(name), (indices >= 0) & (categories == name)) for name in np.unique(categories)]
+    for scope, mask in scopes:
+        counts = np.bincount(indices[mask], minlength=n_bins)
+        sum_predicted = np.bincount(indices[mask], weights=predicted[mask], minlength=n_bins)
+        sum_actual = np.bincount(indices[mask], weights=actual[mask], minlength=n_bins)
+        brier_sum = np.bincount(indices[mask], weights=squared_error[mask], minlength=n_bins)
+        for i in np.flatnonzero(counts):
+            totals[(scope, int(i))] = [int(counts[i]), float(sum_predicted[i]), float(sum_actual[i]), float(brier_sum[i])]
+    return totals
+
+def _calibration_from_bins(rows, n_bins: int, category: str | None = None, per_category: bool = False) -> dict:
+    scopes: dict[str, tuple] = {}
+    for row in rows:
+        counts, sum_predicted, sum_actual, brier_sum = scopes.setdefault(
+            row.scope, (np.zeros(n_bins, dtype=int), np.zeros(n_bins), np.zeros(n_bins), np.zeros(n_bins)))
+        counts[row.bin_index] = row.count
+        sum_predicted[row.bin_index] = row.sum_predicted
+        sum_actual[row.bin_index] = row.sum_actual
+        brier_sum[row.bin_index] = row.brier_sum
+
+    curve_scope = scopes.get(category or OVERALL_SCOPE)
+    market_count = int(curve_scope[0].sum()) if curve_scope else 0
+    if not market_count:
+        return _empty_calibration()
+
     breakdown = []
-    for cat, cat_forecasts in sorted(categories.items()):
-        brier = sum((f["predicted"] - f["actual"]) ** 2 for f in cat_forecasts) / len(cat_forecasts)
+    category_curves = {}
+    for scope, (counts, sum_predicted, sum_actual, brier_sum) in sorted(scopes.items()):
+        if scope == OVERALL_SCOPE or (category and scope != category):
+            continue
+        count = int(counts.sum())
+        if not count:
+            continue
         breakdown.append({
-            "category": cat,
-            "brier_score": round(brier, 4),
-            "count": len(cat_forecasts),
+            "category": scope,
+            "brier_score": round(float(brier_sum.sum()) / count, 4),
+            "count": count,
         })
-        
-    return sorted(breakdown, key=lambda x: x["brier_score"])
\ No newline at end of file
+        if per_category:
+            category_curves[scope] = _curve_from_sums(counts, sum_predicted, sum_actual, n_bins)
+
+    result = {
+        "brier_score": round(float(curve_scope[3].sum()) / market_count, 4),
+        "market_count": market_count,
+        "calibration_curve": _curve_from_sums(*curve_scope[:3], n_bins),
+        "category_breakdown": sorted(breakdown, key=lambda x: x["brier_score"]),
+    }
+    if per_category:
+        result["category_curves"] = category_curves
+    return result
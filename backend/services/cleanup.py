@@ -1,21 +1,27 @@
 from datetime import datetime, timezone, timedelta
+from sqlalchemy import text
+from config import settings
 from database import SessionLocal
-from models.market import Market, MarketSnapshot
+from services.collector_runs import record_error, span
 
-def cleanup_old_snapshots(days=5):
+def cleanup_old_snapshots(days: int | None = None):
+    # market_snapshots is a hypertable with a retention policy, so this only
+    # forces the same chunk drop on demand instead of deleting row by row.
+    days = days or settings.SNAPSHOT_RETENTION_DAYS
     db = SessionLocal()
     try:
         cutoff = datetime.now(timezone.utc) - timedelta(days=days)
-        deleted = db.query(MarketSnapshot).filter(
-            MarketSnapshot.ts < cutoff,
-            MarketSnapshot.market_id.in_(
-                db.query(Market.id).filter(Market.status == "open")
-            )
-        ).delete(synchronize_session=False)
-        db.commit()
-        print(f"Cleanup up {deleted} old snapshots")
+        with span("cleanup.drop_chunks") as s:
+            dropped = db.execute(
+                text("SELECT drop_chunks('market_snapshots', older_than => :cutoff)"),
+                {"cutoff": cutoff},
+            ).fetchall()
+            db.commit()
+            s.rows = len(dropped)
+        print(f"Dropped {len(dropped)} snapshot chunks older than {days} days")
     except Exception as e:
         db.rollback()
         print(f"Error cleaning up: {e}")
+        record_error(f"Error cleaning up: {e}")
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
@@ -0,0 +1,149 @@
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+from sqlalchemy import select
+
+from database import SessionLocal
+from models.market import CollectorRun
+
+
+class Span:
+    def __init__(self, name: str, offset_ms: float):
+        self.name = name
+        self.offset_ms = offset_ms
+        self.duration_ms = None
+        self.rows = None
+        self.error = None
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "offset_ms": round(self.offset_ms, 1),
+            "duration_ms": round(self.duration_ms, 1) if self.duration_ms is not None else None,
+            "rows": self.rows,
+            "error": self.error,
+        }
+
+
+class RunRecorder:
+    """Collects timed spans for one collector cycle."""
+
+    def __init__(self, full_sync: bool = False):
+        self.id = uuid.uuid4()
+        self.full_sync = full_sync
+        self.started_at = datetime.now(timezone.utc)
+        self._start = time.perf_counter()
+        self.spans: list[Span] = []
+        self.error = None
+        self.finished_at = None
+        self.duration_ms = None
+
+    @contextmanager
+    def span(self, name: str):
+        span = Span(name, (time.perf_counter() - self._start) * 1000)
+        self.spans.append(span)
+        start = time.perf_counter()
+        try:
+            yield span
+        except Exception as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.duration_ms = (time.perf_counter() - start) * 1000
+
+    @property
+    def status(self) -> str:
+        return "error" if self.failure else "ok"
+
+    @property
+    def failure(self) -> str | None:
+        """The run's own error, else the first failed span's."""
+        return self.error or next((f"{s.name}: {s.error}" for s in self.spans if s.error), None)
+
+    def finish(self):
+        self.finished_at = datetime.now(timezone.utc)
+        self.duration_ms = (time.perf_counter() - self._start) * 1000
+
+    def to_row(self) -> dict:
+        return {
+            "id": self.id,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "duration_ms": self.duration_ms,
+            "full_sync": self.full_sync,
+            "status": self.status,
+            "error": self.error,
+            "stages": [s.to_dict() for s in self.spans],
+        }
+
+
+_current_run: ContextVar[RunRecorder | None] = ContextVar("collector_run", default=None)
+
+
+@contextmanager
+def span(name: str):
+    """Time a block as a span of the active collector run; a plain no-op outside one."""
+    run = _current_run.get()
+    if run is None:
+        yield Span(name, 0.0)
+        return
+    with run.span(name) as current:
+        yield current
+
+
+def record_error(message: str):
+    """Mark the active collector run failed for an error the caller logs and swallows."""
+    run = _current_run.get()
+    if run is not None and run.error is None:
+        run.error = message
+
+
+@contextmanager
+def collector_run(full_sync: bool = False):
+    """Record one collector cycle and persist it to collector_runs when it ends."""
+    run = RunRecorder(full_sync=full_sync)
+    token = _current_run.set(run)
+    try:
+        yield run
+    except Exception as e:
+        run.error = run.error or f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_run.reset(token)
+        run.finish()
+        save_run(run)
+        print(f"Cycle {run.status} in {run.duration_ms:.0f} ms: "
+              + ", ".join(f"{s.name} {s.duration_ms:.0f}ms" for s in run.spans if s.duration_ms is not None))
+
+
+def save_run(run: RunRecorder):
+    db = SessionLocal()
+    try:
+        db.add(CollectorRun(**run.to_row()))
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"Error saving collector run: {e}")
+    finally:
+        db.close()
+
+
+async def get_recent_runs(db, limit: int = 20, status: str | None = None) -> list[dict]:
+    query = select(CollectorRun).order_by(CollectorRun.started_at.desc())
+    if status:
+        query = query.where(CollectorRun.status == status)
+    runs = (await db.scalars(query.limit(limit))).all()
+
+    return [{
+        "id": str(run.id),
+        "started_at": run.started_at,
+        "finished_at": run.finished_at,
+        "duration_ms": run.duration_ms,
+        "full_sync": run.full_sync,
+        "status": run.status,
+        "error": run.error,
+        "stages": run.stages or [],
+    } for run in runs]
@@ -0,0 +1,49 @@
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from database import SessionLocal
+from models.market import CollectorState
+
+STATE_ID = 1
+
+def bump_data_version(db) -> int:
+    """Advance the collector-cycle stamp that read caches are keyed on. Caller commits."""
+    stmt = insert(CollectorState).values(id=STATE_ID, data_version=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[CollectorState.id],
+        set_={"data_version": CollectorState.data_version + 1, "updated_at": func.now()},
+    ).returning(CollectorState.data_version)
+    return db.execute(stmt).scalar_one()
+
+def get_data_version(db) -> int:
+    version = db.execute(select(CollectorState.data_version).where(CollectorState.id == STATE_ID)).scalar()
+    return version or 0
+
+def save_schedule(schedule: list[dict]):
+    """Publish the collector's scheduler state; leaves the data version alone."""
+    db = SessionLocal()
+    try:
+        stmt = insert(CollectorState).values(id=STATE_ID, data_version=0, schedule=schedule)
+        db.execute(stmt.on_conflict_do_update(index_elements=[CollectorState.id],
+                                              set_={"schedule": stmt.excluded.schedule}))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+async def get_schedule(db) -> list[dict]:
+    schedule = (await db.execute(select(CollectorState.schedule).where(CollectorState.id == STATE_ID))).scalar()
+    return schedule or []
+
+def read_data_version() -> int | None:
+    """Current stamp from a short-lived session, or None if the database can't be reached."""
+    db = SessionLocal()
+    try:
+        return get_data_version(db)
+    except Exception as e:
+        print(f"Error reading data version: {e}")
+        return None
+    finally:
+        db.close()
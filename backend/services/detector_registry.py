@@ -0,0 +1,132 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from types import MappingProxyType
+from typing import Callable, Mapping
+
+import numpy as np
+
+from config import settings
+from database import SessionLocal
+from models.market import Market
+from services.collector_runs import span
+from services.snapshot_frame import SnapshotFrame, load_snapshot_frame
+
+
+@dataclass(frozen=True)
+class Detector:
+    name: str
+    signal_type: str
+    detect: Callable
+    window: timedelta | None = None  # snapshot history read from the shared frame, if any
+
+
+DETECTORS: dict[str, Detector] = {}
+
+
+def register_detector(name: str, signal_type: str, window: timedelta | None = None):
+    """Add the decorated ``detect(ctx) -> list[signal]`` to the registry under ``name``."""
+    def decorator(detect):
+        DETECTORS[name] = Detector(name, signal_type, detect, window)
+        return detect
+    return decorator
+
+
+@dataclass(frozen=True)
+class DetectionContext:
+    """What every detector in a run shares; loaded once and never written to.
+
+    ``frame`` holds the widest window any selected detector asked for,
+    ascending by ts within each market; ``window_starts`` narrows it per
+    detector. Detectors that need the database open their own session.
+    """
+    now: datetime
+    markets: Mapping
+    frame: SnapshotFrame
+    session_factory: Callable = SessionLocal
+
+    def window_starts(self, window: timedelta) -> np.ndarray:
+        """First row index of every segment inside ``window``; past the segment end if none is."""
+        frame = self.frame
+        if not len(frame):
+            return np.array([], dtype=int)
+        rows = np.arange(len(frame))
+        inside = np.where(frame.ts >= (self.now - window).timestamp(), rows, len(frame))
+        return np.minimum.reduceat(inside, frame.starts)
+
+    @contextmanager
+    def session(self):
+        db = self.session_factory()
+        try:
+            yield db
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+def tracked_markets(db) -> dict:
+    """Open markets worth watching, as plain rows so they're safe to share across threads."""
+    markets = {}
+    for market in db.query(Market.id, Market.title, Market.volume).filter(Market.status == "open").all():
+        if not market.volume or float(market.volume) < 10000:
+            continue
+        markets[market.id] = market
+    return markets
+
+
+def load_detection_context(db, detectors, now: datetime | None = None) -> DetectionContext:
+    now = now or datetime.now(timezone.utc)
+    markets = tracked_markets(db)
+    windows = [d.window for d in detectors if d.window is not None]
+    if windows and markets:
+        frame = load_snapshot_frame(db, markets.keys(), now - max(windows))
+    else:
+        frame = SnapshotFrame([])
+    frame.freeze()
+    return DetectionContext(now=now, markets=MappingProxyType(markets), frame=frame)
+
+
+def run_detectors(db, names=None, max_workers: int | None = None, now: datetime | None = None):
+    """Run the registered detectors (or just ``names``) over one shared context.
+
+    Returns (signals, signal_types that completed). A detector that fails
+    is logged and left out of the second value, so its active signals
+    aren't resolved just because it couldn't look this time.
+    """
+    detectors = [DETECTORS[n] for n in names] if names is not None else list(DETECTORS.values())
+    if not detectors:
+        return [], []
+
+    with span("detection.frame") as sp:
+        ctx = load_detection_context(db, detectors, now)
+        sp.rows = len(ctx.frame)
+
+    max_workers = max_workers or settings.DETECTOR_WORKERS
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(detectors)), thread_name_prefix="detector") as pool:
+        # copy the context per task so spans land on the current collector run
+        futures = [pool.submit(contextvars.copy_context().run, _run_one, d, ctx) for d in detectors]
+        results = [f.result() for f in futures]
+
+    signals = []
+    failed = {d.signal_type for d, found in zip(detectors, results) if found is None}
+    for detector, found in zip(detectors, results):
+        if found is not None:
+            print(f"{detector.name}: {len(found)}")
+            signals.extend(found)
+    completed = list(dict.fromkeys(d.signal_type for d in detectors if d.signal_type not in failed))
+    return signals, completed
+
+
+def _run_one(detector: Detector, ctx: DetectionContext):
+    try:
+        with span(f"detection.{detector.name}") as sp:
+            found = detector.detect(ctx)
+            sp.rows = len(found)
+        return found
+    except Exception as e:
+        print(f"Error in detector {detector.name}: {e}")
+        return None
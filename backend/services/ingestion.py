@@ -0,0 +1,81 @@
+import json
+from services.collector_runs import span
+from services.polymarket_service import PolyMarketClient
+
+
+class EventBatch:
+    """One Gamma crawl, parsed once and shared by every collector stage."""
+
+    def __init__(self, open_events: list | None = None, closed_events: list | None = None):
+        self.open_events = open_events or []
+        self.closed_events = closed_events or []
+        self.open_markets = _parse_events(self.open_events)
+        self.closed_markets = _parse_events(self.closed_events)
+
+def fetch_event_batch(client: PolyMarketClient, include_open: bool = True, include_closed: bool = True) -> EventBatch:
+    with span("fetch.http") as s:
+        open_events = client.get_all_events(closed=False) if include_open else []
+        closed_events = client.get_all_events(closed=True) if include_closed else []
+        s.rows = len(open_events) + len(closed_events)
+    with span("fetch.parse") as s:
+        batch = EventBatch(open_events, closed_events)
+        s.rows = len(batch.open_markets) + len(batch.closed_markets)
+    print(f"Fetched {len(batch.open_events)} open and {len(batch.closed_events)} closed events")
+    return batch
+
+def load_event_batch(include_open: bool = True, include_closed: bool = True) -> EventBatch:
+    client = PolyMarketClient()
+    try:
+        return fetch_event_batch(client, include_open=include_open, include_closed=include_closed)
+    finally:
+        client.close()
+
+def _parse_events(events: list) -> list[dict]:
+    markets = []
+    for event in events:
+        tags = event.get("tags", [])
+        category = tags[0]["label"].title() if tags else None
+        liquidity = _to_float(event.get("liquidity"))
+
+        for market_data in event.get("markets", []):
+            markets.append(_parse_market(market_data, category, liquidity))
+    return markets
+
+def _parse_market(market_data: dict, category: str | None, liquidity: float) -> dict:
+    closed = bool(market_data.get("closed"))
+    return {
+        "id": market_data.get("id"),
+        "title": market_data.get("question", ""),
+        "category": category,
+        "closed": closed,
+        "status": "closed" if closed else "open",
+        "volume": market_data.get("volume"),
+        "volume_value": _to_float(market_data.get("volume")),
+        "outcome_prices": market_data.get("outcomePrices"),
+        "outcomes": market_data.get("outcomes"),
+        "price": _first_price(market_data.get("outcomePrices", "[]")),
+        "token_id": _first_token(market_data.get("clobTokenIds")),
+        "liquidity": liquidity,
+        "data": market_data,
+    }
+
+def _first_price(raw_prices) -> float | None:
+    try:
+        prices = json.loads(raw_prices) if isinstance(raw_prices, str) else raw_prices
+        return float(prices[0]) if prices else None
+    except (json.JSONDecodeError, IndexError, TypeError, ValueError):
+        return None
+
+def _first_token(raw_tokens) -> str | None:
+    # CLOB token of the first outcome, the one ``price`` refers to
+    try:
+        tokens = json.loads(raw_tokens) if isinstance(raw_tokens, str) else raw_tokens
+        return str(tokens[0]) if tokens else None
+    except (json.JSONDecodeError, IndexError, TypeError):
+        return None
+
+def _to_float(value) -> float:
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
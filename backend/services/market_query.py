@@ -0,0 +1,102 @@
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import func, select, tuple_
+from models.market import Market
+
+COUNT_MODES = ("exact", "estimated", "none")
+
+def market_statements(limit: int = 20, offset: int = 0, cursor: str | None = None, search: str | None = None):
+    """(page, matching) selects for one page of markets; ``matching`` is what gets counted.
+
+    Pages either by ``offset`` or, when ``cursor`` is given, by keyset on the
+    page's sort key, which stays an index range scan however deep it goes.
+    The page fetches ``limit + 1`` rows so the caller can tell if more follow.
+    """
+    matching = select(Market).where(Market.status == "open", Market.volume >= 10000)
+    if search:
+        # ILIKE keeps substring semantics and is served by the trigram GIN index
+        matching = matching.where(Market.title.ilike(f"%{_escape_like(search)}%", escape="\\"))
+
+    rank = func.word_similarity(search, Market.title) if search else None
+    sort_key = [Market.updated_at, Market.id] if rank is None else [rank, Market.updated_at, Market.id]
+
+    page = matching if rank is None else matching.add_columns(rank.label("rank"))
+    page = page.order_by(*[c.desc() for c in sort_key])
+    if cursor:
+        page = page.where(tuple_(*sort_key) < tuple_(*decode_cursor(cursor, ranked=rank is not None)))
+    elif offset:
+        page = page.offset(offset)
+    return page.limit(limit + 1), matching
+
+async def list_markets(db, limit: int = 20, offset: int = 0, cursor: str | None = None,
+                       search: str | None = None, count: str = "exact") -> dict:
+    """Tracked open markets, newest first, or ranked by title similarity when searching."""
+    page, matching = market_statements(limit, offset, cursor, search)
+    rows = (await db.execute(page)).all()
+    return market_page(rows, limit, ranked=bool(search), total=await count_markets(db, matching, count))
+
+def market_page(rows, limit: int, ranked: bool = False, total: int | None = None) -> dict:
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    markets = []
+    for row in rows:
+        market = row[0]
+        markets.append({
+            "id": market.id,
+            "question": market.title,
+            "category": market.category,
+            "volume": str(market.volume) if market.volume else "0",
+            "outcomePrices": market.outcome_prices,
+        })
+
+    next_cursor = None
+    if has_more and rows:
+        last = rows[-1]
+        next_cursor = encode_cursor(last[0], last.rank) if ranked else encode_cursor(last[0])
+
+    return {"markets": markets, "total": total, "next_cursor": next_cursor}
+
+def count_statement(matching):
+    return select(func.count()).select_from(matching.order_by(None).subquery())
+
+async def count_markets(db, matching, mode: str = "exact") -> int | None:
+    if mode == "none":
+        return None
+    if mode == "estimated":
+        return await estimate_count(db, matching)
+    return (await db.execute(count_statement(matching))).scalar_one()
+
+async def estimate_count(db, statement) -> int:
+    """Planner row estimate for ``statement``; one EXPLAIN instead of scanning every match."""
+    # compile for the session's own driver: pyformat under psycopg2, $n under asyncpg
+    compiled = statement.compile(dialect=db.get_bind().dialect)
+    params = compiled.params
+    if compiled.positional:
+        params = tuple(params[name] for name in compiled.positiontup)
+    connection = await db.connection()
+    plan = (await connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", params)).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+def encode_cursor(market, rank: float | None = None) -> str:
+    key = [market.updated_at.isoformat(), market.id]
+    if rank is not None:
+        key.insert(0, rank)
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, ranked: bool = False) -> list:
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if ranked:
+            rank, updated_at, market_id = key
+            return [float(rank), datetime.fromisoformat(updated_at), str(market_id)]
+        updated_at, market_id = key
+        return [datetime.fromisoformat(updated_at), str(market_id)]
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
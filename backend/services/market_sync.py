@@ -1,50 +1,82 @@
 #from sqlalchemy.orm import Session
+from sqlalchemy import literal_column, or_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.sql import func
 from database import SessionLocal
 from models.market import Market
+from services.collector_runs import record_error, span
+from services.ingestion import EventBatch, fetch_event_batch
 from services.polymarket_service import PolyMarketClient
 
-def sync_markets():
-    client = PolyMarketClient()
+UPSERT_COLUMNS = ("title", "category", "status", "volume", "outcome_prices", "outcomes")
+
+def sync_markets(batch: EventBatch | None = None):
+    client = PolyMarketClient() if batch is None else None
     db = SessionLocal()
     try:
-        events = client.get_events(limit=100)
-        count = 0
-        for event in events:
-            tags = event.get("tags", [])
-            category = tags[0]["label"].title() if tags else None
-
-            for market_data in event.get("markets", []):
-                count += 1
-                market_id = market_data.get("id")
-                existing = db.query(Market).filter(Market.id == market_id).first()
-
-                if existing:
-                    existing.status = "closed" if market_data.get("closed") else "open"
-                    existing.outcomes = market_data.get("outcomes")
-                    existing.category = category
-                    existing.title = market_data.get("question", "")
-                    existing.volume = market_data.get("volume")
-                    existing.outcome_prices = market_data.get("outcomePrices")
-                else:
-                    market = Market(
-                        id=market_id,
-                        title=market_data.get("question", ""),
-                        category=category,
-                        status="closed" if market_data.get("closed") else "open",
-                        volume=market_data.get("volume"),
-                        outcome_prices=market_data.get("outcomePrices"),
-                        outcomes=market_data.get("outcomes")
-                    )
-                    db.add(market)
-        db.commit()
-        print(f"Synced {count} markets from {len(events)} events")
+        if batch is None:
+            batch = fetch_event_batch(client, include_closed=False)
+
+        rows = [{
+            "id": market_data["id"],
+            "title": market_data["title"],
+            "category": market_data["category"],
+            "status": market_data["status"],
+            "volume": market_data["volume"],
+            "outcome_prices": market_data["outcome_prices"],
+            "outcomes": market_data["outcomes"],
+        } for market_data in batch.open_markets if market_data["id"]]
+
+        with span("sync_markets.write") as s:
+            summary = upsert_markets(db, rows)
+            db.commit()
+            s.rows = len(rows)
+        print(f"Synced {len(rows)} markets from {len(batch.open_events)} events "
+              f"(inserted: {summary['inserted']}, updated: {summary['updated']}, unchanged: {summary['unchanged']})")
+        return summary
 
     except Exception as e:
         db.rollback()
         print(f"Error syncing markets: {e}")
+        record_error(f"Error syncing markets: {e}")
     finally:
-        client.close()
+        if client:
+            client.close()
         db.close()
 
+def upsert_markets(db, rows: list[dict], chunk_size: int = 500) -> dict:
+    """INSERT ... ON CONFLICT (id) DO UPDATE in chunks, skipping rows that did not change.
+
+    Rows come back from RETURNING only when they were inserted or actually
+    updated; ``xmax = 0`` tells the two apart.
+    """
+    deduped = list({row["id"]: row for row in rows}.values())
+    summary = {"inserted": 0, "updated": 0, "unchanged": 0}
+
+    for start in range(0, len(deduped), chunk_size):
+        chunk = deduped[start:start + chunk_size]
+        result = db.execute(_upsert_statement(chunk))
+        touched = result.fetchall()
+        inserted = sum(1 for row in touched if row.inserted)
+
+        summary["inserted"] += inserted
+        summary["updated"] += len(touched) - inserted
+        summary["unchanged"] += len(chunk) - len(touched)
+    return summary
+
+def _upsert_statement(chunk: list[dict]):
+    stmt = insert(Market).values(chunk)
+    excluded = stmt.excluded
+    changed = or_(*(getattr(Market, col).is_distinct_from(getattr(excluded, col)) for col in UPSERT_COLUMNS))
+
+    set_ = {col: getattr(excluded, col) for col in UPSERT_COLUMNS}
+    set_["updated_at"] = func.now()
+
+    return stmt.on_conflict_do_update(
+        index_elements=[Market.id],
+        set_=set_,
+        where=changed,
+    ).returning(Market.id, literal_column("xmax = 0").label("inserted"))
+
 if __name__ == "__main__":
-    sync_markets()
\ No newline at end of file
+    sync_markets()
@@ -0,0 +1,45 @@
+from config import settings
+from services.polymarket_service import PolyMarketClient
+
+BOOK_COLUMNS = ("bid_ask_spread", "best_bid_size", "best_ask_size", "bid_depth", "ask_depth")
+
+def load_order_books(token_ids) -> dict:
+    client = PolyMarketClient()
+    try:
+        return client.get_order_books(list(token_ids))
+    finally:
+        client.close()
+
+def book_metrics(book: dict, depth_cents: float | None = None) -> dict:
+    """Spread, top-of-book sizes and resting size within ``depth_cents`` of the mid."""
+    depth_cents = settings.BOOK_DEPTH_CENTS if depth_cents is None else depth_cents
+    bids = _levels(book.get("bids"))
+    asks = _levels(book.get("asks"))
+    metrics = dict.fromkeys(BOOK_COLUMNS)
+
+    best_bid = max(bids, default=None)
+    best_ask = min(asks, default=None)
+    if best_bid:
+        metrics["best_bid_size"] = best_bid[1]
+    if best_ask:
+        metrics["best_ask_size"] = best_ask[1]
+    if not (best_bid and best_ask):
+        return metrics
+
+    mid = (best_bid[0] + best_ask[0]) / 2
+    window = depth_cents / 100 + 1e-9
+    metrics["bid_ask_spread"] = round(best_ask[0] - best_bid[0], 4)
+    metrics["bid_depth"] = round(sum(size for price, size in bids if price >= mid - window), 2)
+    metrics["ask_depth"] = round(sum(size for price, size in asks if price <= mid + window), 2)
+    return metrics
+
+def _levels(raw) -> list[tuple[float, float]]:
+    levels = []
+    for level in raw or []:
+        try:
+            price, size = float(level["price"]), float(level["size"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if size > 0:
+            levels.append((price, size))
+    return levels
@@ -1,194 +1,288 @@
+import uuid
 from datetime import datetime, timezone, timedelta
-from itertools import groupby
+import numpy as np
+from sqlalchemy import literal_column, text
+from sqlalchemy.dialects.postgresql import insert
 
+from config import settings
 from database import SessionLocal
-from models.market import Market, MarketSnapshot, Signal
+from models.market import Market, MarketVolumeStats, Signal
+from services.collector_runs import span
+from services.detector_registry import DETECTORS, register_detector, run_detectors, tracked_markets
+from services.rolling_stats import update_volume_stats
+from services.signal_events import notify_new_signals
+from services.snapshot_frame import SnapshotFrame, load_snapshot_frame
+from services.sql_detectors import detect_signals_sql
+
+MOMENTUM_WINDOW = timedelta(hours=7)
+LIQUIDITY_WINDOW = timedelta(hours=6)
+# signal types the single-statement SQL backend already covers
+SQL_SIGNAL_TYPES = ("volume_spike", "price_momentum")
 
 def detect_volume_spikes(db, sigma_threshold: float = 3.0):
-    signals = []
     five_days_ago = datetime.now(timezone.utc) - timedelta(days=5) # not a week ago, week ago :(
-    open_markets = db.query(Market).filter(Market.status == "open").all()
-    markets = {}
-    for market in open_markets:
-        if not market.volume or float(market.volume) < 10000:
-            continue
-        markets[market.id] = market
-
-    all_snapshots = db.query(MarketSnapshot).filter(
-        MarketSnapshot.market_id.in_(markets.keys()),
-        MarketSnapshot.ts >= five_days_ago,
-    ).order_by(MarketSnapshot.market_id, MarketSnapshot.ts.asc()).all()
-
-    for market_id, snaps in groupby(all_snapshots, key = lambda s: s.market_id):
-        snapshots = list(snaps)
-
-        if len(snapshots) < 10:
-            continue
-
-        deltas = []
-        for i in range(1, len(snapshots)):
-            delta = float(snapshots[i].volume) - float(snapshots[i-1].volume)
-            if delta > 0:
-                deltas.append(delta)
-
-        if len(deltas) < 5:
-            continue
-
-
-        avg_delta = sum(deltas) / len(deltas)
-        std_delta = (sum((d - avg_delta) ** 2 for d in deltas) / len(deltas)) ** 0.5
+    markets = tracked_markets(db)
+    frame = load_snapshot_frame(db, markets.keys(), five_days_ago)
+    return _volume_spike_signals(frame, markets, sigma_threshold)
+
+def _volume_spike_signals(frame: SnapshotFrame, markets: dict, sigma_threshold: float):
+    if not len(frame):
+        return []
+
+    n_segments = frame.segment_count
+    deltas = np.diff(frame.volume)
+    delta_segment = frame.segment[1:]
+    positive = (delta_segment == frame.segment[:-1]) & (deltas > 0)
+
+    pos_segment = delta_segment[positive]
+    pos_deltas = deltas[positive]
+    counts = np.bincount(pos_segment, minlength=n_segments)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        avg_delta = np.bincount(pos_segment, weights=pos_deltas, minlength=n_segments) / counts
+        sq_dev = np.bincount(pos_segment, weights=(pos_deltas - avg_delta[pos_segment]) ** 2, minlength=n_segments)
+        std_delta = (sq_dev / counts) ** 0.5
+
+        ends = frame.ends
+        latest_delta = frame.volume[ends] - frame.volume[np.maximum(ends - 1, 0)]
+        z_score = (latest_delta - avg_delta) / std_delta
 
-        if std_delta < 10:
-            continue
+    hits = (frame.segment_sizes() >= 10) & (counts >= 5) & (std_delta >= 10) & (z_score > sigma_threshold)
 
-        latest_delta = float(snapshots[-1].volume) - float(snapshots[-2].volume)
+    signals = []
+    for i in np.flatnonzero(hits):
+        market_id = frame.segment_ids[i]
+        z = float(z_score[i])
+        confidence = min(z / 5.0, 1.0)
+        signals.append({
+            "market_id": market_id,
+            "title": markets[market_id].title,
+            "signal_type": "volume_spike",
+            "confidence": round(confidence, 2),
+            "details": {
+                "current_volume": float(latest_delta[i]),
+                "avg_volume": round(float(avg_delta[i]), 2),
+                "std_dev": round(float(std_delta[i]), 2),
+                "z_score": round(z, 2),
+            }
+        })
+    return signals
 
-        z_score = (latest_delta - avg_delta) / std_delta
+def detect_volume_spikes_incremental(db, sigma_threshold: float = 3.0):
+    """Same rule as detect_volume_spikes, read from the rolling market_volume_stats state."""
+    update_volume_stats(db)
+    rows = db.query(MarketVolumeStats, Market.title).join(Market, MarketVolumeStats.market_id == Market.id).filter(
+        Market.status == "open",
+        Market.volume >= 10000,
+        MarketVolumeStats.snapshot_count >= 10,
+        MarketVolumeStats.delta_count >= 5,
+    ).all()
 
-        if z_score > sigma_threshold:
-            confidence = min(z_score / 5.0, 1.0)
-            signals.append({
-                "market_id": market_id,
-                "title": markets[market_id].title,
-                "signal_type": "volume_spike",
-                "confidence": round(confidence, 2),
-                "details": {
-                    "current_volume": latest_delta,
-                    "avg_volume": round(avg_delta, 2),
-                    "std_dev": round(std_delta, 2),
-                    "z_score": round(z_score, 2),
-                }
-            })
+    signals = []
+    for stats, title in rows:
+        signal = _volume_spike_signal(stats, title, sigma_threshold)
+        if signal:
+            signals.append(signal)
     return signals
 
+@register_detector("volume", "volume_spike")
+def _volume_spike_detector(ctx):
+    # reads the rolling stats table rather than the frame, so it needs 5 days of nothing
+    with ctx.session() as db:
+        return detect_volume_spikes_incremental(db)
+
+def _volume_spike_signal(stats, title: str, sigma_threshold: float):
+    if stats.last_delta is None:
+        return None
+
+    avg_delta = stats.delta_mean
+    std_delta = (max(stats.delta_m2, 0.0) / stats.delta_count) ** 0.5
+    if std_delta < 10:
+        return None
+
+    latest_delta = stats.last_delta
+    z_score = (latest_delta - avg_delta) / std_delta
+    if z_score <= sigma_threshold:
+        return None
+
+    confidence = min(z_score / 5.0, 1.0)
+    return {
+        "market_id": stats.market_id,
+        "title": title,
+        "signal_type": "volume_spike",
+        "confidence": round(confidence, 2),
+        "details": {
+            "current_volume": latest_delta,
+            "avg_volume": round(avg_delta, 2),
+            "std_dev": round(std_delta, 2),
+            "z_score": round(z_score, 2),
+        }
+    }
+
 def detect_price_momentum(db, threshold: float = 0.15):
+    starting_window = datetime.now(timezone.utc) - MOMENTUM_WINDOW
+    markets = tracked_markets(db)
+    frame = load_snapshot_frame(db, markets.keys(), starting_window, newest_first=True)
+    return _price_momentum_signals(frame, markets, threshold)
+
+def _price_momentum_signals(frame: SnapshotFrame, markets: dict, threshold: float):
+    if not len(frame):
+        return []
+
+    # segments are newest first, so the window's latest/earliest rows sit at starts/ends
+    return _momentum_signals(frame.segment_ids, frame.price[frame.starts], frame.price[frame.ends], markets, threshold)
+
+@register_detector("momentum", "price_momentum", window=MOMENTUM_WINDOW)
+def _price_momentum_detector(ctx, threshold: float = 0.15):
+    frame = ctx.frame
+    if not len(frame):
+        return []
+
+    # the shared frame runs oldest first and may reach further back than this window
+    starts = ctx.window_starts(MOMENTUM_WINDOW)
+    in_window = starts <= frame.ends
+    earlier_price = np.where(in_window, frame.price[np.minimum(starts, frame.ends)], np.nan)
+    return _momentum_signals(frame.segment_ids, frame.price[frame.ends], earlier_price, ctx.markets, threshold)
+
+def _momentum_signals(segment_ids, current_price, earlier_price, markets, threshold: float):
+    valid = ~np.isnan(current_price) & ~np.isnan(earlier_price) & (current_price != 0) & (earlier_price != 0)
+    diff = np.abs(current_price - earlier_price)
+    hits = valid & (diff > threshold)
+
     signals = []
-    #six_hours_ago = datetime.now(timezone.utc) - timedelta(hours=6)
-    starting_window = datetime.now(timezone.utc) - timedelta(hours=7)
-    open_markets = db.query(Market).filter(Market.status == "open").all()
-    markets = {}
-    for market in open_markets:
-        if not market.volume or float(market.volume) < 10000:
-            continue
-        markets[market.id] = market
-
-        # latest = db.query(MarketSnapshot).filter(
-        #     MarketSnapshot.market_id == market.id,
-        # ).order_by(MarketSnapshot.ts.desc()).first()
-        #
-        # earlier = db.query(MarketSnapshot).filter(
-        #     MarketSnapshot.market_id == market.id,
-        #     MarketSnapshot.ts <= six_hours_ago,
-        # ).order_by(MarketSnapshot.ts.desc()).first()
-
-    all_snapshots = db.query(MarketSnapshot).filter(
-        MarketSnapshot.market_id.in_(markets.keys()),
-        MarketSnapshot.ts >= starting_window,
-    ).order_by(MarketSnapshot.market_id, MarketSnapshot.ts.desc()).all()
-
-    for market_id, snaps in groupby(all_snapshots, key=lambda s: s.market_id):
-        market_snaps = list(snaps)
-        latest = market_snaps[0]
-        earlier = market_snaps[-1]
-        
-
-        if not latest or not earlier or not latest.price or not earlier.price:
-            continue
-
-        current_price = float(latest.price)
-        earlier_price = float(earlier.price)
-
-        if earlier_price == 0:
-            continue
-
-        diff = abs(current_price - earlier_price)
-
-        if diff > threshold:
-            direction = "up" if current_price > earlier_price else "down"
-            confidence = min(diff / 0.3, 1.0)
-
-            signals.append({
-                "market_id": market_id,
-                "title": markets[market_id].title,
-                "signal_type": "price_momentum",
-                "confidence": round(confidence, 2),
-                "details": {
-                    "current_price": current_price,
-                    "earlier_price": earlier_price,
-                    "change": round(diff, 4),
-                    "direction": direction,
-                }
-            })
+    for i in np.flatnonzero(hits):
+        market_id = segment_ids[i]
+        current, earlier, change = float(current_price[i]), float(earlier_price[i]), float(diff[i])
+        direction = "up" if current > earlier else "down"
+        confidence = min(change / 0.3, 1.0)
+
+        signals.append({
+            "market_id": market_id,
+            "title": markets[market_id].title,
+            "signal_type": "price_momentum",
+            "confidence": round(confidence, 2),
+            "details": {
+                "current_price": current,
+                "earlier_price": earlier,
+                "change": round(change, 4),
+                "direction": direction,
+            }
+        })
 
     return signals
 
 def save_signals(db, signals):
+    """Insert new active signals and refresh the ones already active, in one statement."""
     now = datetime.now(timezone.utc)
+    rows = list({(s["market_id"], s["signal_type"]): {
+        "id": uuid.uuid4(),
+        "market_id": s["market_id"],
+        "signal_type": s["signal_type"],
+        "confidence": s["confidence"],
+        "signal_metadata": s["details"],
+        "status": "active",
+        "last_seen": now,
+    } for s in signals}.values())
+
     new_count = 0
     updated_count = 0
-    for s in signals:
-        existing = db.query(Signal).filter(
-            Signal.market_id == s["market_id"],
-            Signal.signal_type == s["signal_type"],
-            Signal.status == "active",
-        ).first()
-        if existing:
-            existing.last_seen = now
-            existing.confidence = s["confidence"]
-            existing.signal_metadata = s["details"]
-            updated_count += 1
-        else:
-            signal = Signal(
-                market_id=s["market_id"],
-                signal_type=s["signal_type"],
-                confidence=s["confidence"],
-                signal_metadata=s["details"],
-                status="active",
-            )
-            db.add(signal)
-            new_count += 1
+    if rows:
+        stmt = insert(Signal).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Signal.market_id, Signal.signal_type],
+            index_where=Signal.status == "active",
+            set_={
+                "last_seen": stmt.excluded.last_seen,
+                "confidence": stmt.excluded.confidence,
+                "signal_metadata": stmt.excluded.signal_metadata,
+            },
+        ).returning(Signal.id, literal_column("xmax = 0").label("inserted"))
+        returned = db.execute(stmt).fetchall()
+        new_ids = [row.id for row in returned if row.inserted]
+        new_count = len(new_ids)
+        updated_count = len(returned) - new_count
+        # refreshed signals aren't news; only brand-new ones are pushed to stream listeners
+        notify_new_signals(db, new_ids)
     db.commit()
     print(f"New signals: {new_count}, Updated signals: {updated_count}")
     return new_count
 
-def resolve_old_signals(db, active_market_ids, signal_type):
-    db.query(Signal).filter(
-        Signal.signal_type == signal_type,
-        Signal.status == "active",
-        ~Signal.market_id.in_(active_market_ids),
-        ).update({"status": "resolved"}, synchronize_session=False)
+RESOLVE_STALE_SQL = text("""
+    UPDATE signals s SET status = 'resolved'
+    WHERE s.status = 'active'
+      AND s.signal_type = ANY(CAST(:signal_types AS text[]))
+      AND NOT EXISTS (
+          SELECT 1
+          FROM unnest(CAST(:market_ids AS text[]), CAST(:active_types AS text[])) AS a(market_id, signal_type)
+          WHERE a.market_id = s.market_id AND a.signal_type = s.signal_type
+      )
+""")
+
+def resolve_stale_signals(db, signals, signal_types) -> int:
+    """Resolve every active signal of ``signal_types`` that didn't fire again this run."""
+    result = db.execute(RESOLVE_STALE_SQL, {
+        "signal_types": list(signal_types),
+        "market_ids": [s["market_id"] for s in signals],
+        "active_types": [s["signal_type"] for s in signals],
+    })
+    return result.rowcount
     
-def detect_liquidity_drain(db, threshold: float = 0.20):
+@register_detector("liquidity_drain", "liquidity_drain", window=LIQUIDITY_WINDOW)
+def detect_liquidity_drain(ctx, threshold: float = 0.20, min_liquidity: float = 1000):
+    """Markets whose liquidity fell by more than ``threshold`` over the last 6 hours."""
+    frame = ctx.frame
+    if not len(frame):
+        return []
+
+    starts = np.minimum(ctx.window_starts(LIQUIDITY_WINDOW), frame.ends)
+    earlier = frame.liquidity[starts]
+    current = frame.liquidity[frame.ends]
+    valid = (starts < frame.ends) & ~np.isnan(earlier) & ~np.isnan(current) & (earlier >= min_liquidity)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        drop = (earlier - current) / earlier
+    hits = valid & (drop > threshold)
+
     signals = []
-    starting_window = datetime.now(timezone.utc) - timedelta(hours=6)
-    open_markets = db.query(Market).filter(Market.status == "open").all()
-    markets = {}
-    for market in open_markets:
-        if not market.volume or float(market.volume) < 10000:
-            continue
-        market[market.id] = market
+    for i in np.flatnonzero(hits):
+        market_id = frame.segment_ids[i]
+        change = float(drop[i])
+        signals.append({
+            "market_id": market_id,
+            "title": ctx.markets[market_id].title,
+            "signal_type": "liquidity_drain",
+            "confidence": round(min(change / 0.5, 1.0), 2),
+            "details": {
+                "current_liquidity": float(current[i]),
+                "earlier_liquidity": float(earlier[i]),
+                "change": round(change, 4),
+            }
+        })
+    return signals
 
 def run_detections():
     db = SessionLocal()
     try:
         print("Running pattern detectors...")
 
-        volume_signals = detect_volume_spikes(db)
-        print(f"Volume spikes: {len(volume_signals)}")
-
-        active_volume_markets = [s["market_id"] for s in volume_signals]
-        resolve_old_signals(db, active_volume_markets, "volume_spike")
-
-        momentum_signals = detect_price_momentum(db)
-        print(f"Price momentum: {len(momentum_signals)}")
-
-        active_momentum_markets = [s["market_id"] for s in momentum_signals]
-        resolve_old_signals(db, active_momentum_markets, "price_momentum")
+        if settings.DETECTOR_BACKEND == "sql":
+            with span("detection.sql") as sp:
+                pushed = detect_signals_sql(db)
+                sp.rows = len(pushed)
+            print(f"SQL detectors: {len(pushed)}")
+            # plugins the SQL pass doesn't cover still run on the shared frame
+            others = [name for name, d in DETECTORS.items() if d.signal_type not in SQL_SIGNAL_TYPES]
+            found, completed = run_detectors(db, others)
+            all_signals = pushed + found
+            completed = list(SQL_SIGNAL_TYPES) + completed
+        else:
+            all_signals, completed = run_detectors(db)
 
-        all_signals = volume_signals + momentum_signals
+        with span("detection.save") as sp:
+            resolved = resolve_stale_signals(db, all_signals, completed)
+            print(f"Resolved {resolved} stale signals")
 
-        if all_signals:
             saved = save_signals(db, all_signals)
+            sp.rows = saved
+        if all_signals:
             print(f"Saved {saved} signals to database")
 
             for s in all_signals:
@@ -1,3 +1,4 @@
+import asyncio
 import httpx
 from config import settings
 
@@ -5,10 +6,11 @@ from config import settings
 class PolyMarketClient:
     #gamma_api = "https://gamma-api.polymarket.com"
     #clob_api = "https://clob.polymarket.com"
-    def __init__(self):
+    def __init__(self, transport: httpx.AsyncBaseTransport | None = None):
         self.gamma_api = settings.POLYMARKET_GAMMA_API_URL
         self.clob_api = settings.POLYMARKET_CLOB_API_URL
         self.client = httpx.Client(timeout=30)
+        self.transport = transport
 
     def get_markets(self, limit: int = 100, offset: int = 0, closed: bool = False) -> list:
         response = self.client.get(f"{self.gamma_api}/markets",
@@ -17,13 +19,123 @@ class PolyMarketClient:
         response.raise_for_status()
         return response.json()
 
-    def get_events(self, limit: int = 100, closed: bool = False) -> list:
+    def get_events(self, limit: int = 100, offset: int = 0, closed: bool = False) -> list:
         response = self.client.get(f"{self.gamma_api}/events",
-                                   params={"limit": limit, "closed": closed}
+                                   params={"limit": limit, "offset": offset, "closed": closed}
                                    )
         response.raise_for_status()
         return response.json()
 
+    def get_all_events(self, closed: bool = False, page_size: int | None = None,
+                       concurrency: int | None = None, max_pages: int | None = None) -> list:
+        """Crawl every /events page and return them as one flat list."""
+        return asyncio.run(self.fetch_all_events(closed=closed, page_size=page_size,
+                                                 concurrency=concurrency, max_pages=max_pages))
+
+    async def fetch_all_events(self, closed: bool = False, page_size: int | None = None,
+                               concurrency: int | None = None, max_pages: int | None = None) -> list:
+        events = []
+        async with self._async_client() as aclient:
+            async for page in self.iter_event_pages(aclient, closed=closed, page_size=page_size,
+                                                    concurrency=concurrency, max_pages=max_pages):
+                events.extend(page)
+        return events
+
+    async def iter_event_pages(self, aclient: httpx.AsyncClient, closed: bool = False,
+                               page_size: int | None = None, concurrency: int | None = None,
+                               max_pages: int | None = None):
+        """Yield /events pages as they arrive.
+
+        Offsets are requested in waves of ``concurrency`` pages over the shared
+        ``aclient`` pool. The crawl stops after the first wave that contains a
+        short page, since Gamma has nothing past that offset.
+        """
+        page_size = page_size or settings.GAMMA_PAGE_SIZE
+        concurrency = concurrency or settings.GAMMA_MAX_CONCURRENCY
+        next_page = 0
+
+        while max_pages is None or next_page < max_pages:
+            wave_size = concurrency if max_pages is None else min(concurrency, max_pages - next_page)
+            offsets = [(next_page + i) * page_size for i in range(wave_size)]
+            next_page += wave_size
+
+            exhausted = False
+            tasks = [asyncio.create_task(self._fetch_event_page(aclient, page_size, offset, closed))
+                     for offset in offsets]
+            try:
+                for fut in asyncio.as_completed(tasks):
+                    page = await fut
+                    if len(page) < page_size:
+                        exhausted = True
+                    if page:
+                        yield page
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+            if exhausted:
+                break
+
+    async def _fetch_event_page(self, aclient: httpx.AsyncClient, limit: int, offset: int, closed: bool) -> list:
+        response = await aclient.get(f"{self.gamma_api}/events",
+                                     params={"limit": limit, "offset": offset, "closed": closed}
+                                     )
+        response.raise_for_status()
+        return response.json()
+
+    def get_order_books(self, token_ids: list[str], batch_size: int | None = None,
+                        concurrency: int | None = None, deadline: float | None = None) -> dict:
+        """Order books for ``token_ids`` keyed by token id, via batched POST /books."""
+        return asyncio.run(self.fetch_order_books(token_ids, batch_size=batch_size,
+                                                  concurrency=concurrency, deadline=deadline))
+
+    async def fetch_order_books(self, token_ids: list[str], batch_size: int | None = None,
+                                concurrency: int | None = None, deadline: float | None = None) -> dict:
+        """Fetch books in batches of ``batch_size`` tokens, ``concurrency`` requests at a time.
+
+        A batch that fails is logged and skipped, and batches still running
+        after ``deadline`` seconds are cancelled, so one slow or broken batch
+        costs its tokens' books rather than the whole cycle.
+        """
+        batch_size = batch_size or settings.CLOB_BOOKS_BATCH_SIZE
+        concurrency = concurrency or settings.CLOB_MAX_CONCURRENCY
+        deadline = deadline or settings.CLOB_DEADLINE_SECONDS
+        token_ids = list(dict.fromkeys(t for t in token_ids if t))
+        batches = [token_ids[i:i + batch_size] for i in range(0, len(token_ids), batch_size)]
+        if not batches:
+            return {}
+
+        semaphore = asyncio.Semaphore(concurrency)
+        books = {}
+
+        async with self._async_client(concurrency) as aclient:
+            async def fetch(batch):
+                async with semaphore:
+                    try:
+                        for book in await self._fetch_books(aclient, batch):
+                            books[book.get("asset_id")] = book
+                    except (httpx.HTTPError, ValueError) as e:
+                        print(f"Error fetching {len(batch)} order books: {e}")
+
+            tasks = [asyncio.create_task(fetch(batch)) for batch in batches]
+            _, pending = await asyncio.wait(tasks, timeout=deadline)
+            for task in pending:
+                task.cancel()
+            if pending:
+                print(f"Order book fetch hit the {deadline}s deadline with {len(pending)} batches outstanding")
+                await asyncio.gather(*pending, return_exceptions=True)
+        return books
+
+    async def _fetch_books(self, aclient: httpx.AsyncClient, token_ids: list[str]) -> list:
+        response = await aclient.post(f"{self.clob_api}/books", json=[{"token_id": t} for t in token_ids])
+        response.raise_for_status()
+        return response.json()
+
+    def _async_client(self, concurrency: int | None = None) -> httpx.AsyncClient:
+        concurrency = concurrency or settings.GAMMA_MAX_CONCURRENCY
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        return httpx.AsyncClient(timeout=30, limits=limits, transport=self.transport)
+
     def get_prices(self, token_id: str) -> dict:
         response = self.client.get(f"{self.clob_api}/price", params={"token_id": token_id})
         response.raise_for_status()
@@ -42,4 +154,4 @@ if __name__ == "__main__":
     except Exception as e:
         print(f"Error {e}")
     finally:
-        client.close()
\ No newline at end of file
+        client.close()
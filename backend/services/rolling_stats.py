@@ -0,0 +1,163 @@
+from datetime import datetime, timezone, timedelta
+from itertools import groupby, pairwise
+from sqlalchemy import inspect
+
+from config import settings
+from models.market import MarketSnapshot, MarketVolumeStats
+
+def update_volume_stats(db, now: datetime | None = None, window_days: int | None = None) -> dict:
+    """Fold new snapshots into market_volume_stats and expire the ones that left the window.
+
+    Each market keeps a Welford count/mean/M2 over the positive volume deltas
+    between consecutive snapshots in the window, so a cycle only reads the
+    snapshots added since the last run plus the ones that just aged out.
+    """
+    now = now or datetime.now(timezone.utc)
+    window_start = now - timedelta(days=window_days or settings.VOLUME_BASELINE_DAYS)
+
+    states = {s.market_id: s for s in db.query(MarketVolumeStats).all()}
+    watermark = max((s.last_ts for s in states.values() if s.last_ts), default=None)
+    if watermark is None or watermark < window_start:
+        watermark = window_start - timedelta(microseconds=1)
+
+    new_rows = _grouped(_snapshot_rows(db).filter(MarketSnapshot.ts > watermark))
+
+    # markets seen for the first time still get their whole window
+    unseen = [market_id for market_id in new_rows if market_id not in states]
+    if unseen and watermark >= window_start:
+        backfill = _grouped(_snapshot_rows(db).filter(
+            MarketSnapshot.market_id.in_(unseen),
+            MarketSnapshot.ts >= window_start,
+            MarketSnapshot.ts <= watermark,
+        ))
+        for market_id, rows in backfill.items():
+            new_rows[market_id] = rows + new_rows[market_id]
+
+    appended = 0
+    for market_id, rows in new_rows.items():
+        state = states.get(market_id)
+        if state is None:
+            state = MarketVolumeStats(market_id=market_id)
+            _reset(state)
+            db.add(state)
+            states[market_id] = state
+
+        for ts, volume in rows:
+            if state.last_ts is not None and ts <= state.last_ts:
+                continue
+            _push(state, ts, volume)
+            appended += 1
+
+    expired = _expire_window(db, states, window_start)
+
+    for state in list(states.values()):
+        if not state.snapshot_count:
+            if inspect(state).persistent:
+                db.delete(state)
+            else:
+                db.expunge(state)
+            states.pop(state.market_id)
+
+    db.commit()
+    return {"appended": appended, "expired": expired, "markets": len(states)}
+
+def _expire_window(db, states: dict, window_start: datetime) -> int:
+    stale = {market_id: s for market_id, s in states.items() if s.first_ts and s.first_ts < window_start}
+    if not stale:
+        return 0
+
+    oldest = min(s.first_ts for s in stale.values())
+    expired_rows = _grouped(_snapshot_rows(db).filter(
+        MarketSnapshot.market_id.in_(stale.keys()),
+        MarketSnapshot.ts >= oldest,
+        MarketSnapshot.ts < window_start,
+    ))
+    successors = {
+        row.market_id: (row.ts, row.volume)
+        for row in db.query(MarketSnapshot.market_id, MarketSnapshot.ts, MarketSnapshot.volume).filter(
+            MarketSnapshot.market_id.in_(stale.keys()),
+            MarketSnapshot.ts >= window_start,
+        ).distinct(MarketSnapshot.market_id).order_by(MarketSnapshot.market_id, MarketSnapshot.ts.asc()).all()
+    }
+
+    count = 0
+    for market_id, state in stale.items():
+        rows = [(ts, volume) for ts, volume in expired_rows.get(market_id, []) if ts >= state.first_ts]
+        _expire(state, rows, successors.get(market_id))
+        count += len(rows)
+    return count
+
+def _snapshot_rows(db):
+    return db.query(MarketSnapshot.market_id, MarketSnapshot.ts, MarketSnapshot.volume).order_by(
+        MarketSnapshot.market_id, MarketSnapshot.ts.asc())
+
+def _grouped(query) -> dict[str, list]:
+    return {
+        market_id: [(row.ts, row.volume) for row in rows]
+        for market_id, rows in groupby(query.all(), key=lambda r: r.market_id)
+    }
+
+def _push(state, ts: datetime, volume):
+    volume = float(volume)
+    if not state.snapshot_count:
+        state.first_ts = ts
+        state.snapshot_count = 1
+        state.last_delta = None
+    else:
+        delta = volume - float(state.last_volume)
+        if delta > 0:
+            _add(state, delta)
+        state.last_delta = delta
+        state.snapshot_count += 1
+    state.last_ts = ts
+    state.last_volume = volume
+
+def _expire(state, expired: list, successor):
+    """Drop snapshots that fell out of the window, along with the deltas they anchored.
+
+    ``expired`` are the oldest snapshots in the state, in order, and
+    ``successor`` is the first snapshot still inside the window.
+    """
+    if not expired:
+        return
+
+    chain = expired + ([successor] if successor else [])
+    for (_, before), (_, after) in pairwise(chain):
+        delta = float(after) - float(before)
+        if delta > 0:
+            _remove(state, delta)
+
+    state.snapshot_count -= len(expired)
+    if successor is None or state.snapshot_count <= 0:
+        _reset(state)
+        return
+
+    state.first_ts = successor[0]
+    if state.snapshot_count == 1:
+        state.last_delta = None
+
+def _add(state, x: float):
+    state.delta_count += 1
+    diff = x - state.delta_mean
+    state.delta_mean += diff / state.delta_count
+    state.delta_m2 += diff * (x - state.delta_mean)
+
+def _remove(state, x: float):
+    if state.delta_count <= 1:
+        state.delta_count = 0
+        state.delta_mean = 0.0
+        state.delta_m2 = 0.0
+        return
+
+    old_mean = state.delta_mean
+    state.delta_count -= 1
+    state.delta_mean = (old_mean * (state.delta_count + 1) - x) / state.delta_count
+    state.delta_m2 = max(state.delta_m2 - (x - old_mean) * (x - state.delta_mean), 0.0)
+
+def _reset(state):
+    state.first_ts = None
+    state.snapshot_count = 0
+    state.delta_count = 0
+    state.delta_mean = 0.0
+    state.delta_m2 = 0.0
+    state.last_delta = None
@@ -0,0 +1,157 @@
+import asyncio
+import math
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable
+
+
+@dataclass
+class Job:
+    """A blocking stage run every ``every`` seconds on wall-clock boundaries.
+
+    Boundaries are multiples of ``every`` since the epoch, shifted by
+    ``offset``, so a 300s job fires at :00, :05, :10... no matter how long
+    each run takes. ``jitter`` (less than ``every``) adds up to that many
+    seconds per run without moving the boundaries. A run still going past
+    ``deadline`` is marked "timeout"; the thread can't be killed, so later
+    runs are skipped until it returns.
+    """
+    name: str
+    func: Callable
+    every: float
+    offset: float = 0
+    deadline: float | None = None
+    jitter: float = 0
+    run_at_start: bool = False
+
+    running: bool = field(default=False, init=False)
+    next_run: float | None = field(default=None, init=False)
+    last_started: float | None = field(default=None, init=False)
+    last_duration_ms: float | None = field(default=None, init=False)
+    last_status: str | None = field(default=None, init=False)
+    last_error: str | None = field(default=None, init=False)
+    runs: int = field(default=0, init=False)
+    skipped: int = field(default=0, init=False)
+
+    def next_boundary(self, after: float) -> float:
+        """First boundary strictly later than ``after``."""
+        return self.offset + (math.floor((after - self.offset) / self.every) + 1) * self.every
+
+    def state(self) -> dict:
+        return {
+            "name": self.name,
+            "every_seconds": self.every,
+            "running": self.running,
+            "next_run": _iso(self.next_run),
+            "last_started": _iso(self.last_started),
+            "last_duration_ms": round(self.last_duration_ms, 1) if self.last_duration_ms is not None else None,
+            "last_status": self.last_status,
+            "last_error": self.last_error,
+            "runs": self.runs,
+            "skipped": self.skipped,
+        }
+
+
+def _iso(ts: float | None) -> str | None:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat() if ts is not None else None
+
+
+class Scheduler:
+    """Runs each Job on its own cadence in a worker thread.
+
+    ``on_change`` gets the state of every job whenever one starts, finishes
+    or skips, e.g. to persist it where the API can read it.
+    """
+
+    def __init__(self, jobs: list[Job], on_change: Callable | None = None):
+        self.jobs = {job.name: job for job in jobs}
+        self.on_change = on_change
+        self._tasks: list[asyncio.Task] = []
+        self._executions: set[asyncio.Task] = set()
+        self._publish_lock = asyncio.Lock()
+        self._stop = asyncio.Event()
+
+    def state(self) -> list[dict]:
+        return [job.state() for job in self.jobs.values()]
+
+    def stop(self):
+        self._stop.set()
+
+    async def run(self):
+        self._tasks = [asyncio.create_task(self._loop(job)) for job in self.jobs.values()]
+        try:
+            await self._stop.wait()
+        finally:
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _loop(self, job: Job):
+        if job.run_at_start:
+            await self._fire(job)
+        base = job.next_boundary(time.time())
+        while True:
+            job.next_run = base + random.uniform(0, job.jitter)
+            await self._changed()
+            await _sleep_until(job.next_run)
+            await self._fire(job)
+            # stepping from the boundary rather than from "now" is what keeps the
+            # cadence from drifting; boundaries already missed (stall, suspend) are dropped
+            base = job.next_boundary(max(base, time.time()))
+
+    async def _fire(self, job: Job):
+        if job.running:
+            job.skipped += 1
+            print(f"[{job.name}] still running, skipping this run")
+            await self._changed()
+            return
+        job.running = True
+        task = asyncio.create_task(self._execute(job))
+        self._executions.add(task)
+        task.add_done_callback(self._executions.discard)
+
+    async def _execute(self, job: Job):
+        job.last_started = time.time()
+        job.runs += 1
+        await self._changed()
+        start = time.perf_counter()
+        work = asyncio.ensure_future(asyncio.to_thread(job.func))
+        try:
+            await asyncio.wait_for(asyncio.shield(work), timeout=job.deadline)
+            job.last_status = "ok"
+            job.last_error = None
+        except asyncio.TimeoutError:
+            job.last_status = "timeout"
+            job.last_error = f"still running after {job.deadline}s"
+            print(f"[{job.name}] missed its {job.deadline}s deadline")
+            await self._changed()
+            try:
+                await work
+            except Exception as e:
+                job.last_error = f"{type(e).__name__}: {e}"
+        except Exception as e:
+            job.last_status = "error"
+            job.last_error = f"{type(e).__name__}: {e}"
+            print(f"[{job.name}] failed: {job.last_error}")
+        finally:
+            job.last_duration_ms = (time.perf_counter() - start) * 1000
+            job.running = False
+            await self._changed()
+
+    async def _changed(self):
+        if self.on_change is None:
+            return
+        # one write at a time, so an older state never lands after a newer one
+        async with self._publish_lock:
+            try:
+                await asyncio.to_thread(self.on_change, self.state())
+            except Exception as e:
+                print(f"Error publishing schedule state: {e}")
+
+
+async def _sleep_until(wall_ts: float):
+    # sleep in slices so a wall-clock step (NTP) is noticed within a few seconds
+    while (remaining := wall_ts - time.time()) > 0:
+        await asyncio.sleep(min(remaining, 5))
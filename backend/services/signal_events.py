@@ -0,0 +1,50 @@
+import json
+import uuid
+from sqlalchemy import select, text
+from models.market import Market, Signal
+
+SIGNALS_CHANNEL = "new_signals"
+# NOTIFY payloads are capped at 8000 bytes; 150 quoted UUIDs stay well under
+IDS_PER_NOTIFY = 150
+
+NOTIFY_SQL = text("SELECT pg_notify(:channel, :payload)")
+
+def notify_new_signals(db, signal_ids) -> int:
+    """Queue a NOTIFY per chunk of new signal ids. Caller commits.
+
+    Postgres only delivers the notification once the transaction commits,
+    so listeners never see ids for rows they can't read yet.
+    """
+    ids = [str(i) for i in signal_ids]
+    for i in range(0, len(ids), IDS_PER_NOTIFY):
+        db.execute(NOTIFY_SQL, {"channel": SIGNALS_CHANNEL, "payload": json.dumps(ids[i:i + IDS_PER_NOTIFY])})
+    return len(ids)
+
+def parse_notification(payload: str) -> list[uuid.UUID]:
+    try:
+        ids = json.loads(payload)
+        return [uuid.UUID(i) for i in ids] if isinstance(ids, list) else []
+    except (TypeError, ValueError, AttributeError):
+        return []
+
+def serialize_signal(signal, title=None) -> dict:
+    return {
+        "id": str(signal.id),
+        "market_id": signal.market_id,
+        "title": title,
+        "signal_type": signal.signal_type,
+        "confidence": float(signal.confidence) if signal.confidence else None,
+        "detected_at": signal.detected_at.isoformat() if signal.detected_at else None,
+        "metadata": signal.signal_metadata,
+    }
+
+async def load_signal_events(db, signal_ids: list[uuid.UUID]) -> list[dict]:
+    """The active-signal payload for ``signal_ids``, oldest first."""
+    if not signal_ids:
+        return []
+    rows = (await db.execute(
+        select(Signal, Market.title).join(Market, Signal.market_id == Market.id)
+        .where(Signal.id.in_(signal_ids))
+        .order_by(Signal.detected_at.asc())
+    )).all()
+    return [serialize_signal(s, title) for s, title in rows]
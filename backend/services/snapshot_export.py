@@ -0,0 +1,64 @@
+import csv
+import io
+import json
+from datetime import datetime
+from sqlalchemy import select
+from models.market import MarketSnapshot
+
+EXPORT_COLUMNS = ("ts", "market_id", "price", "volume", "liquidity",
+                  "bid_ask_spread", "best_bid_size", "best_ask_size", "bid_depth", "ask_depth")
+VALUE_COLUMNS = EXPORT_COLUMNS[2:]
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+def export_statement(market_ids: list[str], start: datetime | None = None, end: datetime | None = None,
+                     yield_per: int = 5000):
+    """Snapshot rows for ``market_ids`` in [start, end), fetched ``yield_per`` rows at a time."""
+    stmt = select(*(getattr(MarketSnapshot, col) for col in EXPORT_COLUMNS)).where(
+        MarketSnapshot.market_id.in_(market_ids))
+    if start is not None:
+        stmt = stmt.where(MarketSnapshot.ts >= start)
+    if end is not None:
+        stmt = stmt.where(MarketSnapshot.ts < end)
+    # a backward scan of the (market_id, ts DESC) index, so rows stream without a sort
+    return stmt.order_by(MarketSnapshot.market_id.desc(), MarketSnapshot.ts.asc()).execution_options(yield_per=yield_per)
+
+async def stream_snapshots(session_factory, market_ids: list[str], start: datetime | None = None,
+                           end: datetime | None = None, fmt: str = "ndjson", chunk_rows: int = 5000):
+    """Yield the export as encoded chunks of ``chunk_rows`` rows each.
+
+    Rows come off a server-side cursor, so memory stays at one chunk no
+    matter how long the export runs. The session is opened here rather than
+    taken from the request so it lives exactly as long as the stream.
+    """
+    if fmt == "csv":
+        yield format_csv([], header=True)
+
+    async with session_factory() as db:
+        result = await db.stream(export_statement(market_ids, start, end, yield_per=chunk_rows))
+        async for rows in result.partitions(chunk_rows):
+            yield format_csv(rows) if fmt == "csv" else format_ndjson(rows)
+
+def format_ndjson(rows) -> bytes:
+    lines = []
+    for row in rows:
+        record = {"ts": row.ts.isoformat(), "market_id": row.market_id}
+        for col in VALUE_COLUMNS:
+            record[col] = _number(getattr(row, col))
+        lines.append(json.dumps(record))
+    return ("\n".join(lines) + "\n").encode() if lines else b""
+
+def format_csv(rows, header: bool = False) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    if header:
+        writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        values = (getattr(row, col) for col in VALUE_COLUMNS)
+        writer.writerow((row.ts.isoformat(), row.market_id, *("" if v is None else v for v in values)))
+    return buffer.getvalue().encode()
+
+def _number(value) -> float | None:
+    return float(value) if value is not None else None
@@ -0,0 +1,61 @@
+from datetime import datetime
+import numpy as np
+from sqlalchemy import Float, cast
+
+from models.market import MarketSnapshot
+
+
+class SnapshotFrame:
+    """Columnar view of market_snapshots rows, sorted by market_id and ts.
+
+    Rows of one market form a contiguous segment; ``starts``/``ends`` hold the
+    first and last row index of every segment and ``segment`` maps each row
+    back to its segment, so per-market reductions are plain bincounts.
+    """
+
+    def __init__(self, rows):
+        self.market_ids = np.array([r.market_id for r in rows], dtype=object)
+        self.ts = np.array([r.ts.timestamp() for r in rows], dtype=float)
+        self.price = np.array([r.price for r in rows], dtype=float)
+        self.volume = np.array([r.volume for r in rows], dtype=float)
+        self.liquidity = np.array([getattr(r, "liquidity", None) for r in rows], dtype=float)
+
+        n = len(self.market_ids)
+        boundary = np.ones(n, dtype=bool)
+        if n > 1:
+            boundary[1:] = self.market_ids[1:] != self.market_ids[:-1]
+        self.starts = np.flatnonzero(boundary)
+        self.ends = np.append(self.starts[1:], n) - 1 if n else np.array([], dtype=int)
+        self.segment = np.cumsum(boundary) - 1
+        self.segment_ids = self.market_ids[self.starts]
+
+    def __len__(self):
+        return len(self.market_ids)
+
+    def freeze(self):
+        """Make every column read-only, so one frame can be shared by concurrent detectors."""
+        for column in (self.market_ids, self.ts, self.price, self.volume, self.liquidity,
+                       self.starts, self.ends, self.segment, self.segment_ids):
+            column.setflags(write=False)
+        return self
+
+    @property
+    def segment_count(self) -> int:
+        return len(self.starts)
+
+    def segment_sizes(self) -> np.ndarray:
+        return self.ends - self.starts + 1
+
+def load_snapshot_frame(db, market_ids, since: datetime, newest_first: bool = False) -> SnapshotFrame:
+    ts_order = MarketSnapshot.ts.desc() if newest_first else MarketSnapshot.ts.asc()
+    rows = db.query(
+        MarketSnapshot.market_id,
+        MarketSnapshot.ts,
+        cast(MarketSnapshot.price, Float).label("price"),
+        cast(MarketSnapshot.volume, Float).label("volume"),
+        cast(MarketSnapshot.liquidity, Float).label("liquidity"),
+    ).filter(
+        MarketSnapshot.market_id.in_(market_ids),
+        MarketSnapshot.ts >= since,
+    ).order_by(MarketSnapshot.market_id, ts_order).all()
+    return SnapshotFrame(rows)
@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select, text
+from models.market import MarketSnapshot
+
+# resolution -> continuous aggregate serving it
+ROLLUP_VIEWS = {
+    "1h": "market_snapshots_1h",
+    "1d": "market_snapshots_1d",
+}
+RESOLUTIONS = ("auto", "raw", *ROLLUP_VIEWS)
+
+def pick_resolution(days: int) -> str:
+    # keep charts at roughly a few dozen to a few hundred points
+    if days <= 1:
+        return "raw"
+    if days <= 14:
+        return "1h"
+    return "1d"
+
+def history_statement(market_id: str, days: int = 5, resolution: str = "auto"):
+    """(statement, resolution) for ``days`` of one market's history, newest first."""
+    if resolution == "auto":
+        resolution = pick_resolution(days)
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+
+    if resolution == "raw":
+        stmt = select(MarketSnapshot.ts, MarketSnapshot.price, MarketSnapshot.volume, MarketSnapshot.liquidity).where(
+            MarketSnapshot.market_id == market_id, MarketSnapshot.ts >= since).order_by(MarketSnapshot.ts.desc())
+        return stmt, resolution
+    return text(f"""
+        SELECT bucket, open, high, low, close, volume, volume_change, liquidity, samples
+        FROM {ROLLUP_VIEWS[resolution]}
+        WHERE market_id = :market_id AND bucket >= :since
+        ORDER BY bucket DESC
+    """).bindparams(market_id=market_id, since=since), resolution
+
+async def get_snapshot_history(db, market_id: str, days: int = 5, resolution: str = "auto") -> list[dict]:
+    stmt, resolution = history_statement(market_id, days, resolution)
+    return history_rows((await db.execute(stmt)).all(), resolution)
+
+def history_rows(rows, resolution: str) -> list[dict]:
+    if resolution == "raw":
+        return [{
+            "timestamp": row.ts,
+            "price": row.price,
+            "volume": row.volume,
+            "liquidity": row.liquidity,
+        } for row in rows]
+
+    snapshots = []
+    for row in rows:
+        snapshots.append({
+            "timestamp": row.bucket,
+            "price": row.close,
+            "volume": row.volume,
+            "liquidity": row.liquidity,
+            "open": row.open,
+            "high": row.high,
+            "low": row.low,
+            "close": row.close,
+            "volume_change": row.volume_change,
+            "samples": row.samples,
+        })
+    return snapshots
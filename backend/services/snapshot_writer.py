@@ -0,0 +1,70 @@
+import csv
+import io
+from psycopg2.extras import execute_values
+
+SNAPSHOT_COLUMNS = ("ts", "market_id", "price", "volume", "liquidity",
+                    "bid_ask_spread", "best_bid_size", "best_ask_size", "bid_depth", "ask_depth")
+
+def write_snapshots(db, rows: list[dict], method: str = "copy") -> int:
+    """Bulk write snapshot rows into market_snapshots inside the session's transaction.
+
+    ``copy`` streams the rows through COPY FROM STDIN into a temp staging
+    table and merges them with one INSERT ... SELECT. ``values`` is the
+    multi-row execute_values fallback for connections that can't COPY.
+    Rows that collide on (ts, market_id) overwrite the stored values.
+    """
+    rows = _dedupe(rows)
+    if not rows:
+        return 0
+
+    cursor = db.connection().connection.dbapi_connection.cursor()
+    try:
+        if method == "copy":
+            return _copy_rows(cursor, rows)
+        if method == "values":
+            return _insert_values(cursor, rows)
+        raise ValueError(f"Unknown snapshot write method: {method}")
+    finally:
+        cursor.close()
+
+def _copy_rows(cursor, rows: list[dict]) -> int:
+    columns = ", ".join(SNAPSHOT_COLUMNS)
+    cursor.execute("CREATE TEMP TABLE IF NOT EXISTS snapshot_staging "
+                   "(LIKE market_snapshots INCLUDING DEFAULTS) ON COMMIT DROP")
+    cursor.execute("TRUNCATE snapshot_staging")
+    cursor.copy_expert(f"COPY snapshot_staging ({columns}) FROM STDIN WITH (FORMAT csv)", _to_csv(rows))
+    cursor.execute(f"INSERT INTO market_snapshots ({columns}) "
+                   f"SELECT {columns} FROM snapshot_staging "
+                   f"{_on_conflict_clause()}")
+    return cursor.rowcount
+
+def _insert_values(cursor, rows: list[dict]) -> int:
+    columns = ", ".join(SNAPSHOT_COLUMNS)
+    values = [tuple(row.get(col) for col in SNAPSHOT_COLUMNS) for row in rows]
+    execute_values(cursor,
+                   f"INSERT INTO market_snapshots ({columns}) VALUES %s {_on_conflict_clause()}",
+                   values, page_size=1000)
+    return len(values)
+
+def _on_conflict_clause() -> str:
+    updates = ", ".join(f"{col} = EXCLUDED.{col}" for col in SNAPSHOT_COLUMNS if col not in ("ts", "market_id"))
+    return f"ON CONFLICT (ts, market_id) DO UPDATE SET {updates}"
+
+def _to_csv(rows: list[dict]) -> io.StringIO:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for row in rows:
+        writer.writerow([_csv_value(row.get(col)) for col in SNAPSHOT_COLUMNS])
+    buf.seek(0)
+    return buf
+
+def _csv_value(value):
+    if value is None:
+        return None
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+def _dedupe(rows: list[dict]) -> list[dict]:
+    # ON CONFLICT DO UPDATE can't touch the same row twice in one statement
+    return list({(row["ts"], row["market_id"]): row for row in rows}.values())
@@ -1,83 +1,187 @@
-import time
+import asyncio
 from datetime import datetime, timezone
 
+from config import settings
 from database import SessionLocal
-from models.market import Market, MarketSnapshot
+from models.market import Market
+from services.ingestion import EventBatch, fetch_event_batch, load_event_batch
 from services.polymarket_service import PolyMarketClient
 from services.pattern_detectors import run_detections
+from services.snapshot_writer import write_snapshots
 from services.market_sync import sync_markets
 from services.calibration import sync_resolved_market
 from services.cleanup import cleanup_old_snapshots
-import json
+from services.data_version import bump_data_version, save_schedule
+from services.order_books import book_metrics, load_order_books
+from services.collector_runs import collector_run, record_error, span
+from services.scheduler import Job, Scheduler
 
-def collect_snapshots():
-    client = PolyMarketClient()
+def collect_snapshots(batch: EventBatch | None = None, detect: bool = True):
+    client = PolyMarketClient() if batch is None else None
     db = SessionLocal()
 
     try:
-        events = client.get_events(limit=100)
-        count = 0
+        if batch is None:
+            batch = fetch_event_batch(client, include_closed=False)
         now = datetime.now(timezone.utc)
 
         known_ids = set()
         for m in db.query(Market.id).all():
             known_ids.add(m[0])
 
-        for event in events:
-            for market_data in event.get("markets", []):
-                market_id = market_data.get("id")
-
-                if market_id not in known_ids:
-                    continue
-
-                volume = float(market_data.get("volume", 0))
-                if volume < 10000:
-                    continue
-
-                prices_str = market_data.get("outcomePrices", "[]")
-                try:
-                    prices = json.loads(prices_str)
-                    price = float(prices[0]) if prices else None
-                except (json.JSONDecodeError, IndexError):
-                    price = None
-
-                snapshot = MarketSnapshot(
-                    ts=now,
-                    market_id=market_id,
-                    price=price,
-                    volume=float(market_data.get("volume", 0)),
-                    liquidity=float(event.get("liquidity", 0)),
-                )
-                db.add(snapshot)
-                count += 1
-
-        db.commit()
+        rows = []
+        tokens = {}
+        for market_data in batch.open_markets:
+            market_id = market_data["id"]
+
+            if market_id not in known_ids:
+                continue
+
+            if market_data["volume_value"] < 10000:
+                continue
+
+            rows.append({
+                "ts": now,
+                "market_id": market_id,
+                "price": market_data["price"],
+                "volume": market_data["volume_value"],
+                "liquidity": market_data["liquidity"],
+            })
+            if market_data["token_id"]:
+                tokens[market_id] = market_data["token_id"]
+
+        if settings.CLOB_BOOKS_ENABLED and tokens:
+            db.rollback()  # don't sit idle in a transaction while the CLOB answers
+            attach_order_books(rows, tokens)
+
+        with span("snapshots.write") as s:
+            count = write_snapshots(db, rows)
+            db.commit()
+            s.rows = count
         print(f"[{now.isoformat()}] Saved {count} snapshots")
 
-        run_detections()
+        if detect:
+            run_detections()
+
+        with span("data_version"):
+            version = bump_data_version(db)
+            db.commit()
+        print(f"[{now.isoformat()}] Data version {version}")
     except Exception as e:
         db.rollback()
         print(f"Error collecting snapshots: {e}")
+        record_error(f"Error collecting snapshots: {e}")
     finally:
-        client.close()
+        if client:
+            client.close()
         db.close()
 
-def run_collector(interval_minutes: int = 5):
-    sync_interval = 12 * 60
-    cycles_to_sync = 0
+def attach_order_books(rows: list[dict], tokens: dict[str, str]) -> int:
+    """Fill spread and depth columns on ``rows`` from the CLOB; rows without a book keep None."""
+    try:
+        with span("clob.books") as s:
+            books = load_order_books(tokens.values())
+            s.rows = len(books)
+    except Exception as e:
+        print(f"Error fetching order books: {e}")
+        return 0
+
+    attached = 0
+    for row in rows:
+        book = books.get(tokens.get(row["market_id"]))
+        if book:
+            row.update(book_metrics(book))
+            attached += 1
+    print(f"Attached order books to {attached}/{len(rows)} snapshots")
+    return attached
 
-    print(f"Collecting snapshots (every {interval_minutes} mins)")
-    while True:
-        if cycles_to_sync <= 0:
+def run_cycle(full_sync: bool = False) -> bool:
+    """One collector cycle, recorded to collector_runs. False if the Gamma fetch failed."""
+    with collector_run(full_sync=full_sync) as run:
+        try:
+            batch = load_event_batch(include_closed=full_sync)
+        except Exception as e:
+            print(f"Error fetching events: {e}")
+            run.error = f"Error fetching events: {e}"
+            return False
+
+        if full_sync:
             print("Syncing markets...")
-            cleanup_old_snapshots(days=5)
-            sync_markets()
-            sync_resolved_market()
-            cycles_to_sync = sync_interval // interval_minutes
+            with span("cleanup"):
+                cleanup_old_snapshots()
+            with span("sync_markets"):
+                sync_markets(batch)
+            with span("sync_resolved"):
+                sync_resolved_market(batch)
+
+        with span("collect_snapshots"):
+            collect_snapshots(batch)
+        return True
+
+def snapshot_stage():
+    collect_snapshots(load_event_batch(include_closed=False), detect=False)
+
+def market_sync_stage():
+    sync_markets(load_event_batch(include_closed=False))
+
+def resolution_sync_stage():
+    sync_resolved_market(load_event_batch(include_open=False))
+
+def detection_stage():
+    run_detections()
+    db = SessionLocal()
+    try:
+        with span("data_version"):
+            bump_data_version(db)
+            db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+class StageFailed(Exception):
+    """A scheduled stage finished, but its collector run recorded an error."""
+
+def recorded(name: str, stage, full_sync: bool = False):
+    """``stage`` as a collector run of its own, so scheduled runs show up in collector_runs."""
+    def run():
+        with collector_run(full_sync=full_sync) as run:
+            try:
+                with span(name):
+                    stage()
+            except Exception as e:
+                run.error = f"{type(e).__name__}: {e}"
+                raise
+            if run.status == "error":
+                # the stages log and swallow their own failures; the scheduler still has to see them
+                raise StageFailed(run.failure)
+    return run
+
+def collector_jobs() -> list[Job]:
+    jitter = settings.SCHEDULE_JITTER_SECONDS
+    snapshots_every = settings.SCHEDULE_SNAPSHOTS_SECONDS
+    return [
+        Job("snapshots", recorded("collect_snapshots", snapshot_stage), every=snapshots_every,
+            deadline=snapshots_every * 0.8, jitter=jitter),
+        # offset so detection reads the snapshots written at the top of the same period
+        Job("detection", recorded("detection", detection_stage), every=settings.SCHEDULE_DETECTION_SECONDS,
+            offset=snapshots_every * 0.4, deadline=settings.SCHEDULE_DETECTION_SECONDS * 0.8, jitter=jitter),
+        Job("market_sync", recorded("sync_markets", market_sync_stage, full_sync=True),
+            every=settings.SCHEDULE_MARKET_SYNC_SECONDS, deadline=30 * 60, jitter=jitter, run_at_start=True),
+        Job("resolution_sync", recorded("sync_resolved", resolution_sync_stage, full_sync=True),
+            every=settings.SCHEDULE_RESOLUTION_SYNC_SECONDS, offset=15 * 60, deadline=30 * 60, jitter=jitter,
+            run_at_start=True),
+        Job("cleanup", recorded("cleanup", cleanup_old_snapshots), every=settings.SCHEDULE_CLEANUP_SECONDS,
+            offset=3 * 60 * 60, deadline=30 * 60, jitter=jitter),
+    ]
 
-        collect_snapshots()
-        cycles_to_sync -= 1
-        time.sleep(interval_minutes * 60)
+def run_collector():
+    """Run every collector stage on its own wall-clock cadence until interrupted."""
+    jobs = collector_jobs()
+    for job in jobs:
+        print(f"Scheduling {job.name} every {job.every:g}s")
+    asyncio.run(Scheduler(jobs, on_change=save_schedule).run())
 
 if __name__ == "__main__":
-    run_collector(interval_minutes=5)
\ No newline at end of file
+    run_collector()
\ No newline at end of file
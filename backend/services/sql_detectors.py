@@ -0,0 +1,114 @@
+from datetime import datetime, timezone, timedelta
+from sqlalchemy import text
+
+# Volume deltas via lag(), per-market stats over the positive deltas, the
+# latest delta's z-score and the momentum window's price change, all in one
+# pass over the 5-day window. Only markets that trigger come back.
+DETECTION_SQL = text("""
+    WITH tracked AS (
+        SELECT id, title
+        FROM markets
+        WHERE status = 'open' AND volume >= 10000
+    ),
+    snaps AS (
+        SELECT
+            s.market_id,
+            s.ts,
+            s.price::float8 AS price,
+            s.volume::float8 - lag(s.volume::float8) OVER (PARTITION BY s.market_id ORDER BY s.ts) AS delta,
+            row_number() OVER (PARTITION BY s.market_id ORDER BY s.ts DESC) AS recency
+        FROM market_snapshots s
+        JOIN tracked t ON t.id = s.market_id
+        WHERE s.ts >= :volume_since
+    ),
+    volume_stats AS (
+        SELECT
+            market_id,
+            count(*) AS snapshot_count,
+            count(*) FILTER (WHERE delta > 0) AS delta_count,
+            avg(delta) FILTER (WHERE delta > 0) AS avg_delta,
+            stddev_pop(delta) FILTER (WHERE delta > 0) AS std_delta,
+            max(delta) FILTER (WHERE recency = 1) AS latest_delta
+        FROM snaps
+        GROUP BY market_id
+    ),
+    spikes AS (
+        SELECT market_id, latest_delta, avg_delta, std_delta,
+               (latest_delta - avg_delta) / std_delta AS z_score
+        FROM volume_stats
+        WHERE snapshot_count >= 10 AND delta_count >= 5 AND std_delta >= 10
+    ),
+    momentum AS (
+        SELECT
+            market_id,
+            (array_agg(price ORDER BY ts DESC))[1] AS current_price,
+            (array_agg(price ORDER BY ts ASC))[1] AS earlier_price
+        FROM snaps
+        WHERE ts >= :momentum_since
+        GROUP BY market_id
+    )
+    SELECT 'volume_spike' AS signal_type, t.id AS market_id, t.title,
+           sp.latest_delta, sp.avg_delta, sp.std_delta, sp.z_score,
+           NULL::float8 AS current_price, NULL::float8 AS earlier_price
+    FROM spikes sp
+    JOIN tracked t ON t.id = sp.market_id
+    WHERE sp.z_score > :sigma_threshold
+    UNION ALL
+    SELECT 'price_momentum', t.id, t.title,
+           NULL, NULL, NULL, NULL,
+           m.current_price, m.earlier_price
+    FROM momentum m
+    JOIN tracked t ON t.id = m.market_id
+    WHERE m.current_price <> 0 AND m.earlier_price <> 0
+      AND abs(m.current_price - m.earlier_price) > :momentum_threshold
+""")
+
+def detect_signals_sql(db, sigma_threshold: float = 3.0, momentum_threshold: float = 0.15):
+    """Run both detectors inside Postgres and return volume_spike and price_momentum signals."""
+    now = datetime.now(timezone.utc)
+    rows = db.execute(DETECTION_SQL, {
+        "volume_since": now - timedelta(days=5),
+        "momentum_since": now - timedelta(hours=7),
+        "sigma_threshold": sigma_threshold,
+        "momentum_threshold": momentum_threshold,
+    }).all()
+
+    signals = []
+    for row in rows:
+        if row.signal_type == "volume_spike":
+            signals.append(_volume_spike(row))
+        else:
+            signals.append(_price_momentum(row))
+    return signals
+
+def _volume_spike(row) -> dict:
+    confidence = min(row.z_score / 5.0, 1.0)
+    return {
+        "market_id": row.market_id,
+        "title": row.title,
+        "signal_type": "volume_spike",
+        "confidence": round(confidence, 2),
+        "details": {
+            "current_volume": row.latest_delta,
+            "avg_volume": round(row.avg_delta, 2),
+            "std_dev": round(row.std_delta, 2),
+            "z_score": round(row.z_score, 2),
+        }
+    }
+
+def _price_momentum(row) -> dict:
+    diff = abs(row.current_price - row.earlier_price)
+    direction = "up" if row.current_price > row.earlier_price else "down"
+    confidence = min(diff / 0.3, 1.0)
+    return {
+        "market_id": row.market_id,
+        "title": row.title,
+        "signal_type": "price_momentum",
+        "confidence": round(confidence, 2),
+        "details": {
+            "current_price": row.current_price,
+            "earlier_price": row.earlier_price,
+            "change": round(diff, 4),
+            "direction": direction,
+        }
+    }
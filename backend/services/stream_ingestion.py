@@ -0,0 +1,353 @@
+import asyncio
+import json
+import random
+import time
+from datetime import datetime, timezone
+
+import websockets
+from websockets.asyncio.client import connect
+
+from config import settings
+from database import SessionLocal
+from models.market import Market
+from services.calibration import sync_resolved_market
+from services.cleanup import cleanup_old_snapshots
+from services.collector_runs import collector_run, span
+from services.data_version import bump_data_version
+from services.ingestion import load_event_batch
+from services.market_sync import sync_markets
+from services.order_books import book_metrics
+from services.pattern_detectors import run_detections
+from services.snapshot_writer import write_snapshots
+
+class MarketState:
+    """Latest known state of one tracked market, folded from CLOB ticks."""
+
+    def __init__(self, market_id: str, token_id: str, volume: float = 0.0, liquidity: float = 0.0):
+        self.market_id = market_id
+        self.token_id = token_id
+        self.volume = volume
+        self.liquidity = liquidity
+        self.bids: dict[float, float] = {}
+        self.asks: dict[float, float] = {}
+        self.last_trade = None
+        self.fallback_price = None
+
+    def price(self) -> float | None:
+        best_bid = max(self.bids, default=None)
+        best_ask = min(self.asks, default=None)
+        if best_bid is not None and best_ask is not None:
+            return round((best_bid + best_ask) / 2, 4)
+        return self.last_trade if self.last_trade is not None else self.fallback_price
+
+    def book(self) -> dict:
+        return {
+            "bids": [{"price": p, "size": s} for p, s in self.bids.items()],
+            "asks": [{"price": p, "size": s} for p, s in self.asks.items()],
+        }
+
+class LatestStateTable:
+    """Per-token latest state; any number of ticks between flushes becomes one row."""
+
+    def __init__(self):
+        self.states: dict[str, MarketState] = {}
+        self.dirty: set[str] = set()
+        self.ticks = 0
+
+    def set_universe(self, universe: dict[str, dict]) -> bool:
+        """Track exactly ``universe`` (token_id -> market info); True if the token set changed."""
+        changed = set(universe) != set(self.states)
+        for token_id in set(self.states) - set(universe):
+            del self.states[token_id]
+            self.dirty.discard(token_id)
+        for token_id, info in universe.items():
+            state = self.states.get(token_id)
+            if state is None:
+                state = self.states[token_id] = MarketState(info["market_id"], token_id)
+            state.volume = info["volume"]
+            state.liquidity = info["liquidity"]
+            state.fallback_price = info.get("price")
+            # fresh volume from Gamma is worth a snapshot even on a quiet book
+            self.dirty.add(token_id)
+        return changed
+
+    def apply(self, event: dict):
+        event_type = event.get("event_type")
+        if event_type == "book":
+            self._apply_book(event)
+        elif event_type == "price_change":
+            self._apply_price_changes(event)
+        elif event_type == "last_trade_price":
+            self._apply_last_trade(event)
+
+    def _apply_book(self, event: dict):
+        state = self.states.get(event.get("asset_id"))
+        if state is None:
+            return
+        state.bids = _levels(event.get("bids"))
+        state.asks = _levels(event.get("asks"))
+        self._touch(state)
+
+    def _apply_price_changes(self, event: dict):
+        # newer payloads batch changes under price_changes, older ones put them on the event
+        changes = event.get("price_changes") or event.get("changes") or []
+        for change in changes:
+            state = self.states.get(change.get("asset_id") or event.get("asset_id"))
+            if state is None:
+                continue
+            try:
+                price, size = float(change["price"]), float(change["size"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            side = state.bids if str(change.get("side", "")).upper() == "BUY" else state.asks
+            if size > 0:
+                side[price] = size
+            else:
+                side.pop(price, None)
+            self._touch(state)
+
+    def _apply_last_trade(self, event: dict):
+        state = self.states.get(event.get("asset_id"))
+        if state is None:
+            return
+        try:
+            state.last_trade = float(event["price"])
+        except (KeyError, TypeError, ValueError):
+            return
+        self._touch(state)
+
+    def _touch(self, state: MarketState):
+        self.dirty.add(state.token_id)
+        self.ticks += 1
+
+    def drain(self, ts: datetime) -> list[dict]:
+        """Snapshot rows for every market that changed since the last drain."""
+        rows = []
+        for token_id in self.dirty:
+            state = self.states.get(token_id)
+            if state is None or state.price() is None:
+                continue
+            row = {
+                "ts": ts,
+                "market_id": state.market_id,
+                "price": state.price(),
+                "volume": state.volume,
+                "liquidity": state.liquidity,
+            }
+            if state.bids or state.asks:
+                row.update(book_metrics(state.book()))
+            rows.append(row)
+        self.dirty.clear()
+        self.ticks = 0
+        return rows
+
+def _levels(raw) -> dict[float, float]:
+    levels = {}
+    for level in raw or []:
+        try:
+            price, size = float(level["price"]), float(level["size"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if size > 0:
+            levels[price] = size
+    return levels
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 60.0) -> float:
+    """Exponential backoff with full jitter: uniform in [0, min(cap, base * 2**attempt)]."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+class StreamIngestor:
+    """Long-running CLOB market-channel consumer.
+
+    Ticks are coalesced into a LatestStateTable and written as one batch of
+    snapshots every ``flush_seconds``. The tracked universe (and each
+    market's volume, which the socket doesn't carry) is refreshed from
+    Gamma every ``universe_seconds``; a changed token set resubscribes.
+    Detection runs only on the first flush after a refresh: in between,
+    every row repeats the last Gamma volume, and a zero volume delta would
+    resolve any active volume spike.
+    """
+
+    def __init__(self, url: str | None = None, flush_seconds: float | None = None,
+                 universe_seconds: float | None = None, max_backoff: float | None = None,
+                 load_universe=None, flush_rows=None, ping_seconds: float = 10):
+        self.url = url or settings.CLOB_WS_URL
+        self.flush_seconds = flush_seconds or settings.STREAM_FLUSH_SECONDS
+        self.universe_seconds = universe_seconds or settings.STREAM_UNIVERSE_REFRESH_SECONDS
+        self.max_backoff = max_backoff or settings.STREAM_MAX_BACKOFF_SECONDS
+        self.load_universe = load_universe or load_stream_universe
+        self.flush_rows = flush_rows or write_stream_snapshots
+        self.ping_seconds = ping_seconds
+        self.table = LatestStateTable()
+        self.connections = 0
+        self.flushes = 0
+        self._stop = asyncio.Event()
+        self._universe_ready = asyncio.Event()
+        self._volume_fresh = False
+        self._socket = None
+
+    def stop(self):
+        self._stop.set()
+
+    async def run(self):
+        """Run until ``stop()``. If one of the loops dies, flush and raise its error.
+
+        The loops handle the failures they expect and never return, so one that
+        ends has hit a bug; carrying on without it would stall ingestion silently.
+        """
+        tasks = [asyncio.create_task(coro) for coro in (self._universe_loop(), self._consume_loop(), self._flush_loop())]
+        stopped = asyncio.create_task(self._stop.wait())
+        try:
+            await asyncio.wait([stopped, *tasks], return_when=asyncio.FIRST_COMPLETED)
+            for task in tasks:
+                if task.done():
+                    name = task.get_coro().__name__
+                    print(f"Stream ingestion {name} crashed: {task.exception()!r}")
+                    raise task.exception() or RuntimeError(f"{name} exited")
+        finally:
+            for task in (stopped, *tasks):
+                task.cancel()
+            await asyncio.gather(stopped, *tasks, return_exceptions=True)
+            await self.flush()
+
+    async def _universe_loop(self):
+        while True:
+            try:
+                universe = await asyncio.to_thread(self.load_universe)
+                if self.table.set_universe(universe) and self._socket is not None:
+                    # new token set: drop the socket, the consume loop resubscribes right away
+                    await self._socket.close()
+                self._volume_fresh = True
+                self._universe_ready.set()
+            except Exception as e:
+                print(f"Error refreshing stream universe: {e}")
+            await asyncio.sleep(self.universe_seconds)
+
+    async def _consume_loop(self):
+        await self._universe_ready.wait()
+        attempt = 0
+        while True:
+            try:
+                async with connect(self.url, open_timeout=10) as socket:
+                    self._socket = socket
+                    self.connections += 1
+                    await socket.send(json.dumps({"assets_ids": list(self.table.states), "type": "market"}))
+                    pinger = asyncio.create_task(self._keepalive(socket))
+                    try:
+                        async for message in socket:
+                            attempt = 0
+                            self._handle(message)
+                    finally:
+                        pinger.cancel()
+                        self._socket = None
+                reason = "closed"
+            except (OSError, asyncio.TimeoutError, websockets.WebSocketException) as e:
+                reason = f"error ({e})"
+            # attempt only resets once a message arrives, so a server that accepts
+            # and immediately hangs up still gets an increasing delay
+            delay = backoff_delay(attempt, cap=self.max_backoff)
+            attempt += 1
+            print(f"Market stream {reason}, reconnecting in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    async def _keepalive(self, socket):
+        while True:
+            await asyncio.sleep(self.ping_seconds)
+            await socket.send("PING")
+
+    def _handle(self, message):
+        if message == "PONG":
+            return
+        try:
+            payload = json.loads(message)
+        except (TypeError, ValueError):
+            return
+        for event in payload if isinstance(payload, list) else [payload]:
+            if not isinstance(event, dict):
+                continue
+            try:
+                self.table.apply(event)
+            except Exception as e:
+                # one odd frame shouldn't take the connection (and every other market) down
+                print(f"Skipping malformed market event {event.get('event_type')!r}: {e!r}")
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            await self.flush()
+
+    async def flush(self) -> int:
+        ticks = self.table.ticks
+        rows = self.table.drain(datetime.now(timezone.utc))
+        if not rows:
+            return 0
+        detect, self._volume_fresh = self._volume_fresh, False
+        try:
+            await asyncio.to_thread(self.flush_rows, rows, detect=detect)
+        except Exception as e:
+            self._volume_fresh = self._volume_fresh or detect
+            print(f"Error flushing {len(rows)} stream snapshots: {e}")
+            return 0
+        self.flushes += 1
+        print(f"Flushed {len(rows)} snapshots from {ticks} ticks")
+        return len(rows)
+
+def load_stream_universe() -> dict[str, dict]:
+    """Tracked open markets keyed by CLOB token, refreshed from one Gamma crawl.
+
+    Market metadata is upserted on every refresh; the closed-market and
+    retention stages run on the same 12-hour schedule as the poller.
+    """
+    full_sync = time.monotonic() - load_stream_universe.last_full_sync >= 12 * 60 * 60
+    batch = load_event_batch(include_closed=full_sync)
+    if full_sync:
+        cleanup_old_snapshots()
+        sync_resolved_market(batch)
+        load_stream_universe.last_full_sync = time.monotonic()
+    sync_markets(batch)
+
+    db = SessionLocal()
+    try:
+        known_ids = {row[0] for row in db.query(Market.id).all()}
+    finally:
+        db.close()
+
+    return {
+        market_data["token_id"]: {
+            "market_id": market_data["id"],
+            "volume": market_data["volume_value"],
+            "liquidity": market_data["liquidity"],
+            "price": market_data["price"],
+        }
+        for market_data in batch.open_markets
+        if market_data["token_id"] and market_data["id"] in known_ids and market_data["volume_value"] >= 10000
+    }
+
+load_stream_universe.last_full_sync = float("-inf")
+
+def write_stream_snapshots(rows: list[dict], detect: bool = True):
+    """Write one flush; with ``detect``, also run the detectors and bump the data version."""
+    with collector_run():
+        db = SessionLocal()
+        try:
+            with span("snapshots.write") as s:
+                s.rows = write_snapshots(db, rows)
+                db.commit()
+            if not detect:
+                return
+            run_detections()
+            with span("data_version"):
+                bump_data_version(db)
+                db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+def run_stream_collector():
+    print(f"Streaming {settings.CLOB_WS_URL} (flushing every {settings.STREAM_FLUSH_SECONDS}s)")
+    asyncio.run(StreamIngestor().run())
+
+if __name__ == "__main__":
+    run_stream_collector()
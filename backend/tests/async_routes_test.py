@@ -0,0 +1,99 @@
+import threading
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from api.routes.calibration import router as calibration_router
+from api.routes.markets import router as market_router
+from api.routes.signals import router as signal_router
+from database import async_database_url, get_async_db, get_db
+
+class FakeAsyncSession:
+    """Async session for the routes' queries, plus the sync session calibration takes to the threadpool."""
+
+    def __init__(self):
+        self.sync_session = MagicMock()
+        self.execute = AsyncMock()
+
+def make_client(session):
+    app = FastAPI()
+    app.include_router(market_router, prefix="/api")
+    app.include_router(signal_router, prefix="/api")
+    app.include_router(calibration_router, prefix="/api")
+
+    @app.middleware("http")
+    async def record_loop_thread(request, call_next):
+        session.loop_thread = threading.current_thread()
+        return await call_next(request)
+
+    async def override():
+        yield session
+
+    def override_sync():
+        yield session.sync_session
+
+    app.dependency_overrides[get_async_db] = override
+    app.dependency_overrides[get_db] = override_sync
+    return TestClient(app)
+
+class TestAsyncDatabaseUrl:
+    def test_switches_driver(self):
+        url = async_database_url("postgresql://u:p@localhost:5432/db")
+        assert url.drivername == "postgresql+asyncpg"
+        assert url.database == "db" and url.port == 5432
+
+    def test_translates_sslmode(self):
+        url = async_database_url("postgresql+psycopg2://u:p@host/db?sslmode=require")
+        assert url.drivername == "postgresql+asyncpg"
+        assert dict(url.query) == {"ssl": "require"}
+
+class TestAsyncRoutes:
+    def test_markets_awaits_service_on_async_session(self):
+        session = FakeAsyncSession()
+        page = {"markets": [], "total": None, "next_cursor": None}
+        with patch("api.routes.markets.list_markets", AsyncMock(return_value=page)) as list_markets:
+            response = make_client(session).get("/api/markets?limit=5&count=none")
+
+        assert response.status_code == 200
+        list_markets.assert_awaited_once_with(session, limit=5, offset=0, cursor=None, search=None, count="none")
+
+    def test_calibration_runs_off_the_event_loop(self):
+        session = FakeAsyncSession()
+        threads = []
+
+        def read_calibration(db, **kwargs):
+            threads.append(threading.current_thread())
+            return {"market_count": 0}
+
+        with patch("api.routes.calibration.read_calibration", side_effect=read_calibration) as read:
+            response = make_client(session).get("/api/calibration?bins=5")
+
+        assert response.status_code == 200
+        assert threads[0] is not session.loop_thread
+        assert read.call_args[0][0] is session.sync_session
+
+    def test_bad_cursor_is_400(self):
+        response = make_client(FakeAsyncSession()).get("/api/markets?cursor=garbage")
+        assert response.status_code == 400
+
+    def test_active_signals(self):
+        session = FakeAsyncSession()
+        signal = SimpleNamespace(id="s1", market_id="m1", signal_type="volume_spike", confidence=0.8,
+                                 detected_at=datetime(2026, 3, 1, tzinfo=timezone.utc), signal_metadata={"z_score": 4})
+        session.execute.return_value.all = MagicMock(return_value=[(signal, "Market one")])
+
+        response = make_client(session).get("/api/signals/active?signal_type=volume_spike")
+
+        assert response.status_code == 200
+        assert response.json() == [{
+            "id": "s1",
+            "market_id": "m1",
+            "title": "Market one",
+            "signal_type": "volume_spike",
+            "confidence": 0.8,
+            "detected_at": "2026-03-01T00:00:00+00:00",
+            "metadata": {"z_score": 4},
+        }]
+        statement = str(session.execute.call_args[0][0])
+        assert "signals.signal_type = :signal_type_1" in statement
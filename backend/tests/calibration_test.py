@@ -1,6 +1,8 @@
 import pytest
+import numpy as np
 from unittest.mock import MagicMock, patch
-from services.calibration import _derive_resolution, sync_resolved_market, _compute_calibration_bins, _compute_category_breakdown, compute_calibration
+from types import SimpleNamespace
+from services.calibration import _derive_resolution, sync_resolved_market, _compute_calibration_bins, _compute_category_breakdown, compute_calibration, _bin_totals, _bin_indices, _calibration_from_bins, _calibration_from_forecasts, _bootstrap_intervals, _bootstrap_chunk, BOOTSTRAP_CHUNK, BOOTSTRAP_CHUNK_ELEMENTS, parse_horizon, compute_horizon_calibration, _parse_closed_time, refresh_calibration, _build_bins, read_calibration
 
 class TestDeriveResolution:
     def test_yes_wins(self):
@@ -80,7 +82,7 @@ class TestSyncResolvedMarket:
         db = MockSession.return_value
         client = MockClient.return_value
         
-        client.get_events.return_value = [{
+        client.get_all_events.return_value = [{
             "markets": [{
                 "id": "m1",
                 "closed": True,
@@ -96,6 +98,7 @@ class TestSyncResolvedMarket:
         
         assert existing.resolution_result == "Yes"
         assert existing.status == "closed"
+        assert existing.resolved_at is not None
         db.commit.assert_called_once()
     
     @patch("services.calibration.SessionLocal")
@@ -104,7 +107,7 @@ class TestSyncResolvedMarket:
         db = MockSession.return_value
         client = MockClient.return_value
         
-        client.get_events.return_value = [{
+        client.get_all_events.return_value = [{
             "markets": [{
                 "id": "unknown",
                 "closed": True,
@@ -123,7 +126,7 @@ class TestSyncResolvedMarket:
         db = MockSession.return_value
         client = MockClient.return_value
         
-        client.get_events.return_value = [{
+        client.get_all_events.return_value = [{
             "markets": [{
                 "id": "m1",
                 "closed": True,
@@ -203,4 +206,309 @@ class TestCategoryBreakdown:
     def test_none_category_becomes_uncategorized(self):
         forecasts = [{"predicted": 0.5, "actual": 1.0, "category": None}]
         breakdown = _compute_category_breakdown(forecasts)
-        assert breakdown[0]["category"] == "Uncategorized"
\ No newline at end of file
+        assert breakdown[0]["category"] == "Uncategorized"
+class ForecastRow:
+    def __init__(self, id, price, resolution_result, outcomes='["Yes", "No"]', category="Sports"):
+        self.id = id
+        self.price = price
+        self.resolution_result = resolution_result
+        self.outcomes = outcomes
+        self.category = category
+
+class TestComputeCalibration:
+    def test_single_query_for_all_markets(self):
+        db = MagicMock()
+        db.query.return_value.join.return_value.filter.return_value.all.return_value = [
+            ForecastRow("m1", 0.8, "Yes"),
+            ForecastRow("m2", 0.3, "No"),
+            ForecastRow("m3", None, "Yes"),
+            ForecastRow("m4", 0.6, "Yes", outcomes='["A", "B", "C"]'),
+        ]
+
+        result = compute_calibration(db)
+
+        assert db.query.call_count == 1
+        assert result["market_count"] == 2
+        assert result["brier_score"] == round(((0.8 - 1) ** 2 + 0.3 ** 2) / 2, 4)
+        assert result["category_breakdown"][0]["count"] == 2
+
+    def test_no_resolved_markets(self):
+        db = MagicMock()
+        db.query.return_value.join.return_value.filter.return_value.filter.return_value.all.return_value = []
+
+        result = compute_calibration(db, category="Sports")
+
+        assert result["brier_score"] is None
+        assert result["market_count"] == 0
+
+class TestCalibrationStore:
+    forecasts = [
+        {"predicted": 0.95, "actual": 1.0, "category": "Sports"},
+        {"predicted": 0.3, "actual": 0.0, "category": "Sports"},
+        {"predicted": 0.3, "actual": 1.0, "category": "Politics"},
+        {"predicted": 0.55, "actual": 1.0, "category": None},
+        {"predicted": 0.1, "actual": 0.0, "category": "Politics"},
+    ]
+
+    def bin_rows(self, forecasts, n_bins=10):
+        return [
+            SimpleNamespace(n_bins=n_bins, scope=scope, bin_index=i, count=c, sum_predicted=p, sum_actual=a, brier_sum=b)
+            for (scope, i), (c, p, a, b) in _bin_totals(forecasts, n_bins).items()
+        ]
+
+    def expected(self, forecasts, n_bins=10):
+        brier = sum((f["predicted"] - f["actual"]) ** 2 for f in forecasts) / len(forecasts)
+        return {
+            "brier_score": round(brier, 4),
+            "market_count": len(forecasts),
+            "calibration_curve": _compute_calibration_bins(forecasts, n_bins),
+            "category_breakdown": _compute_category_breakdown(forecasts),
+        }
+
+    def test_store_matches_full_recompute(self):
+        result = _calibration_from_bins(self.bin_rows(self.forecasts), 10)
+        assert result == self.expected(self.forecasts)
+
+    def test_incremental_batches_match_full_recompute(self):
+        rows = {}
+        for batch in (self.forecasts[:2], self.forecasts[2:]):
+            for row in self.bin_rows(batch, 5):
+                key = (row.scope, row.bin_index)
+                if key in rows:
+                    stored = rows[key]
+                    stored.count += row.count
+                    stored.sum_predicted += row.sum_predicted
+                    stored.sum_actual += row.sum_actual
+                    stored.brier_sum += row.brier_sum
+                else:
+                    rows[key] = row
+
+        assert _calibration_from_bins(list(rows.values()), 5) == self.expected(self.forecasts, 5)
+
+    def test_category_scope(self):
+        result = _calibration_from_bins(self.bin_rows(self.forecasts), 10, category="Politics")
+        politics = [f for f in self.forecasts if f["category"] == "Politics"]
+        assert result == self.expected(politics)
+
+    def test_empty_store(self):
+        assert _calibration_from_bins([], 10)["market_count"] == 0
+
+    def test_bin_indices_match_edges(self):
+        prices = [0.0, 0.1, 0.3, 0.7, 0.9999, 1.0]
+        indices = _bin_indices(np.array(prices), 10)
+        for p, index in zip(prices, indices):
+            bins = _compute_calibration_bins([{"predicted": p, "actual": 1.0, "category": None}])
+            assert bins[index]["count"] == 1
+
+    def test_out_of_range_prices_are_unbinned(self):
+        assert list(_bin_indices(np.array([-0.1, 1.2]), 10)) == [-1, -1]
+        assert sum(b["count"] for b in _compute_calibration_bins([{"predicted": 1.2, "actual": 1.0, "category": None}])) == 0
+
+    @patch("services.calibration._accumulate_bins")
+    @patch("services.calibration.load_forecasts")
+    def test_refresh_only_folds_in_inserted_forecasts(self, mock_load, mock_accumulate):
+        pending = [{"market_id": m, "predicted": 0.5, "actual": 1.0, "category": None} for m in ("m1", "m2", "m3")]
+        mock_load.return_value = pending
+        db = MagicMock()
+        # the lock, then the insert: m2 was recorded by a concurrent refresh
+        db.execute.side_effect = [MagicMock(), [SimpleNamespace(market_id="m1"), SimpleNamespace(market_id="m3")]]
+        db.query.return_value.distinct.return_value.all.return_value = [(10,)]
+
+        assert refresh_calibration(db) == 2
+
+        assert "pg_advisory_xact_lock" in str(db.execute.call_args_list[0][0][0])
+        assert "RETURNING" in str(db.execute.call_args_list[1][0][0])
+        mock_accumulate.assert_called_once_with(db, 10, [pending[0], pending[2]])
+
+    @patch("services.calibration._accumulate_bins")
+    @patch("services.calibration.load_forecasts")
+    def test_refresh_skips_bins_when_nothing_inserted(self, mock_load, mock_accumulate):
+        mock_load.return_value = [{"market_id": "m1", "predicted": 0.5, "actual": 1.0, "category": None}]
+        db = MagicMock()
+        db.execute.side_effect = [MagicMock(), []]
+
+        assert refresh_calibration(db) == 0
+        mock_accumulate.assert_not_called()
+
+    @patch("services.calibration.refresh_calibration")
+    @patch("services.calibration._accumulate_bins")
+    def test_first_build_does_not_add_to_existing_bins(self, mock_accumulate, mock_refresh):
+        db = MagicMock()
+        db.query.return_value.filter.return_value.first.return_value = None
+        db.query.return_value.all.return_value = [SimpleNamespace(predicted=0.3, actual=0.0, category="Sports")]
+
+        _build_bins(db, 10)
+
+        assert mock_accumulate.call_args[1] == {"include_empty": True, "additive": False}
+        db.commit.assert_called_once()
+
+    @patch("services.calibration.refresh_calibration")
+    @patch("services.calibration._accumulate_bins")
+    def test_build_skipped_when_another_request_won(self, mock_accumulate, mock_refresh):
+        db = MagicMock()
+        db.query.return_value.filter.return_value.first.return_value = (10,)
+
+        _build_bins(db, 10)
+
+        mock_accumulate.assert_not_called()
+        db.commit.assert_called_once()
+
+class TestCalibrationStatistics:
+    def forecasts(self, n=400, seed=3):
+        rng = np.random.default_rng(seed)
+        predicted = rng.uniform(0.02, 0.98, n)
+        actual = (rng.uniform(0, 1, n) < predicted).astype(float)
+        categories = rng.choice(["Sports", "Politics", "Crypto"], n)
+        return [{"predicted": float(p), "actual": float(a), "category": str(c)}
+                for p, a, c in zip(predicted, actual, categories)]
+
+    def test_configurable_bin_count(self):
+        bins = _compute_calibration_bins(self.forecasts(), n_bins=4)
+        assert len(bins) == 4
+        assert sum(b["count"] for b in bins) == 400
+
+    def test_per_category_curves(self):
+        forecasts = self.forecasts()
+        result = _calibration_from_forecasts(forecasts, n_bins=5, per_category=True)
+
+        assert sorted(result["category_curves"]) == ["Crypto", "Politics", "Sports"]
+        sports = [f for f in forecasts if f["category"] == "Sports"]
+        assert result["category_curves"]["Sports"] == _compute_calibration_bins(sports, 5)
+
+    def test_bootstrap_interval_brackets_estimate(self):
+        forecasts = self.forecasts()
+        result = _calibration_from_forecasts(forecasts, bootstrap=500)
+
+        low, high = result["brier_ci"]
+        assert low <= result["brier_score"] <= high
+        for calibration_bin in result["calibration_curve"]:
+            if calibration_bin["count"] > 20:
+                low, high = calibration_bin["frequency_ci"]
+                assert low <= calibration_bin["actual_frequency"] <= high
+
+    def test_bootstrap_is_reproducible_and_handles_empty_bins(self):
+        predicted = np.array([0.15, 0.18, 0.85])
+        actual = np.array([0.0, 1.0, 1.0])
+
+        first = _bootstrap_intervals(predicted, actual, 10, 300)
+        assert first == _bootstrap_intervals(predicted, actual, 10, 300)
+        assert first["bins"][5] is None
+        assert first["bins"][8] == [1.0, 1.0]
+
+    def test_bootstrap_chunk_fits_memory_budget(self):
+        assert _bootstrap_chunk(400) == BOOTSTRAP_CHUNK
+        assert _bootstrap_chunk(100_000) * 100_000 <= BOOTSTRAP_CHUNK_ELEMENTS
+        assert _bootstrap_chunk(10_000_000) == 1
+        assert _bootstrap_chunk(0) == BOOTSTRAP_CHUNK
+
+    def test_large_n_bootstrap_draws_budgeted_int32_chunks(self):
+        n = 50_000
+        predicted = np.linspace(0.01, 0.99, n)
+        actual = (np.arange(n) % 2).astype(float)
+        shapes = []
+        generator = np.random.default_rng
+
+        def recording_rng(seed):
+            rng = generator(seed)
+            integers = rng.integers
+
+            class Recorder:
+                def integers(self, *args, **kwargs):
+                    sample = integers(*args, **kwargs)
+                    shapes.append((sample.shape, sample.dtype))
+                    return sample
+            return Recorder()
+
+        with patch("services.calibration.np.random.default_rng", side_effect=recording_rng):
+            result = _bootstrap_intervals(predicted, actual, 10, 100)
+
+        assert sum(shape[0] for shape, _ in shapes) == 100
+        assert all(shape[0] * shape[1] <= BOOTSTRAP_CHUNK_ELEMENTS for shape, _ in shapes)
+        assert all(dtype == np.int32 for _, dtype in shapes)
+        low, high = result["brier"]
+        assert low <= high
+
+    def test_no_bootstrap_by_default(self):
+        result = _calibration_from_forecasts(self.forecasts())
+        assert "brier_ci" not in result
+
+    def read(self, forecasts, stored, **kwargs):
+        bins = TestCalibrationStore().bin_rows(forecasts)
+        bin_query, forecast_query = MagicMock(), MagicMock()
+        bin_query.filter.return_value.all.return_value = bins
+        forecast_query.filter.return_value.all.return_value = stored
+        db = MagicMock()
+        db.query.side_effect = lambda *cols: bin_query if len(cols) == 1 else forecast_query
+        return read_calibration(db, **kwargs), forecast_query
+
+    def test_uncategorized_bootstrap_reads_null_category(self):
+        forecasts = [f | {"category": None} for f in self.forecasts(50)]
+        stored = [SimpleNamespace(predicted=f["predicted"], actual=f["actual"]) for f in forecasts]
+
+        result, forecast_query = self.read(forecasts, stored, category="Uncategorized", bootstrap=200)
+
+        assert str(forecast_query.filter.call_args[0][0]).endswith("IS NULL")
+        assert result["market_count"] == 50
+        low, high = result["brier_ci"]
+        assert low <= result["brier_score"] <= high
+
+    def test_bootstrap_skipped_when_nothing_stored(self):
+        result, _ = self.read(self.forecasts(20), [], category="Sports", bootstrap=200)
+        assert result["market_count"] > 0
+        assert "brier_ci" not in result
+        assert "frequency_ci" not in result["calibration_curve"][0]
+
+
+class TestHorizonCalibration:
+    def test_parse_horizon(self):
+        assert parse_horizon("1h") == 1.0
+        assert parse_horizon("24h") == 24.0
+        assert parse_horizon("7d") == 168.0
+        assert parse_horizon("90m") == 1.5
+        assert parse_horizon(" 2W ") == 336.0
+
+    @pytest.mark.parametrize("value", ["", "h", "1y", "-1h", "1 h"])
+    def test_invalid_horizon(self, value):
+        with pytest.raises(ValueError):
+            parse_horizon(value)
+
+    def test_parse_closed_time(self):
+        parsed = _parse_closed_time("2025-03-01 12:00:00+00")
+        assert parsed.year == 2025 and parsed.hour == 12
+        assert parsed.tzinfo is not None
+        assert _parse_closed_time(None) is None
+        assert _parse_closed_time("not a date") is None
+
+    def test_one_query_for_all_horizons(self):
+        db = MagicMock()
+        db.execute.return_value.all.return_value = [
+            SimpleNamespace(label="1h", id="m1", outcomes='["Yes", "No"]', resolution_result="Yes", price=0.9),
+            SimpleNamespace(label="1h", id="m2", outcomes=["Yes", "No"], resolution_result="No", price=0.2),
+            SimpleNamespace(label="7d", id="m1", outcomes=["Yes", "No"], resolution_result="Yes", price=0.5),
+            SimpleNamespace(label="7d", id="m3", outcomes=["A", "B", "C"], resolution_result="A", price=0.5),
+        ]
+
+        result = compute_horizon_calibration(db, ["1h", "24h", "7D"], category="Sports")
+
+        db.execute.assert_called_once()
+        params = db.execute.call_args[0][1]
+        assert params["labels"] == ["1h", "24h", "7d"]
+        assert params["hours"] == [1.0, 24.0, 168.0]
+        assert params["category"] == "Sports"
+        assert result == [
+            {"horizon": "1h", "hours": 1.0, "brier_score": 0.025, "market_count": 2},
+            {"horizon": "24h", "hours": 24.0, "brier_score": None, "market_count": 0},
+            {"horizon": "7d", "hours": 168.0, "brier_score": 0.25, "market_count": 1},
+        ]
+
+    def test_duplicate_horizons_counted_once(self):
+        db = MagicMock()
+        db.execute.return_value.all.return_value = [
+            SimpleNamespace(label="24h", id="m1", outcomes=["Yes", "No"], resolution_result="Yes", price=0.5),
+        ]
+
+        result = compute_horizon_calibration(db, ["24h", " 24H", "1h", "24h"])
+
+        assert db.execute.call_args[0][1]["labels"] == ["24h", "1h"]
+        assert [h["horizon"] for h in result] == ["24h", "1h"]
+        assert result[0]["market_count"] == 1
@@ -0,0 +1,124 @@
+import asyncio
+import uuid
+import pytest
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+from services.collector_runs import RunRecorder, collector_run, get_recent_runs, span
+from services.snapshots import run_cycle
+
+class TestRunRecorder:
+    def test_spans_record_duration_rows_and_order(self):
+        run = RunRecorder()
+        with run.span("fetch.http") as s:
+            s.rows = 10
+        with run.span("snapshots.write"):
+            pass
+        run.finish()
+
+        row = run.to_row()
+        assert [s["name"] for s in row["stages"]] == ["fetch.http", "snapshots.write"]
+        assert row["stages"][0]["rows"] == 10
+        assert row["stages"][1]["offset_ms"] >= row["stages"][0]["offset_ms"]
+        assert all(s["duration_ms"] >= 0 for s in row["stages"])
+        assert row["status"] == "ok"
+        assert row["duration_ms"] >= 0
+
+    def test_span_error_marks_run_and_propagates(self):
+        run = RunRecorder()
+        with pytest.raises(RuntimeError):
+            with run.span("detection.volume"):
+                raise RuntimeError("boom")
+
+        assert run.spans[0].error == "RuntimeError: boom"
+        assert run.spans[0].duration_ms is not None
+        assert run.status == "error"
+
+    def test_module_span_is_noop_without_run(self):
+        with span("anything") as s:
+            s.rows = 3
+
+class TestCollectorRun:
+    @patch("services.collector_runs.SessionLocal")
+    def test_persists_run_with_nested_spans(self, MockSession):
+        db = MockSession.return_value
+        with collector_run(full_sync=True) as run:
+            with span("fetch.http") as s:
+                s.rows = 2
+
+        saved = db.add.call_args[0][0]
+        assert saved.id == run.id
+        assert saved.full_sync is True
+        assert saved.status == "ok"
+        assert saved.stages[0]["name"] == "fetch.http"
+        assert saved.finished_at is not None
+        db.commit.assert_called_once()
+        db.close.assert_called_once()
+
+    @patch("services.collector_runs.SessionLocal")
+    def test_swallowed_stage_errors_still_recorded(self, MockSession):
+        db = MockSession.return_value
+        with collector_run():
+            try:
+                with span("sync_markets.write"):
+                    raise ValueError("bad row")
+            except ValueError:
+                pass
+
+        saved = db.add.call_args[0][0]
+        assert saved.status == "error"
+        assert saved.stages[0]["error"] == "ValueError: bad row"
+
+    @patch("services.collector_runs.SessionLocal")
+    def test_save_failure_does_not_raise(self, MockSession):
+        db = MockSession.return_value
+        db.commit.side_effect = RuntimeError("db down")
+        with collector_run():
+            pass
+        db.rollback.assert_called_once()
+
+class TestRunCycle:
+    @patch("services.collector_runs.SessionLocal")
+    @patch("services.snapshots.collect_snapshots")
+    @patch("services.snapshots.sync_resolved_market")
+    @patch("services.snapshots.sync_markets")
+    @patch("services.snapshots.cleanup_old_snapshots")
+    @patch("services.snapshots.load_event_batch")
+    def test_full_sync_records_every_stage(self, load, cleanup, sync, resolved, collect, MockSession):
+        assert run_cycle(full_sync=True) is True
+
+        load.assert_called_once_with(include_closed=True)
+        saved = MockSession.return_value.add.call_args[0][0]
+        assert [s["name"] for s in saved.stages] == ["cleanup", "sync_markets", "sync_resolved", "collect_snapshots"]
+
+    @patch("services.collector_runs.SessionLocal")
+    @patch("services.snapshots.collect_snapshots")
+    @patch("services.snapshots.load_event_batch", side_effect=RuntimeError("gamma down"))
+    def test_fetch_failure_is_recorded(self, load, collect, MockSession):
+        assert run_cycle() is False
+
+        collect.assert_not_called()
+        saved = MockSession.return_value.add.call_args[0][0]
+        assert saved.status == "error"
+        assert "gamma down" in saved.error
+        assert saved.full_sync is False
+
+class TestRecentRuns:
+    def test_serializes_rows(self):
+        db = MagicMock()
+        db.scalars = AsyncMock()
+        run_id = uuid.uuid4()
+        started = datetime(2026, 3, 1, tzinfo=timezone.utc)
+        db.scalars.return_value.all = MagicMock(return_value=[
+            SimpleNamespace(id=run_id, started_at=started, finished_at=started, duration_ms=1234.5,
+                            full_sync=False, status="error", error=None,
+                            stages=[{"name": "fetch.http", "error": "HTTPError: 503"}]),
+        ])
+
+        runs = asyncio.run(get_recent_runs(db, limit=5, status="error"))
+
+        assert runs[0]["id"] == str(run_id)
+        assert runs[0]["stages"][0]["error"] == "HTTPError: 503"
+        statement = db.scalars.call_args[0][0]
+        assert "collector_runs.status = :status_1" in str(statement)
+        assert statement.compile().params["param_1"] == 5
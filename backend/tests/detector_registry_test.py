@@ -0,0 +1,167 @@
+import threading
+import pytest
+from datetime import datetime, timezone, timedelta
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+from services.detector_registry import DETECTORS, DetectionContext, Detector, load_detection_context, run_detectors
+from services.pattern_detectors import _price_momentum_detector, detect_liquidity_drain, detect_price_momentum, run_detections
+from services.snapshot_frame import SnapshotFrame
+
+NOW = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+
+def market(id, title="Test Market", volume=100000):
+    return SimpleNamespace(id=id, title=title, volume=volume)
+
+def snap(market_id, hours_ago, price=0.5, liquidity=5000.0, volume=100000.0):
+    return SimpleNamespace(market_id=market_id, ts=NOW - timedelta(hours=hours_ago),
+                           price=price, volume=volume, liquidity=liquidity)
+
+def make_context(rows, markets=None):
+    markets = markets or {m: market(m) for m in dict.fromkeys(r.market_id for r in rows)}
+    return DetectionContext(now=NOW, markets=markets, frame=SnapshotFrame(rows).freeze())
+
+@pytest.fixture
+def registry():
+    saved = dict(DETECTORS)
+    DETECTORS.clear()
+    yield DETECTORS
+    DETECTORS.clear()
+    DETECTORS.update(saved)
+
+class TestDetectionContext:
+    def test_loads_widest_window_once(self):
+        db = MagicMock()
+        db.query.return_value.filter.return_value.all.return_value = [market("m1"), market("m2", volume=50)]
+        detectors = [Detector("a", "a", None, timedelta(hours=6)), Detector("b", "b", None, timedelta(days=2)),
+                     Detector("c", "c", None)]
+
+        with patch("services.detector_registry.load_snapshot_frame", return_value=SnapshotFrame([])) as load:
+            ctx = load_detection_context(db, detectors, now=NOW)
+
+        load.assert_called_once()
+        ids, since = load.call_args[0][1:]
+        assert list(ids) == ["m1"]
+        assert since == NOW - timedelta(days=2)
+        with pytest.raises(TypeError):
+            ctx.markets["m3"] = market("m3")
+
+    def test_frame_is_read_only(self):
+        ctx = make_context([snap("m1", 2), snap("m1", 1)])
+        with pytest.raises(ValueError):
+            ctx.frame.price[0] = 1.0
+
+    def test_window_starts(self):
+        ctx = make_context([snap("m1", 10), snap("m1", 5), snap("m1", 1), snap("m2", 9), snap("m3", 2)])
+        # m2 has nothing inside 6h, so its start points past its end
+        assert ctx.window_starts(timedelta(hours=6)).tolist() == [1, 5, 4]
+
+class TestRunDetectors:
+    def test_detectors_share_context_and_run_concurrently(self, registry):
+        barrier = threading.Barrier(2, timeout=2)
+        seen = []
+
+        def detector(name):
+            def detect(ctx):
+                seen.append(ctx)
+                barrier.wait()
+                return [{"market_id": "m1", "signal_type": name}]
+            return detect
+
+        registry["a"] = Detector("a", "type_a", detector("type_a"), timedelta(hours=1))
+        registry["b"] = Detector("b", "type_b", detector("type_b"), timedelta(hours=2))
+
+        with patch("services.detector_registry.load_detection_context", return_value=make_context([])) as load:
+            signals, completed = run_detectors(MagicMock(), max_workers=2)
+
+        load.assert_called_once()
+        assert seen[0] is seen[1]
+        assert [s["signal_type"] for s in signals] == ["type_a", "type_b"]
+        assert completed == ["type_a", "type_b"]
+
+    def test_failed_detector_is_not_completed(self, registry):
+        def broken(ctx):
+            raise RuntimeError("boom")
+
+        registry["ok"] = Detector("ok", "shared", lambda ctx: [])
+        registry["broken"] = Detector("broken", "shared", broken)
+        registry["other"] = Detector("other", "other", lambda ctx: [{"signal_type": "other"}])
+
+        with patch("services.detector_registry.load_detection_context", return_value=make_context([])):
+            signals, completed = run_detectors(MagicMock())
+
+        assert signals == [{"signal_type": "other"}]
+        assert completed == ["other"]
+
+    def test_named_subset(self, registry):
+        registry["a"] = Detector("a", "a", lambda ctx: [1])
+        registry["b"] = Detector("b", "b", lambda ctx: [2])
+
+        with patch("services.detector_registry.load_detection_context", return_value=make_context([])):
+            assert run_detectors(MagicMock(), ["b"]) == ([2], ["b"])
+
+    def test_builtin_plugins_registered(self):
+        assert {name: d.signal_type for name, d in DETECTORS.items()} == {
+            "volume": "volume_spike", "momentum": "price_momentum", "liquidity_drain": "liquidity_drain"}
+
+class TestLiquidityDrain:
+    def test_detects_drop_inside_window(self):
+        ctx = make_context([
+            snap("m1", 8, liquidity=20000), snap("m1", 5, liquidity=10000), snap("m1", 1, liquidity=6000),
+            snap("m2", 5, liquidity=10000), snap("m2", 1, liquidity=9000),
+        ])
+
+        signals = detect_liquidity_drain(ctx)
+
+        # m1 is measured from its first row inside 6h (10000), not the 8h-old one
+        assert signals == [{
+            "market_id": "m1", "title": "Test Market", "signal_type": "liquidity_drain", "confidence": 0.8,
+            "details": {"current_liquidity": 6000.0, "earlier_liquidity": 10000.0, "change": 0.4},
+        }]
+
+    def test_ignores_thin_single_and_missing(self):
+        ctx = make_context([
+            snap("thin", 5, liquidity=500), snap("thin", 1, liquidity=10),
+            snap("single", 1, liquidity=10000),
+            snap("stale", 9, liquidity=10000), snap("stale", 7, liquidity=100),
+            snap("gap", 5, liquidity=None), snap("gap", 1, liquidity=100),
+        ])
+        assert detect_liquidity_drain(ctx) == []
+
+    def test_empty_frame(self):
+        assert detect_liquidity_drain(make_context([])) == []
+
+class TestMomentumPlugin:
+    def test_matches_standalone_detector(self):
+        rows = [snap("m1", 9, price=0.2), snap("m1", 6.5, price=0.5), snap("m1", 0.5, price=0.75),
+                snap("m2", 6, price=0.5), snap("m2", 1, price=0.55)]
+        ctx = make_context(rows)
+
+        db = MagicMock()
+        db.query.return_value.filter.return_value.all.return_value = list(ctx.markets.values())
+        newest_first = sorted([r for r in rows if r.ts >= NOW - timedelta(hours=7)],
+                              key=lambda r: (r.market_id, -r.ts.timestamp()))
+        db.query.return_value.filter.return_value.order_by.return_value.all.return_value = newest_first
+
+        plugin = _price_momentum_detector(ctx)
+        assert plugin == detect_price_momentum(db)
+        assert [s["details"]["earlier_price"] for s in plugin] == [0.5]
+
+class TestRunDetections:
+    @patch("services.pattern_detectors.save_signals", return_value=0)
+    @patch("services.pattern_detectors.resolve_stale_signals", return_value=0)
+    @patch("services.pattern_detectors.run_detectors", return_value=([], ["price_momentum"]))
+    @patch("services.pattern_detectors.SessionLocal")
+    def test_only_completed_types_are_resolved(self, MockSession, run, resolve, save):
+        run_detections()
+        resolve.assert_called_once_with(MockSession.return_value, [], ["price_momentum"])
+
+    @patch("services.pattern_detectors.settings.DETECTOR_BACKEND", "sql")
+    @patch("services.pattern_detectors.save_signals", return_value=0)
+    @patch("services.pattern_detectors.resolve_stale_signals", return_value=0)
+    @patch("services.pattern_detectors.run_detectors", return_value=([], ["liquidity_drain"]))
+    @patch("services.pattern_detectors.detect_signals_sql", return_value=[])
+    @patch("services.pattern_detectors.SessionLocal")
+    def test_sql_backend_runs_remaining_plugins(self, MockSession, sql, run, resolve, save):
+        run_detections()
+        assert run.call_args[0][1] == ["liquidity_drain"]
+        assert resolve.call_args[0][2] == ["volume_spike", "price_momentum", "liquidity_drain"]
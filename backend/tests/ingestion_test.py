@@ -0,0 +1,66 @@
+from unittest.mock import MagicMock
+from services.ingestion import EventBatch, fetch_event_batch
+
+def make_event(**overrides):
+    event = {
+        "tags": [{"label": "politics"}],
+        "liquidity": "2500.5",
+        "markets": [{
+            "id": "m1",
+            "question": "Will it happen?",
+            "closed": False,
+            "volume": "15000.25",
+            "outcomePrices": '["0.62", "0.38"]',
+            "outcomes": '["Yes", "No"]',
+        }],
+    }
+    event.update(overrides)
+    return event
+
+class TestEventBatch:
+    def test_parses_market_fields_once(self):
+        batch = EventBatch(open_events=[make_event()])
+        market = batch.open_markets[0]
+
+        assert market["id"] == "m1"
+        assert market["title"] == "Will it happen?"
+        assert market["category"] == "Politics"
+        assert market["status"] == "open"
+        assert market["volume_value"] == 15000.25
+        assert market["price"] == 0.62
+        assert market["liquidity"] == 2500.5
+        assert batch.closed_markets == []
+
+    def test_missing_fields_are_tolerated(self):
+        event = make_event(tags=[], liquidity=None, markets=[{"id": "m2", "volume": None, "outcomePrices": "oops"}])
+        market = EventBatch(open_events=[event]).open_markets[0]
+
+        assert market["category"] is None
+        assert market["volume_value"] == 0.0
+        assert market["price"] is None
+        assert market["liquidity"] == 0.0
+
+    def test_list_outcome_prices(self):
+        event = make_event(markets=[{"id": "m3", "closed": True, "outcomePrices": [0.9, 0.1]}])
+        market = EventBatch(closed_events=[event]).closed_markets[0]
+
+        assert market["status"] == "closed"
+        assert market["price"] == 0.9
+
+class TestFetchEventBatch:
+    def test_fetches_each_set_once(self):
+        client = MagicMock()
+        client.get_all_events.side_effect = lambda closed: [make_event()] if not closed else []
+
+        batch = fetch_event_batch(client)
+
+        assert client.get_all_events.call_count == 2
+        assert len(batch.open_markets) == 1
+
+    def test_skips_closed_set(self):
+        client = MagicMock()
+        client.get_all_events.return_value = []
+
+        fetch_event_batch(client, include_closed=False)
+
+        client.get_all_events.assert_called_once_with(closed=False)
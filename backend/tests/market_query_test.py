@@ -0,0 +1,142 @@
+import asyncio
+import pytest
+from datetime import datetime, timedelta, timezone
+from difflib import SequenceMatcher
+from unittest.mock import AsyncMock, MagicMock
+from sqlalchemy import create_engine, event, select, text
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import asyncpg
+from models.market import Market
+from services.market_query import list_markets, decode_cursor, encode_cursor, estimate_count
+
+BASE_TS = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+@pytest.fixture
+def db():
+    # sqlite stand-in for the markets table; word_similarity is registered as a plain ratio
+    engine = create_engine("sqlite://")
+
+    @event.listens_for(engine, "connect")
+    def register_functions(conn, _):
+        conn.create_function("word_similarity", 2, lambda a, b: SequenceMatcher(None, a.lower(), b.lower()).ratio())
+
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE markets (id TEXT PRIMARY KEY, title TEXT, category TEXT, status TEXT, volume NUMERIC, "
+            "outcome_prices TEXT, outcomes TEXT, resolution_result TEXT, resolved_at TIMESTAMP, "
+            "created_at TIMESTAMP, updated_at TIMESTAMP)"
+        ))
+        rows = [(f"m{i}", f"Will candidate {i} win the election?", "open", 20000, i % 3) for i in range(7)]
+        rows += [("small", "Will candidate 9 win the election?", "open", 50, 0),
+                 ("done", "Will candidate 8 win the election?", "closed", 20000, 0),
+                 ("odd", "Bitcoin above 100% by June?", "open", 20000, 0),
+                 ("poll", "Candidate poll", "open", 20000, 1)]
+        for market_id, title, status, volume, hours in rows:
+            conn.execute(text(
+                "INSERT INTO markets (id, title, status, volume, updated_at) VALUES (:id, :title, :status, :volume, :updated_at)"
+            ), {"id": market_id, "title": title, "status": status, "volume": volume,
+                "updated_at": (BASE_TS + timedelta(hours=hours)).strftime("%Y-%m-%d %H:%M:%S.%f")})
+
+    with Session(engine) as session:
+        yield SqliteAsyncSession(session)
+
+class SqliteAsyncSession:
+    """The slice of AsyncSession list_markets uses, over the sqlite stand-in."""
+
+    def __init__(self, session):
+        self.session = session
+
+    async def execute(self, statement):
+        return self.session.execute(statement)
+
+def fetch(db, **kwargs):
+    return asyncio.run(list_markets(db, **kwargs))
+
+def walk(db, **kwargs):
+    ids, cursor, pages = [], None, 0
+    while True:
+        page = fetch(db, limit=3, cursor=cursor, **kwargs)
+        ids += [m["id"] for m in page["markets"]]
+        pages += 1
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return ids, pages
+
+class TestKeysetPagination:
+    def test_cursor_walk_matches_offset_order(self, db):
+        everything = [m["id"] for m in fetch(db, limit=100)["markets"]]
+        ids, pages = walk(db)
+
+        assert ids == everything
+        assert len(ids) == 9 and pages == 3
+        assert "small" not in ids and "done" not in ids
+
+    def test_offset_still_supported(self, db):
+        everything = [m["id"] for m in fetch(db, limit=100)["markets"]]
+        page = fetch(db, limit=3, offset=3)
+        assert [m["id"] for m in page["markets"]] == everything[3:6]
+
+    def test_ties_on_updated_at_break_on_id(self, db):
+        ids, _ = walk(db)
+        same_hour = [i for i in ids if i in ("m0", "m3", "m6", "odd")]
+        assert same_hour == ["odd", "m6", "m3", "m0"]
+
+    def test_search_is_ranked_and_pages_by_rank(self, db):
+        ranked = fetch(db, limit=100, search="candidate")
+        assert ranked["markets"][0]["id"] == "poll"
+        assert ranked["total"] == 8
+
+        ids, _ = walk(db, search="candidate")
+        assert ids == [m["id"] for m in ranked["markets"]]
+
+    def test_search_treats_wildcards_literally(self, db):
+        assert [m["id"] for m in fetch(db, search="100%")["markets"]] == ["odd"]
+        assert fetch(db, search="_")["markets"] == []
+
+    def test_count_modes(self, db):
+        assert fetch(db, count="none")["total"] is None
+        assert fetch(db, count="exact")["total"] == 9
+
+    def test_cursor_from_other_mode_is_rejected(self, db):
+        cursor = fetch(db, limit=3)["next_cursor"]
+        with pytest.raises(ValueError):
+            fetch(db, limit=3, cursor=cursor, search="candidate")
+
+class TestCursor:
+    def test_round_trip(self):
+        market = MagicMock(updated_at=BASE_TS, id="m1")
+        assert decode_cursor(encode_cursor(market)) == [BASE_TS, "m1"]
+        assert decode_cursor(encode_cursor(market, 0.75), ranked=True) == [0.75, BASE_TS, "m1"]
+
+    @pytest.mark.parametrize("cursor", ["", "not-base64!", "bnVsbA", "WzFd"])
+    def test_invalid_cursor(self, cursor):
+        with pytest.raises(ValueError):
+            decode_cursor(cursor)
+
+class TestEstimatedCount:
+    def fake_db(self, dialect, plan):
+        fake_db = MagicMock()
+        fake_db.get_bind.return_value.dialect = dialect
+        connection = fake_db.connection = AsyncMock()
+        connection.return_value.exec_driver_sql = AsyncMock()
+        connection.return_value.exec_driver_sql.return_value.scalar = MagicMock(return_value=plan)
+        return fake_db
+
+    def test_reads_planner_estimate(self):
+        fake_db = self.fake_db(postgresql.dialect(), [{"Plan": {"Plan Rows": 1234}}])
+        statement = select(Market).where(Market.status == "open")
+        assert asyncio.run(estimate_count(fake_db, statement)) == 1234
+
+        sql, params = fake_db.connection.return_value.exec_driver_sql.call_args[0]
+        assert sql.startswith("EXPLAIN (FORMAT JSON) SELECT")
+        assert "open" in params.values()
+
+    def test_positional_driver_gets_tuple_params(self):
+        fake_db = self.fake_db(asyncpg.dialect(), '[{"Plan": {"Plan Rows": 5}}]')
+        statement = select(Market).where(Market.status == "open", Market.volume >= 10000)
+        assert asyncio.run(estimate_count(fake_db, statement)) == 5
+
+        sql, params = fake_db.connection.return_value.exec_driver_sql.call_args[0]
+        assert "$1" in sql and "$2" in sql
+        assert params == ("open", 10000)
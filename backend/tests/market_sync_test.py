@@ -0,0 +1,61 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+from sqlalchemy.dialects import postgresql
+from services.market_sync import upsert_markets, _upsert_statement
+
+def make_row(market_id, title="Market"):
+    return {
+        "id": market_id,
+        "title": title,
+        "category": None,
+        "status": "open",
+        "volume": "20000",
+        "outcome_prices": '["0.5", "0.5"]',
+        "outcomes": '["Yes", "No"]',
+    }
+
+def returning(*flags):
+    result = MagicMock()
+    result.fetchall.return_value = [SimpleNamespace(inserted=f) for f in flags]
+    return result
+
+class TestUpsertMarkets:
+    def test_summary_counts(self):
+        db = MagicMock()
+        db.execute.return_value = returning(True, False)
+
+        summary = upsert_markets(db, [make_row("m1"), make_row("m2"), make_row("m3")])
+
+        assert summary == {"inserted": 1, "updated": 1, "unchanged": 1}
+
+    def test_chunks_rows(self):
+        db = MagicMock()
+        db.execute.side_effect = [returning(True, True), returning(True, True), returning(True)]
+
+        summary = upsert_markets(db, [make_row(f"m{i}") for i in range(5)], chunk_size=2)
+
+        assert db.execute.call_count == 3
+        assert summary == {"inserted": 5, "updated": 0, "unchanged": 0}
+
+    def test_duplicate_ids_keep_last_row(self):
+        db = MagicMock()
+        db.execute.return_value = returning(True)
+
+        upsert_markets(db, [make_row("m1", "old"), make_row("m1", "new")])
+
+        params = db.execute.call_args[0][0].compile(dialect=postgresql.dialect()).params
+        assert params["title_m0"] == "new"
+        assert "id_m1" not in params
+
+    def test_empty_rows_skip_database(self):
+        db = MagicMock()
+        assert upsert_markets(db, []) == {"inserted": 0, "updated": 0, "unchanged": 0}
+        db.execute.assert_not_called()
+
+class TestUpsertStatement:
+    def test_only_updates_changed_rows(self):
+        sql = str(_upsert_statement([make_row("m1")]).compile(dialect=postgresql.dialect()))
+
+        assert "ON CONFLICT (id) DO UPDATE" in sql
+        assert "markets.volume IS DISTINCT FROM excluded.volume" in sql
+        assert "xmax = 0 AS inserted" in sql
@@ -0,0 +1,100 @@
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from api.metrics import Counter, Histogram, MetricsMiddleware, Registry, REGISTRY, instrument_engine
+
+def make_app():
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/api/items/{item_id}")
+    def get_item(item_id: str):
+        with engine.connect() as conn:
+            for _ in range(3):
+                conn.execute(text("SELECT 1"))
+        return {"id": item_id}
+
+    @app.get("/api/async/{item_id}")
+    async def get_async_item(item_id: str):
+        return {"id": item_id}
+
+    @app.get("/metrics")
+    def metrics():
+        return PlainTextResponse(REGISTRY.render())
+
+    return TestClient(app)
+
+def sample(body: str, prefix: str) -> float:
+    return sum(float(line.rsplit(" ", 1)[1]) for line in body.splitlines() if line.startswith(prefix))
+
+class TestHistogram:
+    def test_cumulative_buckets(self):
+        histogram = Histogram("h", "help", ("route",), (0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value, "/a")
+
+        lines = histogram.render()
+        assert 'h_bucket{route="/a",le="0.1"} 2' in lines
+        assert 'h_bucket{route="/a",le="1.0"} 3' in lines
+        assert 'h_bucket{route="/a",le="+Inf"} 4' in lines
+        assert 'h_count{route="/a"} 4' in lines
+        assert 'h_sum{route="/a"} 3.65' in lines
+
+    def test_label_escaping_and_unlabelled_counter(self):
+        registry = Registry()
+        counter = registry.register(Counter("c_total", "help", ("path",)))
+        counter.inc('a"b')
+        plain = registry.register(Counter("plain_total", "help"))
+        plain.inc(amount=2)
+
+        body = registry.render()
+        assert 'c_total{path="a\\"b"} 1' in body
+        assert "plain_total 2" in body
+        assert "# TYPE c_total counter" in body
+
+class TestMetricsMiddleware:
+    def test_counts_statements_per_request(self):
+        client = make_app()
+        response = client.get("/api/items/1")
+
+        assert response.headers["x-db-statements"] == "3"
+        assert response.headers["server-timing"].startswith("db;dur=")
+
+    def test_metrics_endpoint_labels_by_route_template(self):
+        client = make_app()
+        before = client.get("/metrics").text
+        client.get("/api/items/1")
+        client.get("/api/items/2")
+        client.get("/api/async/3")
+        client.get("/nope")
+        body = client.get("/metrics").text
+
+        count = 'http_request_duration_seconds_count{method="GET",route="/api/items/{item_id}",status="200"}'
+        assert sample(body, count) - sample(before, count) == 2
+        statements = 'http_request_db_statements_sum{method="GET",route="/api/items/{item_id}"}'
+        assert sample(body, statements) - sample(before, statements) == 6
+        assert 'route="/api/async/{item_id}",status="200"' in body
+        assert 'route="unmatched",status="404"' in body
+        assert 'route="/metrics"' not in body
+
+class TestSlowQueryLog:
+    def test_logs_statements_over_threshold(self, capsys):
+        engine = create_engine("sqlite://")
+        instrument_engine(engine, slow_query_ms=1e-9)
+        before = sample(REGISTRY.render(), "db_slow_queries_total")
+
+        with engine.connect() as conn:
+            conn.execute(text("SELECT   1"))
+
+        assert "Slow query" in capsys.readouterr().out
+        assert sample(REGISTRY.render(), "db_slow_queries_total") == before + 1
+
+    def test_disabled_by_default(self, capsys):
+        engine = create_engine("sqlite://")
+        instrument_engine(engine)
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        assert "Slow query" not in capsys.readouterr().out
@@ -0,0 +1,176 @@
+import json
+import threading
+import time
+import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from services.ingestion import EventBatch
+from services.order_books import book_metrics
+from services.polymarket_service import PolyMarketClient
+from services.snapshots import attach_order_books
+
+def make_book(token_id):
+    return {
+        "asset_id": token_id,
+        "bids": [{"price": "0.40", "size": "999"}, {"price": "0.47", "size": "50"}, {"price": "0.48", "size": "100"}],
+        "asks": [{"price": "0.53", "size": "20"}, {"price": "0.52", "size": "80"}, {"price": "0.60", "size": "500"}],
+    }
+
+class StandInClob:
+    """Local stand-in for the CLOB's POST /books."""
+
+    def __init__(self):
+        self.batches = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        clob = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                token_ids = [item["token_id"] for item in body]
+                with clob.lock:
+                    clob.batches.append(token_ids)
+                    clob.in_flight += 1
+                    clob.max_in_flight = max(clob.max_in_flight, clob.in_flight)
+                try:
+                    time.sleep(0.02)
+                    if any(t.startswith("slow") for t in token_ids):
+                        time.sleep(1.5)
+                    if self.path != "/books" or any(t.startswith("bad") for t in token_ids):
+                        self.send_response(500)
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+                        return
+                    payload = json.dumps([make_book(t) for t in token_ids]).encode()
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                finally:
+                    with clob.lock:
+                        clob.in_flight -= 1
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        # the deadline test hangs up on a slow request mid-response; that broken pipe is expected
+        self.server.handle_error = lambda request, client_address: None
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+@pytest.fixture
+def clob():
+    server = StandInClob()
+    yield server
+    server.close()
+
+@pytest.fixture
+def client(clob):
+    client = PolyMarketClient()
+    client.clob_api = clob.url
+    yield client
+    client.close()
+
+class TestOrderBookFetch:
+    def test_thousands_of_tokens_in_concurrent_batches(self, clob, client):
+        tokens = [f"t{i}" for i in range(3000)]
+        start = time.perf_counter()
+        books = client.get_order_books(tokens, batch_size=100, concurrency=8)
+        elapsed = time.perf_counter() - start
+
+        assert set(books) == set(tokens)
+        assert len(clob.batches) == 30
+        assert all(len(batch) == 100 for batch in clob.batches)
+        assert 1 < clob.max_in_flight <= 8
+        assert elapsed < 5
+
+    def test_duplicate_and_empty_tokens_are_dropped(self, clob, client):
+        books = client.get_order_books(["a", "b", "a", None, ""], batch_size=10)
+        assert set(books) == {"a", "b"}
+        assert clob.batches == [["a", "b"]]
+
+    def test_failed_batch_is_skipped(self, clob, client):
+        books = client.get_order_books(["a", "b", "bad", "c"], batch_size=2)
+        assert set(books) == {"a", "b"}
+        assert len(clob.batches) == 2
+
+    def test_deadline_cancels_slow_batches(self, clob, client):
+        start = time.perf_counter()
+        books = client.get_order_books(["a", "slow"], batch_size=1, concurrency=2, deadline=0.5)
+
+        assert set(books) == {"a"}
+        assert time.perf_counter() - start < 1.5
+
+    def test_no_tokens_makes_no_requests(self, clob, client):
+        assert client.get_order_books([]) == {}
+        assert clob.batches == []
+
+class TestBookMetrics:
+    def test_spread_sizes_and_depth(self):
+        metrics = book_metrics(make_book("t"), depth_cents=2)
+        # mid 0.50, so depth counts bids >= 0.48 and asks <= 0.52
+        assert metrics == {
+            "bid_ask_spread": 0.04,
+            "best_bid_size": 100.0,
+            "best_ask_size": 80.0,
+            "bid_depth": 100.0,
+            "ask_depth": 80.0,
+        }
+
+    def test_wider_window(self):
+        metrics = book_metrics(make_book("t"), depth_cents=3)
+        assert metrics["bid_depth"] == 150.0
+        assert metrics["ask_depth"] == 100.0
+
+    def test_one_sided_book(self):
+        metrics = book_metrics({"bids": [{"price": "0.3", "size": "10"}], "asks": []}, depth_cents=2)
+        assert metrics["best_bid_size"] == 10.0
+        assert metrics["bid_ask_spread"] is None
+        assert metrics["bid_depth"] is None
+
+    def test_malformed_levels_are_ignored(self):
+        book = {"bids": [{"price": "x", "size": "1"}, {"price": "0.5", "size": "0"}, {"price": "0.49", "size": "5"}],
+                "asks": [{"size": "3"}, {"price": "0.51", "size": "7"}]}
+        metrics = book_metrics(book, depth_cents=1)
+        assert metrics["bid_ask_spread"] == 0.02
+        assert metrics["best_bid_size"] == 5.0
+
+class TestAttachOrderBooks:
+    def test_rows_get_book_columns(self, clob):
+        rows = [{"market_id": "m1"}, {"market_id": "m2"}, {"market_id": "m3"}]
+        tokens = {"m1": "t1", "m2": "bad2"}
+
+        with patch("config.settings.POLYMARKET_CLOB_API_URL", clob.url), \
+                patch("config.settings.CLOB_BOOKS_BATCH_SIZE", 1):
+            attached = attach_order_books(rows, tokens)
+
+        assert attached == 1
+        assert rows[0]["bid_ask_spread"] == 0.04
+        assert "bid_ask_spread" not in rows[1]
+        assert "bid_ask_spread" not in rows[2]
+
+    @patch("services.snapshots.load_order_books", side_effect=RuntimeError("clob down"))
+    def test_fetch_failure_leaves_rows_alone(self, load):
+        rows = [{"market_id": "m1"}]
+        assert attach_order_books(rows, {"m1": "t1"}) == 0
+        assert rows == [{"market_id": "m1"}]
+
+class TestTokenIds:
+    def test_first_clob_token(self):
+        batch = EventBatch([{"markets": [
+            {"id": "m1", "clobTokenIds": '["111", "222"]'},
+            {"id": "m2", "clobTokenIds": ["333"]},
+            {"id": "m3"},
+        ]}])
+        assert [m["token_id"] for m in batch.open_markets] == ["111", "333", None]
@@ -112,3 +112,58 @@ class TestPriceMomentum:
         db.query.return_value.filter.return_value.order_by.return_value.first.side_effect = [latest, earlier]
 
         assert detect_price_momentum(db) == []
+
+
+def reference_volume_spikes(snapshots, sigma_threshold=3.0):
+    signals = []
+    by_market = {}
+    for snap in snapshots:
+        by_market.setdefault(snap.market_id, []).append(snap)
+
+    for market_id, snaps in by_market.items():
+        if len(snaps) < 10:
+            continue
+        deltas = [snaps[i].volume - snaps[i - 1].volume for i in range(1, len(snaps))]
+        deltas = [d for d in deltas if d > 0]
+        if len(deltas) < 5:
+            continue
+        avg = sum(deltas) / len(deltas)
+        std = (sum((d - avg) ** 2 for d in deltas) / len(deltas)) ** 0.5
+        if std < 10:
+            continue
+        z = ((snaps[-1].volume - snaps[-2].volume) - avg) / std
+        if z > sigma_threshold:
+            signals.append((market_id, round(min(z / 5.0, 1.0), 2), round(z, 2)))
+    return signals
+
+
+class TestVectorizedDetectors:
+    def test_volume_spikes_match_reference_across_markets(self, db, now):
+        import random
+        rng = random.Random(11)
+        markets = [MockMarket(f"m{i}", f"Market {i}") for i in range(30)]
+        snapshots = []
+        for market in markets:
+            volume = 100000.0
+            for i in range(rng.randint(5, 40)):
+                volume += rng.choice([0.0, rng.uniform(0, 2000), -5.0])
+                snapshots.append(MockSnapshot(now - timedelta(minutes=300 - 5 * i), market.id, volume))
+            if rng.random() < 0.5:
+                snapshots[-1].volume += rng.uniform(5000, 60000)
+
+        db.query.return_value.filter.return_value.all.return_value = markets
+        db.query.return_value.filter.return_value.order_by.return_value.all.return_value = snapshots
+
+        signals = detect_volume_spikes(db)
+
+        assert [(s["market_id"], s["confidence"], s["details"]["z_score"]) for s in signals] == reference_volume_spikes(snapshots)
+        assert signals
+
+    def test_momentum_skips_missing_prices(self, db, market, now):
+        latest = MockSnapshot(now, "m1", 100000, price=None)
+        earlier = MockSnapshot(now - timedelta(hours=7), "m1", 100000, price=0.2)
+
+        db.query.return_value.filter.return_value.all.return_value = [market]
+        db.query.return_value.filter.return_value.order_by.return_value.all.return_value = [latest, earlier]
+
+        assert detect_price_momentum(db) == []
@@ -0,0 +1,62 @@
+import asyncio
+import httpx
+import pytest
+from services.polymarket_service import PolyMarketClient
+
+def make_transport(total_events, seen_offsets):
+    def handler(request):
+        limit = int(request.url.params["limit"])
+        offset = int(request.url.params["offset"])
+        seen_offsets.append(offset)
+        events = [{"id": str(i)} for i in range(offset, min(offset + limit, total_events))]
+        return httpx.Response(200, json=events)
+    return httpx.MockTransport(handler)
+
+class TestEventPagination:
+    def test_crawls_every_page(self):
+        offsets = []
+        client = PolyMarketClient(transport=make_transport(250, offsets))
+        events = client.get_all_events(page_size=100, concurrency=2)
+        client.close()
+
+        assert len(events) == 250
+        assert sorted(int(e["id"]) for e in events) == list(range(250))
+        assert sorted(offsets) == [0, 100, 200, 300]
+
+    def test_stops_after_empty_page(self):
+        offsets = []
+        client = PolyMarketClient(transport=make_transport(200, offsets))
+        events = client.get_all_events(page_size=100, concurrency=4)
+        client.close()
+
+        assert len(events) == 200
+        assert sorted(offsets) == [0, 100, 200, 300]
+
+    def test_max_pages_caps_crawl(self):
+        offsets = []
+        client = PolyMarketClient(transport=make_transport(1000, offsets))
+        events = client.get_all_events(page_size=100, concurrency=4, max_pages=3)
+        client.close()
+
+        assert len(events) == 300
+        assert sorted(offsets) == [0, 100, 200]
+
+    def test_streams_pages(self):
+        client = PolyMarketClient(transport=make_transport(150, []))
+
+        async def collect():
+            pages = []
+            async with client._async_client() as aclient:
+                async for page in client.iter_event_pages(aclient, page_size=100, concurrency=1):
+                    pages.append(len(page))
+            return pages
+
+        assert asyncio.run(collect()) == [100, 50]
+        client.close()
+
+    def test_http_error_propagates(self):
+        transport = httpx.MockTransport(lambda request: httpx.Response(500))
+        client = PolyMarketClient(transport=transport)
+        with pytest.raises(httpx.HTTPStatusError):
+            client.get_all_events()
+        client.close()
@@ -0,0 +1,144 @@
+from unittest.mock import MagicMock, patch
+from fastapi import FastAPI
+from sqlalchemy.dialects import postgresql
+from fastapi.testclient import TestClient
+from api.cache import ResponseCache, ResponseCacheMiddleware, VersionPoller, cache_key, etag_matches
+from services.data_version import bump_data_version
+
+def make_app(version, paths=("/api/markets",), **kwargs):
+    calls = []
+    app = FastAPI()
+    app.add_middleware(ResponseCacheMiddleware, paths=paths, read_version=lambda: version["value"],
+                       version_poll_seconds=0, **kwargs)
+
+    @app.get("/api/markets")
+    def markets(limit: int = 20):
+        calls.append(limit)
+        return {"markets": [], "limit": limit, "version": version["value"]}
+
+    @app.get("/api/other")
+    def other():
+        calls.append("other")
+        return {"ok": True}
+
+    return TestClient(app), calls
+
+class TestResponseCache:
+    def test_lru_eviction(self):
+        cache = ResponseCache(max_entries=2)
+        cache.set("a", b"1", None, 1)
+        cache.set("b", b"2", None, 1)
+        cache.get("a", 1)
+        cache.set("c", b"3", None, 1)
+
+        assert cache.get("a", 1) is not None
+        assert cache.get("b", 1) is None
+        assert len(cache) == 2
+
+    def test_ttl_expiry(self):
+        cache = ResponseCache(ttl_seconds=10)
+        with patch("api.cache.time.monotonic", return_value=100.0):
+            cache.set("a", b"1", None, 1)
+        with patch("api.cache.time.monotonic", return_value=109.0):
+            assert cache.get("a", 1) is not None
+        with patch("api.cache.time.monotonic", return_value=111.0):
+            assert cache.get("a", 1) is None
+
+    def test_version_change_is_a_miss(self):
+        cache = ResponseCache()
+        cache.set("a", b"1", None, 1)
+        assert cache.get("a", 2) is None
+        assert cache.get("a", 1) is None
+
+    def test_etag_depends_only_on_body(self):
+        cache = ResponseCache()
+        assert cache.set("a", b"same", None, 1).etag == cache.set("b", b"same", None, 2).etag
+        assert cache.set("c", b"other", None, 1).etag != cache.get("a", 1).etag
+
+    def test_etag_matching(self):
+        assert etag_matches('"x"', '"x"')
+        assert etag_matches('W/"x", "y"', '"x"')
+        assert etag_matches("*", '"x"')
+        assert not etag_matches('"y"', '"x"')
+        assert not etag_matches(None, '"x"')
+
+    def test_version_poller_throttles_reads(self):
+        read_version = MagicMock(return_value=3)
+        poller = VersionPoller(read_version, interval=60)
+        assert poller.current() == 3
+        assert poller.current() == 3
+        read_version.assert_called_once()
+
+class TestResponseCacheMiddleware:
+    def test_repeat_requests_are_served_from_cache(self):
+        client, calls = make_app({"value": 1})
+
+        first = client.get("/api/markets?limit=5")
+        second = client.get("/api/markets?limit=5")
+
+        assert calls == [5]
+        assert first.headers["x-cache"] == "MISS"
+        assert second.headers["x-cache"] == "HIT"
+        assert second.json() == first.json()
+        assert second.headers["etag"] == first.headers["etag"]
+        assert second.headers["content-type"] == "application/json"
+
+    def test_query_params_are_part_of_the_key(self):
+        client, calls = make_app({"value": 1})
+        client.get("/api/markets?limit=5")
+        client.get("/api/markets?limit=6")
+        assert calls == [5, 6]
+
+    def test_if_none_match_returns_304(self):
+        client, calls = make_app({"value": 1})
+        etag = client.get("/api/markets").headers["etag"]
+
+        response = client.get("/api/markets", headers={"If-None-Match": etag})
+
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+        assert len(calls) == 1
+
+    def test_new_data_version_invalidates(self):
+        version = {"value": 1}
+        client, calls = make_app(version)
+        etag = client.get("/api/markets").headers["etag"]
+
+        version["value"] = 2
+        response = client.get("/api/markets", headers={"If-None-Match": etag})
+
+        assert response.status_code == 200
+        assert response.json()["version"] == 2
+        assert response.headers["etag"] != etag
+        assert len(calls) == 2
+
+    def test_uncached_paths_and_unknown_version_pass_through(self):
+        client, calls = make_app({"value": 1})
+        client.get("/api/other")
+        response = client.get("/api/other")
+        assert "etag" not in response.headers
+        assert calls == ["other", "other"]
+
+        client, calls = make_app({"value": None})
+        client.get("/api/markets")
+        client.get("/api/markets")
+        assert calls == [20, 20]
+
+    def test_cache_key_sorts_params(self):
+        request = MagicMock()
+        request.url.path = "/api/markets"
+        request.query_params.multi_items.return_value = [("offset", "0"), ("limit", "5")]
+        assert cache_key(request) == "/api/markets?limit=5&offset=0"
+
+class TestDataVersion:
+    def test_bump_is_one_upsert(self):
+        db = MagicMock()
+        db.execute.return_value.scalar_one.return_value = 7
+
+        assert bump_data_version(db) == 7
+        db.execute.assert_called_once()
+        sql = str(db.execute.call_args[0][0].compile(dialect=postgresql.dialect()))
+        assert "ON CONFLICT (id) DO UPDATE" in sql
+        assert "RETURNING collector_state.data_version" in sql
+        db.commit.assert_not_called()
@@ -0,0 +1,105 @@
+import random
+import pytest
+from datetime import datetime, timezone, timedelta
+from unittest.mock import MagicMock
+from models.market import MarketVolumeStats
+from services.rolling_stats import _push, _expire, _reset
+from services.pattern_detectors import detect_volume_spikes, _volume_spike_signal
+
+class MockMarket:
+    def __init__(self, id, title, status="open", volume="100000"):
+        self.id = id
+        self.title = title
+        self.status = status
+        self.volume = volume
+
+class MockSnapshot:
+    def __init__(self, ts, market_id, volume, price=0.5):
+        self.ts = ts
+        self.market_id = market_id
+        self.volume = volume
+        self.price = price
+
+@pytest.fixture
+def start():
+    return datetime(2026, 3, 1, tzinfo=timezone.utc)
+
+def new_state():
+    state = MarketVolumeStats(market_id="m1")
+    _reset(state)
+    state.last_ts = None
+    state.last_volume = None
+    return state
+
+def batch_stats(rows):
+    deltas = [b - a for (_, a), (_, b) in zip(rows, rows[1:])]
+    positive = [d for d in deltas if d > 0]
+    mean = sum(positive) / len(positive) if positive else 0.0
+    m2 = sum((d - mean) ** 2 for d in positive)
+    return len(rows), len(positive), mean, m2, deltas[-1] if deltas else None
+
+def slide(state, history, window_start):
+    expired = [row for row in history if state.first_ts <= row[0] < window_start]
+    successor = next((row for row in history if row[0] >= window_start), None)
+    _expire(state, expired, successor)
+
+class TestRollingVolumeStats:
+    def test_matches_full_recompute_every_cycle(self, start):
+        rng = random.Random(7)
+        window = timedelta(hours=6)
+        history = []
+        volume = 100000.0
+        state = new_state()
+
+        for i in range(400):
+            ts = start + timedelta(minutes=5 * i)
+            volume += rng.choice([0, 0, rng.uniform(0, 500), rng.uniform(0, 5000), -rng.uniform(0, 50)])
+            history.append((ts, volume))
+
+            _push(state, ts, volume)
+            slide(state, history, ts - window)
+
+            in_window = [row for row in history if row[0] >= ts - window]
+            count, n, mean, m2, last_delta = batch_stats(in_window)
+            assert state.snapshot_count == count
+            assert state.delta_count == n
+            assert state.delta_mean == pytest.approx(mean, rel=1e-9, abs=1e-6)
+            assert state.delta_m2 == pytest.approx(m2, rel=1e-6, abs=1e-3)
+            assert state.last_delta == (pytest.approx(last_delta) if last_delta is not None else None)
+            assert state.first_ts == in_window[0][0]
+
+    def test_window_gap_resets_state(self, start):
+        state = new_state()
+        history = [(start + timedelta(minutes=5 * i), 1000.0 * i) for i in range(5)]
+        for ts, volume in history:
+            _push(state, ts, volume)
+
+        slide(state, history, start + timedelta(days=1))
+
+        assert state.snapshot_count == 0
+        assert state.delta_count == 0
+        assert state.first_ts is None
+
+class TestIncrementalSpikeSignal:
+    def test_matches_batch_detector(self, start):
+        snapshots = []
+        volume = 100000
+        for i in range(15):
+            snapshots.append(MockSnapshot(start + timedelta(hours=i), "m1", volume))
+            volume += 1000
+        snapshots.append(MockSnapshot(start + timedelta(hours=15), "m1", volume + 50000))
+
+        db = MagicMock()
+        db.query.return_value.filter.return_value.all.return_value = [MockMarket("m1", "Test Market")]
+        db.query.return_value.filter.return_value.order_by.return_value.all.return_value = snapshots
+        expected = detect_volume_spikes(db)
+
+        state = new_state()
+        for snap in snapshots:
+            _push(state, snap.ts, snap.volume)
+
+        assert [_volume_spike_signal(state, "Test Market", 3.0)] == expected
+
+    def test_no_signal_without_latest_delta(self):
+        state = new_state()
+        assert _volume_spike_signal(state, "Test Market", 3.0) is None
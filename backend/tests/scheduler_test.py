@@ -0,0 +1,180 @@
+import asyncio
+import threading
+import time
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from api.routes.collector import router as collector_router
+from database import get_async_db
+from services.collector_runs import record_error, span
+from services.data_version import get_schedule
+from services.scheduler import Job, Scheduler
+from services.snapshots import StageFailed, collector_jobs, market_sync_stage, recorded, resolution_sync_stage
+
+def run_for(jobs, seconds, on_change=None):
+    async def main():
+        scheduler = Scheduler(jobs, on_change=on_change)
+        task = asyncio.create_task(scheduler.run())
+        await asyncio.sleep(seconds)
+        scheduler.stop()
+        await task
+        return scheduler
+    return asyncio.run(main())
+
+class TestBoundaries:
+    def test_next_boundary_is_aligned_and_strict(self):
+        job = Job("x", None, every=300, offset=120)
+        assert job.next_boundary(1000) == 1020
+        assert job.next_boundary(1020) == 1320
+        assert job.next_boundary(1019.9) == 1020
+
+class TestScheduler:
+    def test_runs_on_boundaries_without_drift(self):
+        starts = []
+
+        def work():
+            starts.append(time.time())
+            time.sleep(0.06)
+
+        run_for([Job("work", work, every=0.2)], 1.3)
+
+        assert len(starts) >= 5
+        # each start sits just after a 0.2s boundary, however long the work took
+        assert all((t % 0.2) < 0.05 or (t % 0.2) > 0.19 for t in starts)
+        gaps = [b - a for a, b in zip(starts, starts[1:])]
+        assert all(abs(gap - 0.2) < 0.05 for gap in gaps)
+
+    def test_overlapping_runs_are_skipped(self):
+        active, peak = [0], [0]
+        lock = threading.Lock()
+
+        def slow():
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.35)
+            with lock:
+                active[0] -= 1
+
+        job = Job("slow", slow, every=0.1)
+        run_for([job], 0.9)
+
+        assert peak[0] == 1
+        assert job.skipped >= 3
+        assert job.runs >= 2
+
+    def test_deadline_marks_timeout_and_blocks_overlap(self):
+        job = Job("stuck", lambda: time.sleep(0.3), every=0.1, deadline=0.05)
+        scheduler = run_for([job], 0.5)
+
+        assert job.last_status == "timeout"
+        assert "0.05s" in job.last_error
+        assert job.skipped >= 1
+        assert scheduler.state()[0]["last_status"] == "timeout"
+
+    def test_errors_are_recorded_and_cadence_continues(self):
+        def broken():
+            raise RuntimeError("gamma down")
+
+        job = Job("broken", broken, every=0.1)
+        run_for([job], 0.45)
+
+        assert job.runs >= 3
+        assert job.last_status == "error"
+        assert job.last_error == "RuntimeError: gamma down"
+        assert job.last_duration_ms is not None
+
+    def test_jitter_delays_run_without_moving_boundaries(self):
+        job = Job("jittery", lambda: None, every=0.2, jitter=0.05)
+        with patch("services.scheduler.random.uniform", return_value=0.04):
+            run_for([job], 0.3)
+        next_run = job.next_run - 0.04
+        assert abs(next_run / 0.2 - round(next_run / 0.2)) < 1e-6
+
+    def test_run_at_start_and_published_state(self):
+        published = []
+        job = Job("sync", lambda: None, every=3600, run_at_start=True)
+        run_for([job], 0.2, on_change=published.append)
+
+        assert job.runs == 1
+        state = published[-1][0]
+        assert state["name"] == "sync"
+        assert state["last_status"] == "ok"
+        assert state["running"] is False
+        assert state["next_run"].endswith("+00:00")
+        assert state["last_duration_ms"] >= 0
+
+class TestCollectorJobs:
+    def test_every_stage_is_scheduled(self):
+        jobs = {job.name: job for job in collector_jobs()}
+        assert set(jobs) == {"snapshots", "detection", "market_sync", "resolution_sync", "cleanup"}
+        assert jobs["detection"].offset > 0
+        assert all(job.deadline < job.every for job in jobs.values())
+
+    @patch("services.collector_runs.SessionLocal")
+    def test_recorded_stage_failure_is_saved(self, MockSession):
+        def stage():
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            recorded("sync_markets", stage, full_sync=True)()
+
+        saved = MockSession.return_value.add.call_args[0][0]
+        assert saved.status == "error"
+        assert saved.full_sync is True
+        assert saved.stages[0]["name"] == "sync_markets"
+
+    @patch("services.collector_runs.SessionLocal")
+    def test_swallowed_stage_error_fails_the_job(self, MockSession):
+        def stage():
+            # how the sync stages handle their own failures
+            print("Error syncing markets: gamma down")
+            record_error("Error syncing markets: gamma down")
+
+        job = Job("market_sync", recorded("sync_markets", stage), every=0.1)
+        run_for([job], 0.25)
+
+        assert job.last_status == "error"
+        assert job.last_error == "StageFailed: Error syncing markets: gamma down"
+        saved = MockSession.return_value.add.call_args[0][0]
+        assert saved.status == "error"
+        assert saved.error == "Error syncing markets: gamma down"
+
+    @patch("services.collector_runs.SessionLocal")
+    def test_failed_span_fails_the_stage(self, MockSession):
+        def stage():
+            try:
+                with span("snapshots.write"):
+                    raise ValueError("bad row")
+            except ValueError:
+                pass
+
+        with pytest.raises(StageFailed, match="snapshots.write: ValueError: bad row"):
+            recorded("snapshots", stage)()
+
+    @patch("services.snapshots.sync_resolved_market")
+    @patch("services.snapshots.sync_markets")
+    @patch("services.snapshots.load_event_batch")
+    def test_sync_stages_fetch_only_what_they_use(self, load, sync_markets, sync_resolved):
+        market_sync_stage()
+        resolution_sync_stage()
+        assert [c.kwargs for c in load.call_args_list] == [{"include_closed": False}, {"include_open": False}]
+
+class TestScheduleRoute:
+    def test_returns_published_schedule(self):
+        schedule = [{"name": "snapshots", "next_run": "2026-03-01T12:05:00+00:00", "last_duration_ms": 812.4}]
+
+        session = MagicMock()
+        session.execute = AsyncMock()
+        session.execute.return_value.scalar = MagicMock(return_value=schedule)
+        app = FastAPI()
+        app.include_router(collector_router, prefix="/api")
+        app.dependency_overrides[get_async_db] = lambda: session
+        assert TestClient(app).get("/api/collector/schedule").json() == schedule
+
+    def test_empty_before_first_publish(self):
+        db = MagicMock()
+        db.execute = AsyncMock()
+        db.execute.return_value.scalar = MagicMock(return_value=None)
+        assert asyncio.run(get_schedule(db)) == []
@@ -0,0 +1,76 @@
+import json
+import uuid
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+from sqlalchemy.dialects import postgresql
+from services.pattern_detectors import save_signals, resolve_stale_signals
+
+NEW_ID = uuid.uuid4()
+
+def make_signal(market_id, signal_type="volume_spike", confidence=0.8):
+    return {
+        "market_id": market_id,
+        "title": "Test Market",
+        "signal_type": signal_type,
+        "confidence": confidence,
+        "details": {"z_score": 4.0},
+    }
+
+class TestSaveSignals:
+    def test_single_upsert_counts_new_and_updated(self):
+        db = MagicMock()
+        db.execute.return_value.fetchall.return_value = [SimpleNamespace(id=NEW_ID, inserted=True),
+                                                         SimpleNamespace(id=uuid.uuid4(), inserted=False)]
+
+        new_count = save_signals(db, [make_signal("m1"), make_signal("m2", "price_momentum")])
+
+        assert new_count == 1
+        db.commit.assert_called_once()
+
+        upsert, notify = db.execute.call_args_list
+        sql = str(upsert[0][0].compile(dialect=postgresql.dialect()))
+        assert "ON CONFLICT (market_id, signal_type) WHERE status = %(status_1)s DO UPDATE" in sql
+        assert "detected_at" not in sql.split("DO UPDATE")[1]
+        assert "RETURNING signals.id" in sql
+
+        # only the inserted signal is announced, inside the same transaction
+        assert "pg_notify" in str(notify[0][0])
+        assert json.loads(notify[0][1]["payload"]) == [str(NEW_ID)]
+
+    def test_refresh_only_sends_no_notify(self):
+        db = MagicMock()
+        db.execute.return_value.fetchall.return_value = [SimpleNamespace(id=NEW_ID, inserted=False)]
+
+        assert save_signals(db, [make_signal("m1")]) == 0
+        db.execute.assert_called_once()
+
+    def test_duplicate_signals_collapse_to_last(self):
+        db = MagicMock()
+        db.execute.return_value.fetchall.return_value = [SimpleNamespace(id=NEW_ID, inserted=True)]
+
+        save_signals(db, [make_signal("m1", confidence=0.4), make_signal("m1", confidence=0.9)])
+
+        params = db.execute.call_args_list[0][0][0].compile(dialect=postgresql.dialect()).params
+        assert params["confidence_m0"] == 0.9
+        assert "confidence_m1" not in params
+
+    def test_no_signals_still_commits(self):
+        db = MagicMock()
+        assert save_signals(db, []) == 0
+        db.execute.assert_not_called()
+        db.commit.assert_called_once()
+
+class TestResolveStaleSignals:
+    def test_one_statement_for_all_types(self):
+        db = MagicMock()
+        db.execute.return_value.rowcount = 3
+
+        resolved = resolve_stale_signals(db, [make_signal("m1"), make_signal("m2", "price_momentum")],
+                                         ["volume_spike", "price_momentum"])
+
+        assert resolved == 3
+        db.execute.assert_called_once()
+        params = db.execute.call_args[0][1]
+        assert params["market_ids"] == ["m1", "m2"]
+        assert params["active_types"] == ["volume_spike", "price_momentum"]
+        assert params["signal_types"] == ["volume_spike", "price_momentum"]
@@ -0,0 +1,194 @@
+import asyncio
+import json
+import uuid
+from unittest.mock import MagicMock, patch
+from api.routes.signals import stream_signals
+from api.signal_stream import SignalHub, format_event, signal_events
+from services.signal_events import SIGNALS_CHANNEL, notify_new_signals, parse_notification
+
+def make_event(signal_type="volume_spike"):
+    return {"id": str(uuid.uuid4()), "market_id": "m1", "title": "Test Market", "signal_type": signal_type,
+            "confidence": 0.8, "detected_at": "2026-03-01T12:00:00+00:00", "metadata": {}}
+
+class FakeDriver:
+    def __init__(self, fail_keepalive=False):
+        self.listeners = {}
+        self.fail_keepalive = fail_keepalive
+
+    async def add_listener(self, channel, callback):
+        self.listeners[channel] = callback
+
+    async def remove_listener(self, channel, callback):
+        self.listeners.pop(channel, None)
+
+    async def execute(self, sql):
+        if self.fail_keepalive:
+            raise ConnectionError("server closed the connection")
+
+    def notify(self, payload):
+        self.listeners[SIGNALS_CHANNEL](self, 1, SIGNALS_CHANNEL, payload)
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+        self.invalidated = False
+
+    async def close(self):
+        self.closed = True
+
+    async def invalidate(self):
+        self.invalidated = True
+
+class FakeDatabase:
+    def __init__(self, events, fail_keepalive=False):
+        self.events = events
+        self.fail_keepalive = fail_keepalive
+        self.drivers = []
+        self.connections = []
+        self.loads = []
+
+    async def connect(self):
+        self.drivers.append(FakeDriver(self.fail_keepalive))
+        self.connections.append(FakeConnection())
+        return self.connections[-1], self.drivers[-1]
+
+    async def load(self, signal_ids):
+        self.loads.append(signal_ids)
+        return self.events
+
+def make_hub(database, **kwargs):
+    return SignalHub(connect=database.connect, load=database.load, **kwargs)
+
+def payload(*ids):
+    return json.dumps([str(i) for i in ids])
+
+class TestSignalHub:
+    def test_one_listener_and_one_load_for_many_subscribers(self):
+        events = [make_event(), make_event("price_momentum")]
+        database = FakeDatabase(events)
+
+        async def main():
+            hub = make_hub(database)
+            queues = [hub.subscribe() for _ in range(50)]
+            await asyncio.wait_for(hub.listening.wait(), 1)
+            database.drivers[0].notify(payload(uuid.uuid4(), uuid.uuid4()))
+            received = [[await q.get(), await q.get()] for q in queues]
+            await hub.stop()
+            return received, queues
+
+        received, queues = asyncio.run(main())
+        assert len(database.drivers) == 1
+        assert len(database.loads) == 1
+        assert all(r == events for r in received)
+        # stopping the hub ends every stream
+        assert all(q.get_nowait() is None for q in queues)
+        assert database.connections[0].closed
+
+    def test_slow_subscriber_is_dropped(self):
+        hub = make_hub(FakeDatabase([]), queue_size=2)
+
+        async def main():
+            slow, fast = hub.subscribe(), hub.subscribe()
+            for _ in range(2):
+                hub.publish(make_event())
+            fast.get_nowait(), fast.get_nowait()
+            hub.publish(make_event())
+            await hub.stop()
+            return slow, fast
+
+        slow, fast = asyncio.run(main())
+        assert slow not in hub.subscribers
+        assert slow.get_nowait() is None and slow.empty()
+
+    def test_bad_payloads_are_ignored(self):
+        database = FakeDatabase([make_event()])
+
+        async def main():
+            hub = make_hub(database)
+            queue = hub.subscribe()
+            await asyncio.wait_for(hub.listening.wait(), 1)
+            for bad in ("not json", '{"id": 1}', '["not-a-uuid"]'):
+                database.drivers[0].notify(bad)
+            database.drivers[0].notify(payload(uuid.uuid4()))
+            event = await asyncio.wait_for(queue.get(), 1)
+            await hub.stop()
+            return event
+
+        assert asyncio.run(main())["market_id"] == "m1"
+        assert len(database.loads) == 1
+
+    def test_listener_reconnects_after_dead_connection(self):
+        database = FakeDatabase([], fail_keepalive=True)
+
+        async def main():
+            hub = make_hub(database, keepalive_seconds=0.01, reconnect_seconds=0.01)
+            hub.subscribe()
+            while len(database.drivers) < 3:
+                await asyncio.sleep(0.01)
+            await hub.stop()
+
+        asyncio.run(main())
+        assert all(conn.invalidated for conn in database.connections[:2])
+
+class TestSignalEvents:
+    def test_frames_filter_and_heartbeat(self):
+        hub = make_hub(FakeDatabase([]))
+        spike, momentum = make_event(), make_event("price_momentum")
+
+        async def main():
+            stream = signal_events(hub, signal_type="volume_spike", heartbeat_seconds=0.05)
+            frames = [await anext(stream)]
+            queue = next(iter(hub.subscribers))
+            queue.put_nowait(momentum)
+            queue.put_nowait(spike)
+            frames.append(await anext(stream))
+            frames.append(await anext(stream))
+            queue.put_nowait(None)
+            frames += [frame async for frame in stream]
+            await hub.stop()
+            return frames
+
+        frames = asyncio.run(main())
+        assert frames == ["retry: 5000\n\n", format_event(spike), ": keep-alive\n\n"]
+        assert not hub.subscribers
+
+    def test_format(self):
+        event = make_event()
+        frame = format_event(event)
+        assert frame.startswith(f"id: {event['id']}\nevent: signal\ndata: ")
+        assert json.loads(frame.split("data: ")[1]) == event
+        assert frame.endswith("\n\n")
+
+    def test_route_streams_from_hub(self):
+        hub = make_hub(FakeDatabase([]))
+
+        async def main():
+            with patch("api.routes.signals.signal_hub", hub):
+                response = await stream_signals(signal_type=None)
+                first = await anext(response.body_iterator)
+                await response.body_iterator.aclose()
+            await hub.stop()
+            return response, first
+
+        response, first = asyncio.run(main())
+        assert response.media_type == "text/event-stream"
+        assert response.headers["cache-control"] == "no-cache"
+        assert first == "retry: 5000\n\n"
+        assert not hub.subscribers
+
+class TestNotify:
+    def test_chunks_ids_under_payload_limit(self):
+        db = MagicMock()
+        ids = [uuid.uuid4() for _ in range(320)]
+
+        assert notify_new_signals(db, ids) == 320
+
+        payloads = [call[0][1]["payload"] for call in db.execute.call_args_list]
+        assert [len(json.loads(p)) for p in payloads] == [150, 150, 20]
+        assert all(len(p) < 8000 for p in payloads)
+        assert parse_notification(payloads[2]) == ids[300:]
+
+    def test_nothing_new_sends_nothing(self):
+        db = MagicMock()
+        assert notify_new_signals(db, []) == 0
+        db.execute.assert_not_called()
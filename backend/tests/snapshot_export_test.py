@@ -0,0 +1,121 @@
+import asyncio
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import patch
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.dialects import postgresql
+from api.routes.snapshots import router as snapshot_router
+from services.snapshot_export import export_statement, format_csv, format_ndjson, stream_snapshots
+
+TS = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+
+def snapshot(market_id="m1", price=Decimal("0.4321"), spread=None):
+    return SimpleNamespace(ts=TS, market_id=market_id, price=price, volume=Decimal("1234.50"),
+                           liquidity=Decimal("99.00"), bid_ask_spread=spread, best_bid_size=Decimal("150.00"),
+                           best_ask_size=None, bid_depth=Decimal("400.00"), ask_depth=None)
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+        self.partition_sizes = []
+
+    async def partitions(self, size):
+        self.partition_sizes.append(size)
+        for i in range(0, len(self.rows), size):
+            yield self.rows[i:i + size]
+
+class FakeSession:
+    def __init__(self, rows):
+        self.result = FakeResult(rows)
+        self.statement = None
+        self.closed = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.closed = True
+
+    async def stream(self, statement):
+        self.statement = statement
+        return self.result
+
+def collect(gen) -> list[bytes]:
+    async def run():
+        return [chunk async for chunk in gen]
+    return asyncio.run(run())
+
+class TestFormatting:
+    def test_ndjson(self):
+        lines = format_ndjson([snapshot(), snapshot("m2", price=None)]).decode().splitlines()
+        assert json.loads(lines[0]) == {
+            "ts": "2026-03-01T12:00:00+00:00", "market_id": "m1", "price": 0.4321,
+            "volume": 1234.5, "liquidity": 99.0, "bid_ask_spread": None,
+            "best_bid_size": 150.0, "best_ask_size": None, "bid_depth": 400.0, "ask_depth": None,
+        }
+        assert json.loads(lines[1])["price"] is None
+        assert format_ndjson([]) == b""
+
+    def test_csv_keeps_exact_decimals(self):
+        body = format_csv([snapshot(spread=Decimal("0.0100"))], header=True).decode()
+        assert body == (
+            "ts,market_id,price,volume,liquidity,bid_ask_spread,best_bid_size,best_ask_size,bid_depth,ask_depth\n"
+            "2026-03-01T12:00:00+00:00,m1,0.4321,1234.50,99.00,0.0100,150.00,,400.00,\n"
+        )
+
+class TestExportStatement:
+    def test_filters_and_streams(self):
+        stmt = export_statement(["m1", "m2"], start=TS, end=TS, yield_per=100)
+        sql = str(stmt.compile(dialect=postgresql.dialect()))
+
+        assert "market_snapshots.market_id IN" in sql
+        assert "market_snapshots.ts >= " in sql and "market_snapshots.ts < " in sql
+        assert "ORDER BY market_snapshots.market_id DESC, market_snapshots.ts ASC" in sql
+        assert stmt.get_execution_options()["yield_per"] == 100
+
+    def test_open_range(self):
+        sql = str(export_statement(["m1"]).compile(dialect=postgresql.dialect()))
+        assert "market_snapshots.ts" not in sql.split("WHERE")[1].split("ORDER BY")[0]
+
+class TestStreamSnapshots:
+    def test_one_chunk_per_partition(self):
+        session = FakeSession([snapshot(f"m{i}") for i in range(5)])
+        chunks = collect(stream_snapshots(lambda: session, ["m1"], fmt="ndjson", chunk_rows=2))
+
+        assert len(chunks) == 3
+        assert sum(chunk.count(b"\n") for chunk in chunks) == 5
+        assert session.result.partition_sizes == [2]
+        assert session.closed
+
+    def test_csv_header_first(self):
+        session = FakeSession([snapshot()])
+        chunks = collect(stream_snapshots(lambda: session, ["m1"], fmt="csv"))
+        assert chunks[0].startswith(b"ts,market_id")
+        assert b"".join(chunks).count(b"\n") == 2
+
+class TestExportRoute:
+    def make_client(self):
+        app = FastAPI()
+        app.include_router(snapshot_router, prefix="/api")
+        return TestClient(app)
+
+    def test_streams_csv(self):
+        session = FakeSession([snapshot("m1"), snapshot("m2")])
+        with patch("api.routes.snapshots.AsyncSessionLocal", lambda: session):
+            response = self.make_client().get("/api/snapshots/export?market_ids=m1,m2,m1&format=csv")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        assert 'filename="snapshots.csv"' in response.headers["content-disposition"]
+        assert response.text.count("\n") == 3
+        params = session.statement.compile().params
+        assert ["m1", "m2"] in params.values()
+
+    def test_rejects_bad_ranges(self):
+        client = self.make_client()
+        assert client.get("/api/snapshots/export?market_ids=,").status_code == 422
+        response = client.get("/api/snapshots/export?market_ids=m1&start=2026-03-02T00:00:00Z&end=2026-03-01T00:00:00Z")
+        assert response.status_code == 422
@@ -0,0 +1,46 @@
+import asyncio
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+from services.snapshot_history import get_snapshot_history, pick_resolution
+
+class TestPickResolution:
+    def test_short_ranges_use_raw_rows(self):
+        assert pick_resolution(1) == "raw"
+
+    def test_default_window_uses_hourly_rollup(self):
+        assert pick_resolution(5) == "1h"
+
+    def test_long_ranges_use_daily_rollup(self):
+        assert pick_resolution(60) == "1d"
+
+class TestSnapshotHistory:
+    def make_db(self, rows):
+        db = MagicMock()
+        db.execute = AsyncMock()
+        db.execute.return_value.all = MagicMock(return_value=rows)
+        return db
+
+    def test_rollup_reads_continuous_aggregate(self):
+        bucket = datetime(2026, 3, 1, tzinfo=timezone.utc)
+        db = self.make_db([SimpleNamespace(
+            bucket=bucket, open=0.4, high=0.6, low=0.3, close=0.5,
+            volume=20000, volume_change=150, liquidity=900, samples=12,
+        )])
+
+        history = asyncio.run(get_snapshot_history(db, "m1", days=30))
+
+        assert "FROM market_snapshots_1d" in str(db.execute.call_args[0][0])
+        assert history[0]["timestamp"] == bucket
+        assert history[0]["price"] == 0.5
+        assert history[0]["high"] == 0.6
+
+    def test_raw_resolution_reads_snapshots(self):
+        ts = datetime(2026, 3, 1, tzinfo=timezone.utc)
+        db = self.make_db([SimpleNamespace(ts=ts, price=0.5, volume=20000, liquidity=900)])
+
+        history = asyncio.run(get_snapshot_history(db, "m1", days=5, resolution="raw"))
+
+        sql = str(db.execute.call_args[0][0])
+        assert "FROM market_snapshots" in sql and "market_snapshots_1" not in sql
+        assert history == [{"timestamp": ts, "price": 0.5, "volume": 20000, "liquidity": 900}]
@@ -0,0 +1,68 @@
+import csv
+import pytest
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+from services.snapshot_writer import write_snapshots, _to_csv
+
+@pytest.fixture
+def now():
+    return datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+
+@pytest.fixture
+def cursor():
+    cursor = MagicMock()
+    cursor.rowcount = 2
+    return cursor
+
+@pytest.fixture
+def db(cursor):
+    db = MagicMock()
+    db.connection.return_value.connection.dbapi_connection.cursor.return_value = cursor
+    return db
+
+def make_row(ts, market_id, price=0.5):
+    return {"ts": ts, "market_id": market_id, "price": price, "volume": 20000.0, "liquidity": None}
+
+class TestWriteSnapshots:
+    def test_copy_streams_rows_then_merges(self, db, cursor, now):
+        count = write_snapshots(db, [make_row(now, "m1"), make_row(now, "m2")])
+
+        assert count == 2
+        copy_sql, buf = cursor.copy_expert.call_args[0]
+        assert copy_sql.startswith("COPY snapshot_staging")
+        assert len(list(csv.reader(buf))) == 2
+
+        merge_sql = cursor.execute.call_args[0][0]
+        assert "INSERT INTO market_snapshots" in merge_sql
+        assert "ON CONFLICT (ts, market_id) DO UPDATE" in merge_sql
+        cursor.close.assert_called_once()
+
+    def test_duplicate_keys_are_collapsed(self, db, cursor, now):
+        write_snapshots(db, [make_row(now, "m1", 0.1), make_row(now, "m1", 0.2)])
+
+        rows = list(csv.reader(cursor.copy_expert.call_args[0][1]))
+        assert len(rows) == 1
+        assert rows[0][2] == "0.2"
+
+    def test_values_fallback(self, db, cursor, now):
+        with patch("services.snapshot_writer.execute_values") as execute_values:
+            count = write_snapshots(db, [make_row(now, "m1")], method="values")
+
+        assert count == 1
+        sql, values = execute_values.call_args[0][1:3]
+        assert "VALUES %s ON CONFLICT (ts, market_id)" in sql
+        assert values[0][1] == "m1"
+        cursor.copy_expert.assert_not_called()
+
+    def test_empty_rows_skip_database(self, db):
+        assert write_snapshots(db, []) == 0
+        db.connection.assert_not_called()
+
+    def test_unknown_method_raises(self, db, now):
+        with pytest.raises(ValueError):
+            write_snapshots(db, [make_row(now, "m1")], method="orm")
+
+class TestCsvEncoding:
+    def test_none_becomes_empty_field(self, now):
+        line = _to_csv([make_row(now, "m1")]).read().strip()
+        assert line == f"{now.isoformat()},m1,0.5,20000.0,,,,,,"
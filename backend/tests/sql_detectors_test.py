@@ -0,0 +1,41 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+from services.sql_detectors import detect_signals_sql
+
+def make_row(**fields):
+    row = {
+        "signal_type": "volume_spike", "market_id": "m1", "title": "Test Market",
+        "latest_delta": None, "avg_delta": None, "std_delta": None, "z_score": None,
+        "current_price": None, "earlier_price": None,
+    }
+    row.update(fields)
+    return SimpleNamespace(**row)
+
+class TestSqlDetectors:
+    def test_builds_signals_from_candidate_rows(self):
+        db = MagicMock()
+        db.execute.return_value.all.return_value = [
+            make_row(latest_delta=51000.0, avg_delta=4333.333, std_delta=12472.2, z_score=3.74),
+            make_row(signal_type="price_momentum", market_id="m2", current_price=0.5, earlier_price=0.75),
+        ]
+
+        signals = detect_signals_sql(db)
+
+        spike, momentum = signals
+        assert spike["signal_type"] == "volume_spike"
+        assert spike["confidence"] == 0.75
+        assert spike["details"] == {"current_volume": 51000.0, "avg_volume": 4333.33, "std_dev": 12472.2, "z_score": 3.74}
+        assert momentum["details"]["direction"] == "down"
+        assert momentum["details"]["change"] == 0.25
+        assert momentum["confidence"] == 0.83
+
+    def test_passes_thresholds_to_query(self):
+        db = MagicMock()
+        db.execute.return_value.all.return_value = []
+
+        assert detect_signals_sql(db, sigma_threshold=2.5, momentum_threshold=0.1) == []
+
+        params = db.execute.call_args[0][1]
+        assert params["sigma_threshold"] == 2.5
+        assert params["momentum_threshold"] == 0.1
+        assert params["volume_since"] < params["momentum_since"]
@@ -0,0 +1,243 @@
+import asyncio
+import json
+import time
+import pytest
+from datetime import datetime, timezone
+from unittest.mock import patch
+from websockets.asyncio.server import serve
+from services.stream_ingestion import LatestStateTable, StreamIngestor, backoff_delay, write_stream_snapshots
+
+TS = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+UNIVERSE = {
+    "t1": {"market_id": "m1", "volume": 50000.0, "liquidity": 1200.0, "price": 0.45},
+    "t2": {"market_id": "m2", "volume": 20000.0, "liquidity": 300.0, "price": 0.10},
+}
+
+def book_event(token_id):
+    return {
+        "event_type": "book", "asset_id": token_id,
+        "bids": [{"price": "0.48", "size": "100"}, {"price": "0.47", "size": "50"}],
+        "asks": [{"price": "0.52", "size": "80"}, {"price": "0.53", "size": "20"}],
+    }
+
+def price_change(token_id, price, size, side):
+    return {"event_type": "price_change", "market": "0xabc",
+            "price_changes": [{"asset_id": token_id, "price": price, "size": size, "side": side}]}
+
+class StandInMarketChannel:
+    """Local stand-in for the CLOB market channel.
+
+    Each connection records its subscription and plays the next script:
+    dicts are sent, numbers are pauses and None hangs up. Otherwise the
+    socket stays open and answers PINGs.
+    """
+
+    def __init__(self, scripts):
+        self.scripts = list(scripts)
+        self.subscriptions = []
+
+    async def handler(self, socket):
+        self.subscriptions.append(json.loads(await socket.recv()))
+        script = self.scripts.pop(0) if self.scripts else []
+        for message in script:
+            if message is None:
+                return
+            if isinstance(message, float):
+                await asyncio.sleep(message)
+                continue
+            await socket.send(json.dumps(message))
+        async for message in socket:
+            if message == "PING":
+                await socket.send("PONG")
+
+async def run_until(ingestor, condition, timeout=5):
+    task = asyncio.create_task(ingestor.run())
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        await asyncio.sleep(0.02)
+    ingestor.stop()
+    await task
+
+class TestLatestStateTable:
+    def make_table(self):
+        table = LatestStateTable()
+        table.set_universe(UNIVERSE)
+        table.drain(TS)
+        return table
+
+    def test_ticks_coalesce_into_one_row(self):
+        table = self.make_table()
+        table.apply(book_event("t1"))
+        table.apply(price_change("t1", "0.49", "30", "BUY"))
+        table.apply(price_change("t1", "0.48", "0", "BUY"))
+        table.apply({"event_type": "last_trade_price", "asset_id": "t1", "price": "0.50", "size": "5"})
+
+        rows = table.drain(TS)
+        assert len(rows) == 1
+        row = rows[0]
+        assert row["market_id"] == "m1"
+        assert row["price"] == 0.505
+        assert row["volume"] == 50000.0
+        assert row["bid_ask_spread"] == 0.03
+        assert row["best_bid_size"] == 30.0
+        assert table.drain(TS) == []
+
+    def test_unknown_tokens_and_malformed_events_are_ignored(self):
+        table = self.make_table()
+        table.apply(book_event("other"))
+        table.apply(price_change("t2", "x", "1", "SELL"))
+        table.apply({"event_type": "tick_size_change", "asset_id": "t1"})
+        assert table.drain(TS) == []
+
+    def test_last_trade_then_gamma_price_as_fallback(self):
+        table = self.make_table()
+        table.apply({"event_type": "last_trade_price", "asset_id": "t2", "price": "0.12"})
+        assert table.drain(TS)[0]["price"] == 0.12
+
+        table.set_universe(UNIVERSE)
+        rows = {row["market_id"]: row for row in table.drain(TS)}
+        assert rows["m1"]["price"] == 0.45
+        assert "bid_ask_spread" not in rows["m1"]
+
+    def test_universe_change(self):
+        table = self.make_table()
+        assert table.set_universe(UNIVERSE) is False
+        assert table.set_universe({"t1": UNIVERSE["t1"]}) is True
+        assert [row["market_id"] for row in table.drain(TS)] == ["m1"]
+
+class TestBackoff:
+    def test_grows_and_caps(self):
+        with patch("services.stream_ingestion.random.uniform", side_effect=lambda lo, hi: hi):
+            assert [backoff_delay(n, cap=10) for n in range(6)] == [1, 2, 4, 8, 10, 10]
+
+class TestStreamIngestor:
+    def run_stream(self, scripts, condition, **kwargs):
+        flushed = []
+
+        async def main():
+            channel = StandInMarketChannel(scripts)
+            async with serve(channel.handler, "127.0.0.1", 0) as server:
+                port = server.sockets[0].getsockname()[1]
+                ingestor = StreamIngestor(url=f"ws://127.0.0.1:{port}", load_universe=lambda: UNIVERSE,
+                                          flush_rows=lambda rows, detect: flushed.append(rows), **kwargs)
+                await run_until(ingestor, lambda: condition(ingestor, channel, flushed))
+            return ingestor, channel
+
+        ingestor, channel = asyncio.run(main())
+        return ingestor, channel, flushed
+
+    def test_subscribes_and_flushes_on_cadence(self):
+        script = [book_event("t1"), 0.3] + [price_change("t1", f"0.49{i}", "10", "BUY") for i in range(5)]
+        ingestor, channel, flushed = self.run_stream(
+            [script], lambda ingestor, channel, flushed: len(flushed) >= 2, flush_seconds=0.1)
+
+        assert channel.subscriptions == [{"assets_ids": ["t1", "t2"], "type": "market"}]
+        # the universe load dirties both markets; the later burst of ticks is one m1 row
+        assert sorted(row["market_id"] for row in flushed[0]) == ["m1", "m2"]
+        assert len(flushed[1]) == 1
+        assert flushed[1][0]["best_bid_size"] == 10.0
+        assert flushed[1][0]["price"] == round((0.494 + 0.52) / 2, 4)
+
+    def test_reconnects_and_resubscribes_after_drop(self):
+        scripts = [[book_event("t1"), None], [None], [book_event("t2")]]
+        ingestor, channel, flushed = self.run_stream(
+            scripts, lambda ingestor, channel, flushed: ingestor.connections >= 3 and ingestor.table.ticks,
+            flush_seconds=30, max_backoff=0.05)
+
+        assert len(channel.subscriptions) == 3
+        assert all(sub["assets_ids"] == ["t1", "t2"] for sub in channel.subscriptions)
+        # stopping flushes whatever is still pending
+        markets = {row["market_id"] for batch in flushed for row in batch}
+        assert markets == {"m1", "m2"}
+
+    def test_unreachable_server_backs_off(self):
+        async def main():
+            ingestor = StreamIngestor(url="ws://127.0.0.1:9", load_universe=lambda: UNIVERSE,
+                                      flush_rows=lambda rows, detect: None, max_backoff=0.05)
+            with patch("services.stream_ingestion.backoff_delay", wraps=backoff_delay) as delay:
+                await run_until(ingestor, lambda: delay.call_count >= 3)
+            return ingestor, delay
+
+        ingestor, delay = asyncio.run(main())
+        assert ingestor.connections == 0
+        assert [c.args[0] for c in delay.call_args_list[:3]] == [0, 1, 2]
+
+    def test_malformed_frames_are_skipped(self):
+        ingestor = StreamIngestor(load_universe=lambda: UNIVERSE, flush_rows=lambda rows, detect: None)
+        ingestor.table.set_universe(UNIVERSE)
+        ingestor.table.drain(TS)
+
+        ingestor._handle(json.dumps([
+            {"event_type": "price_change", "price_changes": ["not a change"]},
+            {"event_type": "book", "asset_id": ["t1"], "bids": [], "asks": []},
+            book_event("t1"),
+        ]))
+
+        assert [row["market_id"] for row in ingestor.table.drain(TS)] == ["m1"]
+
+    def test_crashed_loop_fails_run(self):
+        flushed = []
+
+        async def broken_universe():
+            raise KeyError("volume")
+
+        async def main():
+            ingestor = StreamIngestor(url="ws://127.0.0.1:9", flush_rows=lambda rows, detect: flushed.append(rows),
+                                      flush_seconds=30)
+            ingestor._universe_loop = broken_universe
+            ingestor.table.set_universe(UNIVERSE)
+            await asyncio.wait_for(ingestor.run(), 2)
+
+        with pytest.raises(KeyError):
+            asyncio.run(main())
+        # pending state is still written on the way out
+        assert {row["market_id"] for row in flushed[0]} == {"m1", "m2"}
+
+    def test_detects_only_on_the_flush_after_a_universe_refresh(self):
+        script = [book_event("t1"), 0.15, price_change("t1", "0.49", "10", "BUY"),
+                  0.15, price_change("t1", "0.48", "10", "BUY")]
+        detected = []
+
+        async def main():
+            channel = StandInMarketChannel([script])
+            async with serve(channel.handler, "127.0.0.1", 0) as server:
+                port = server.sockets[0].getsockname()[1]
+                ingestor = StreamIngestor(url=f"ws://127.0.0.1:{port}", load_universe=lambda: UNIVERSE,
+                                          flush_rows=lambda rows, detect: detected.append(detect),
+                                          flush_seconds=0.1, universe_seconds=30)
+                await run_until(ingestor, lambda: len(detected) >= 3)
+
+        asyncio.run(main())
+        assert detected[:3] == [True, False, False]
+
+class TestWriteStreamSnapshots:
+    @patch("services.stream_ingestion.bump_data_version")
+    @patch("services.stream_ingestion.run_detections")
+    @patch("services.stream_ingestion.write_snapshots", return_value=1)
+    @patch("services.stream_ingestion.SessionLocal")
+    @patch("services.collector_runs.SessionLocal")
+    def test_writes_detects_and_bumps(self, RunSession, MockSession, write, detect, bump):
+        db = MockSession.return_value
+        write_stream_snapshots([{"market_id": "m1"}])
+
+        write.assert_called_once_with(db, [{"market_id": "m1"}])
+        detect.assert_called_once()
+        bump.assert_called_once_with(db)
+        db.close.assert_called_once()
+        saved = RunSession.return_value.add.call_args[0][0]
+        assert [s["name"] for s in saved.stages] == ["snapshots.write", "data_version"]
+
+    @patch("services.stream_ingestion.bump_data_version")
+    @patch("services.stream_ingestion.run_detections")
+    @patch("services.stream_ingestion.write_snapshots", return_value=1)
+    @patch("services.stream_ingestion.SessionLocal")
+    @patch("services.collector_runs.SessionLocal")
+    def test_flushes_between_refreshes_leave_signals_alone(self, RunSession, MockSession, write, detect, bump):
+        rows = [{"market_id": "m1", "volume": 50000.0}]
+        for fresh in (True, False, False):
+            write_stream_snapshots(rows, detect=fresh)
+
+        # only the fresh-volume flush detects, so an active spike isn't resolved on a stale delta
+        assert write.call_count == 3
+        detect.assert_called_once()
+        bump.assert_called_once()
@@ -1,4 +1,4 @@
-import {type Signal, type VolumeSpikeMeta, type PriceMomentumMeta} from "../types.ts";
+import {type Signal, type VolumeSpikeMeta, type PriceMomentumMeta, type LiquidityDrainMeta} from "../types.ts";
 
 interface SignalCardProps{
     signal: Signal;
@@ -15,6 +15,7 @@ function formatRelativeTime(iso: string): string {
 
 export default function SignalCard({signal}: SignalCardProps) {
     const isVolume = signal.signal_type === "volume_spike";
+    const isLiquidity = signal.signal_type === "liquidity_drain";
     const meta = signal.metadata;
 
     const confidenceColor = signal.confidence && signal.confidence >= 0.7
@@ -29,7 +30,7 @@ export default function SignalCard({signal}: SignalCardProps) {
         ? "Medium Confidence"
         : "Low Confidence";
 
-    const label = isVolume ? "Volume Spike" : "Price Momentum";
+    const label = isVolume ? "Volume Spike" : isLiquidity ? "Liquidity Drain" : "Price Momentum";
 
     const timeAgo = signal.detected_at ? formatRelativeTime(signal.detected_at) : "unknown";
 
@@ -53,7 +54,13 @@ export default function SignalCard({signal}: SignalCardProps) {
                     <p>Avg Volume: {(meta as VolumeSpikeMeta).avg_volume.toLocaleString()}</p>
                 </div>
             )}
-            {!isVolume && meta && (
+            {isLiquidity && meta && (
+                <div className="text-xs text-gray-400 space-y-1">
+                    <p>Liquidity: {(meta as LiquidityDrainMeta).current_liquidity.toLocaleString()}</p>
+                    <p>Drop: {((meta as LiquidityDrainMeta).change * 100).toFixed(1)}%</p>
+                </div>
+            )}
+            {!isVolume && !isLiquidity && meta && (
                 <div className="text-xs text-gray-400 space-y-1">
                     <p>Direction: {(meta as PriceMomentumMeta).direction}</p>
                     <p>Change: {((meta as PriceMomentumMeta).change * 100).toFixed(1)}%</p>
@@ -1,10 +1,34 @@
-import {useQuery} from "@tanstack/react-query";
-import {fetchActiveSignals} from "../lib/api.ts";
+import {useEffect} from "react";
+import {useQuery, useQueryClient} from "@tanstack/react-query";
+import {fetchActiveSignals, openSignalStream} from "../lib/api.ts";
+import type {Signal} from "../types";
 
 export function useActiveSignals(limit = 20, signalType?: string){
+    const queryClient = useQueryClient();
+    const queryKey = ["signals", "active", limit, signalType];
+
+    useEffect(() => {
+        const stream = openSignalStream(signalType);
+        let dropped = false;
+        stream.addEventListener("signal", (e) => {
+            const signal: Signal = JSON.parse((e as MessageEvent).data);
+            queryClient.setQueryData<Signal[]>(queryKey, (old = []) =>
+                [signal, ...old.filter((s) => s.id !== signal.id)].slice(0, limit));
+        });
+        // anything pushed while the stream was down is picked up by one refetch
+        stream.onerror = () => { dropped = true; };
+        stream.onopen = () => {
+            if (dropped) queryClient.invalidateQueries({queryKey});
+            dropped = false;
+        };
+        return () => stream.close();
+        // eslint-disable-next-line react-hooks/exhaustive-deps
+    }, [queryClient, limit, signalType]);
+
     return useQuery({
-        queryKey: ["signals", "active", limit, signalType],
+        queryKey,
         queryFn: () => fetchActiveSignals(limit, signalType),
-        refetchInterval: 30_000,
+        // new signals arrive over the stream; polling only catches refreshes and resolutions
+        refetchInterval: 300_000,
     });
-}
\ No newline at end of file
+}
@@ -1,4 +1,4 @@
-import type {Signal, CalibrationData, PaginationMarkets, Snapshot} from "../types";
+import type {Signal, CalibrationData, PaginationMarkets, Snapshot, SnapshotResolution} from "../types";
 
 const BASE_API_URL = import.meta.env.VITE_API_URL || "/api"
 
@@ -13,6 +13,12 @@ export async function fetchActiveSignals (
     return res.json();
 }
 
+export function openSignalStream(signaltype?: string): EventSource {
+    const params = new URLSearchParams();
+    if (signaltype) params.set("signal_type", signaltype);
+    return new EventSource(`${BASE_API_URL}/signals/stream?${params}`);
+}
+
 export async function fetchSignalHistory(
     marketId: string,
     limit: number = 50
@@ -41,8 +47,9 @@ export async function fetchCalibration(category?: string): Promise<CalibrationDa
     return res.json();
 }
 
-export async function fetchSnapshots(marketId: string): Promise<Snapshot[]> {
-    const res = await fetch(`${BASE_API_URL}/markets/${marketId}/snapshots`);
+export async function fetchSnapshots(marketId: string, days: number = 5, resolution: SnapshotResolution = "auto"): Promise<Snapshot[]> {
+    const params = new URLSearchParams({days: String(days), resolution});
+    const res = await fetch(`${BASE_API_URL}/markets/${marketId}/snapshots?${params}`);
     if (!res.ok) throw new Error(`Snapshot fetch failed: ${res.status}`);
     return res.json();
 }
\ No newline at end of file
@@ -4,7 +4,7 @@ import SignalList from "../components/SignalList.tsx";
 import MarketTable from "../components/MarketTable.tsx";
 import {useState, useRef, useEffect} from "react";
 
-type SignalFilter = "all" | "volume_spike" | "price_momentum";
+type SignalFilter = "all" | "volume_spike" | "price_momentum" | "liquidity_drain";
 
 export default function Dashboard(){
     const [filter, setFilter] = useState<SignalFilter>("all");
@@ -33,6 +33,7 @@ export default function Dashboard(){
         {value: "all", label: "All"},
         {value: "volume_spike", label: "Volume Spike"},
         {value: "price_momentum", label: "Price Momentum"},
+        {value: "liquidity_drain", label: "Liquidity Drain"},
     ];
 
     return (
@@ -41,7 +42,7 @@ export default function Dashboard(){
                 <div className="flex items-center justify-between mb-4">
                     <h2 className="text-lg font-semibold">Active Signals</h2>
                     <span className="text-xs text-gray-500">
-                        Auto-refreshes every 30s
+                        Live updates
                     </span>
                 </div>
                 <div className="flex gap-1 bg-gray-900 rounded-lg p-1 w-fit mb-4">
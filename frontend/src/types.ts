@@ -12,13 +12,19 @@ export interface PriceMomentumMeta {
     direction: "up" | "down"
 }
 
-export type SignalMetadata = VolumeSpikeMeta | PriceMomentumMeta;
+export interface LiquidityDrainMeta {
+    current_liquidity: number;
+    earlier_liquidity: number;
+    change: number;
+}
+
+export type SignalMetadata = VolumeSpikeMeta | PriceMomentumMeta | LiquidityDrainMeta;
 
 export interface Signal {
     id: string;
     market_id: string;
     title?: string;
-    signal_type: "volume_spike" | "price_momentum";
+    signal_type: "volume_spike" | "price_momentum" | "liquidity_drain";
     confidence: number | null;
     detected_at: string | null;
     metadata: SignalMetadata | null;
@@ -38,6 +44,7 @@ export interface CalibrationBin {
     avg_predicted: number;
     actual_frequency: number | null;
     count: number;
+    frequency_ci?: [number, number] | null;
 }
 
 export interface CategoryBreakdown {
@@ -51,11 +58,22 @@ export interface CalibrationData {
     market_count: number;
     calibration_curve: CalibrationBin[];
     category_breakdown: CategoryBreakdown[];
+    category_curves?: Record<string, CalibrationBin[]>;
+    brier_ci?: [number, number];
+    horizons?: HorizonCalibration[];
+}
+
+export interface HorizonCalibration {
+    horizon: string;
+    hours: number;
+    brier_score: number | null;
+    market_count: number;
 }
 
 export interface PaginationMarkets {
     markets: Market[];
     total: number;
+    next_cursor: string | null;
 }
 
 export interface Snapshot {
@@ -63,4 +81,12 @@ export interface Snapshot {
     price: number;
     volume: number;
     liquidity: number | null;
-}
\ No newline at end of file
+    open?: number;
+    high?: number;
+    low?: number;
+    close?: number;
+    volume_change?: number;
+    samples?: number;
+}
+
+export type SnapshotResolution = "auto" | "raw" | "1h" | "1d";
\ No newline at end of file